@@ -0,0 +1,91 @@
+"""
+Cost of getting a take into Whisper's input format on each transcription:
+decoding the source with ffmpeg (what Whisper does for a file path) against
+memory-mapping the PCM cached at upload, plus the silence pass used for
+chunking, from the source and from the cache.
+
+    python -m benchmarks.audio_decode --minutes 30
+    python -m benchmarks.audio_decode --file path/to/take.mp3
+
+Without --file a 44.1 kHz stereo MP3 of --minutes minutes is generated in a
+temporary directory. Needs ffmpeg.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+
+def _write_take(path: str, minutes: float):
+    # Speech-like bursts separated by pauses, so the silence passes have work to do
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+         "-f", "lavfi", "-i", f"sine=frequency=220:sample_rate=44100:duration={minutes * 60}",
+         "-af", "volume='if(lt(mod(t,6),4),1,0)':eval=frame", "-ac", "2", path],
+        check=True
+    )
+
+
+def _ffmpeg_decode(path: str) -> np.ndarray:
+    # Same command as whisper.audio.load_audio
+    out = subprocess.run(
+        ["ffmpeg", "-nostdin", "-threads", "0", "-i", path, "-f", "s16le", "-ac", "1",
+         "-acodec", "pcm_s16le", "-ar", "16000", "-"],
+        capture_output=True, check=True
+    ).stdout
+    return np.frombuffer(out, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def _timed(fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=30)
+    parser.add_argument("--file")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["AUDIO_CACHE_DIR"] = tmp
+        from services.audio_cache import decode_pcm, decoder_available, load_pcm
+        from services.chunking import detect_pcm_silences, detect_silences
+
+        if not decoder_available():
+            print("ffmpeg not found")
+            return 1
+
+        path = args.file
+        if path is None:
+            path = os.path.join(tmp, "take.mp3")
+            _write_take(path, args.minutes)
+        print(f"{os.path.basename(path)}: {os.path.getsize(path) / 1e6:.1f} MB")
+
+        start = time.perf_counter()
+        cached = decode_pcm(path, "bench")
+        print(f"  decode to cache (once, at upload) {time.perf_counter() - start:8.3f}s")
+
+        rows = [
+            ("ffmpeg decode per run", lambda: _ffmpeg_decode(path)),
+            ("memmap cached PCM", lambda: float(load_pcm(cached).sum())),
+            ("silences from source", lambda: detect_silences(path)),
+            ("silences from cached PCM", lambda: detect_pcm_silences(load_pcm(cached))),
+        ]
+        for label, fn in rows:
+            seconds, _ = _timed(fn, args.repeat)
+            print(f"  {label:33s} {seconds:8.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
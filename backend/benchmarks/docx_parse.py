@@ -0,0 +1,89 @@
+"""
+Time and peak memory of DOCX script parsing: the python-docx object-model
+parser against the streaming parser used by upload_script.
+
+    python -m benchmarks.docx_parse --pages 200
+    python -m benchmarks.docx_parse --file path/to/script.docx
+
+Without --file a colour-coded script of roughly --pages pages is generated
+in a temporary directory.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def _write_script(path: str, pages: int, artists: int):
+    from docx import Document
+    from docx.shared import RGBColor
+
+    palette = [RGBColor((i * 97) % 256, (i * 53) % 256, (i * 151) % 256) for i in range(artists)]
+    doc = Document()
+    # ~30 dialogue lines a page
+    for i in range(pages * 30):
+        para = doc.add_paragraph()
+        para.add_run(f"Line {i + 1}: ").font.color.rgb = palette[i % artists]
+        para.add_run("some spoken dialogue for the benchmark, long enough to wrap once.").font.color.rgb = palette[i % artists]
+    doc.save(path)
+
+
+def _python_docx_lines(filepath: str):
+    """The previous parse_docx_with_all_lines, kept here as the baseline."""
+    from docx import Document
+
+    lines = []
+    line_number = 0
+    for para in Document(filepath).paragraphs:
+        text = para.text.strip()
+        if not text:
+            continue
+        line_number += 1
+        dominant_color, max_length = "#000000", 0
+        for run in para.runs:
+            if run.text.strip():
+                rgb = run.font.color.rgb
+                color = f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}".upper() if rgb else "#000000"
+                if len(run.text) > max_length:
+                    max_length, dominant_color = len(run.text), color
+        lines.append((line_number, text, dominant_color))
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="parse this DOCX instead of a generated one")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--artists", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    from services.script_parser import iter_docx_lines
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.file
+        if path is None:
+            path = os.path.join(tmp, "script.docx")
+            _write_script(path, args.pages, args.artists)
+        print(f"{path}: {os.path.getsize(path):,} bytes, best of {args.repeat}")
+
+        streaming = lambda p: sum(1 for _ in iter_docx_lines(p))  # noqa: E731
+        baseline = lambda p: len(_python_docx_lines(p))  # noqa: E731
+        for label, parse in (("python-docx", baseline), ("streaming", streaming)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                lines = parse(path)
+                best = min(best, time.perf_counter() - start)
+            tracemalloc.start()
+            parse(path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"  {label:11s} {best:8.3f}s  {lines / best:10,.0f} lines/s  peak {peak / 2**20:7.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
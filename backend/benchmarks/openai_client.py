@@ -0,0 +1,172 @@
+"""
+Transcribing a batch of takes against a local stub of the OpenAI audio API
+that rate-limits like the real one (429 over its requests-per-minute budget)
+and fails a share of requests with 503: a fresh client per file, as before,
+against the shared client manager, each from the same number of worker
+threads as transcription jobs run in.
+
+    python -m benchmarks.openai_client --files 60 --rpm 120 --error-rate 0.1
+
+Reports files transcribed and failed, wall time, and the TCP connections
+and 429s the stub saw.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Stub(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, rpm: float, error_rate: float, latency: float):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.rate = rpm / 60
+        self.capacity = max(1.0, rpm / 60)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.error_rate = error_rate
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.stats = {"connections": 0, "requests": 0, "429": 0, "503": 0}
+
+    def admit(self) -> bool:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.stats["requests"] += 1
+            if self.tokens < 1:
+                self.stats["429"] += 1
+                return False
+            self.tokens -= 1
+            return True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.stats["connections"] += 1
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: dict, headers: dict = None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._send(200, {"object": "list", "data": []})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if not self.server.admit():
+            self._send(429, {"error": {"message": "Rate limit reached", "type": "requests"}}, {"Retry-After": "1"})
+            return
+        if random.random() < self.server.error_rate:
+            with self.server.lock:
+                self.server.stats["503"] += 1
+            self._send(503, {"error": {"message": "Service unavailable"}})
+            return
+        time.sleep(self.server.latency)
+        self._send(200, {
+            "text": "hello there", "language": "english", "duration": 2.0,
+            "segments": [{"id": 0, "start": 0.0, "end": 2.0, "text": " hello there", "avg_logprob": -0.2}]
+        })
+
+
+def _write_takes(directory: str, count: int):
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f"take_{i:03d}.wav")
+        with wave.open(path, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(16000)
+            w.writeframes(b"\0\0" * 16000 * 2)
+        paths.append(path)
+    return paths
+
+
+def _run(transcribe, paths, workers: int):
+    def safe(path):
+        try:
+            return transcribe(path)
+        except Exception as e:  # noqa: BLE001 - counted and reported
+            return e
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(safe, paths))
+
+
+def _naive(paths, workers: int):
+    from openai import OpenAI
+
+    def one(path):
+        client = OpenAI(api_key="sk-bench", base_url=os.environ["OPENAI_BASE_URL"])
+        with open(path, "rb") as f:
+            return client.audio.transcriptions.create(model="whisper-1", file=f, response_format="verbose_json")
+
+    return _run(one, paths, workers)
+
+
+def _pooled(paths, workers: int):
+    from services.openai_client import openai_clients
+    return _run(lambda path: openai_clients.transcribe("sk-bench", path), paths, workers)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=60)
+    parser.add_argument("--rpm", type=float, default=120, help="Stub's requests per minute")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="Share of requests answered 503")
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds per successful transcription")
+    parser.add_argument("--workers", type=int, default=8, help="Files transcribed in parallel")
+    args = parser.parse_args(argv)
+
+    random.seed(0)
+    stub = _Stub(args.rpm, args.error_rate, args.latency)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+    os.environ["OPENAI_BASE_URL"] = f"http://127.0.0.1:{stub.server_address[1]}/v1"
+    os.environ.setdefault("OPENAI_REQUESTS_PER_MINUTE", str(args.rpm))
+    os.environ.setdefault("OPENAI_MAX_CONCURRENCY", str(args.workers))
+    os.environ.setdefault("OPENAI_RETRY_BASE_SECONDS", "0.5")
+
+    print(f"{args.files} files, stub at {args.rpm:g} rpm, {args.error_rate:.0%} 503s")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _write_takes(tmp, args.files)
+        for label, run in (("client per file", lambda: _naive(paths, args.workers)), ("shared manager", lambda: _pooled(paths, args.workers))):
+            # Start each run with the stub's bucket full
+            stub.tokens, stub.updated = stub.capacity, time.monotonic()
+            stub.stats = dict.fromkeys(stub.stats, 0)
+            start = time.perf_counter()
+            results = run()
+            elapsed = time.perf_counter() - start
+            failed = sum(isinstance(r, Exception) for r in results)
+            s = stub.stats
+            print(
+                f"  {label:16s} {len(results) - failed:4d} ok {failed:4d} failed {elapsed:7.1f}s  "
+                f"{s['connections']:4d} connections {s['requests']:5d} requests {s['429']:4d} x 429 {s['503']:4d} x 503"
+            )
+    stub.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
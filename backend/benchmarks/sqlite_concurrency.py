@@ -0,0 +1,142 @@
+"""
+Read and write throughput of a SQLite database under concurrent matching:
+writer threads re-match an artist's lines and move the status counters, as
+transcription jobs do, while reader threads build QC reports.
+
+    python -m benchmarks.sqlite_concurrency --seconds 10 --writers 4 --readers 8
+
+Each SQLITE_PROFILE (production, off) runs in its own interpreter, because
+the profile is applied when models.database is imported. A fresh database
+file is used for every run.
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+PROFILES = ("production", "off")
+
+
+def _setup(lines: int, artists: int) -> str:
+    from models.database import SessionLocal, Project
+    from services.script_ingest import replace_script_lines
+    from services.status_counters import rebuild_counters
+
+    palette = [f"#{(i * 2654435761) & 0xFFFFFF:06X}" for i in range(artists)]
+    parsed = [(i + 1, f"Line {i + 1}: some spoken dialogue.", palette[i % artists]) for i in range(lines)]
+    db = SessionLocal()
+    try:
+        project = Project(id=str(uuid.uuid4()), name="bench", show_code="BENCH", episode_number="0")
+        db.add(project)
+        db.flush()
+        replace_script_lines(db, project.id, parsed)
+        rebuild_counters(db, project.id)
+        db.commit()
+        return project.id
+    finally:
+        db.close()
+
+
+def _writer(project_id: str, deadline: float, stats: dict):
+    from models.database import SessionLocal, Artist, ScriptLine
+    from services.status_counters import apply_status_changes, set_line_statuses
+
+    rng = random.Random()
+    db = SessionLocal()
+    artist_ids = [a for (a,) in db.query(Artist.id).filter(Artist.project_id == project_id)]
+    db.close()
+    while time.perf_counter() < deadline:
+        db = SessionLocal()
+        try:
+            line_ids = [i for (i,) in db.query(ScriptLine.id).filter(ScriptLine.artist_id == rng.choice(artist_ids))]
+            changes = set_line_statuses(db, project_id, {
+                line_id: {"status": rng.choice(("found", "partial", "missing")), "confidence": rng.random()}
+                for line_id in line_ids
+            })
+            apply_status_changes(db, project_id, changes)
+            db.commit()
+            stats["writes"] += 1
+        except Exception as e:  # noqa: BLE001 - counted and reported
+            db.rollback()
+            stats["errors"] += 1
+            stats["last_error"] = str(e).splitlines()[0]
+        finally:
+            db.close()
+
+
+def _reader(project_id: str, deadline: float, stats: dict):
+    from models.database import SessionLocal, Artist, ScriptLine
+    from services.status_counters import read_counters
+
+    while time.perf_counter() < deadline:
+        db = SessionLocal()
+        try:
+            read_counters(db, project_id)
+            db.query(
+                ScriptLine.id, ScriptLine.line_number, ScriptLine.text, Artist.name, ScriptLine.status
+            ).outerjoin(Artist, Artist.id == ScriptLine.artist_id).filter(
+                ScriptLine.project_id == project_id
+            ).order_by(ScriptLine.line_number).all()
+            stats["reads"] += 1
+        except Exception as e:  # noqa: BLE001 - counted and reported
+            stats["errors"] += 1
+            stats["last_error"] = str(e).splitlines()[0]
+        finally:
+            db.close()
+
+
+def run_profile(args) -> int:
+    from models.database import engine
+
+    project_id = _setup(args.lines, args.artists)
+    stats = {"reads": 0, "writes": 0, "errors": 0, "last_error": None}
+    deadline = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=_writer, args=(project_id, deadline, stats)) for _ in range(args.writers)]
+    threads += [threading.Thread(target=_reader, args=(project_id, deadline, stats)) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    with engine.connect() as conn:
+        journal = conn.exec_driver_sql("PRAGMA journal_mode").scalar()
+    print(
+        f"  {os.environ['SQLITE_PROFILE']:10s} ({journal}) "
+        f"{stats['writes'] / args.seconds:8.1f} writes/s  {stats['reads'] / args.seconds:8.1f} reads/s  "
+        f"{stats['errors']} errors" + (f" ({stats['last_error']})" if stats["last_error"] else "")
+    )
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--artists", type=int, default=8)
+    parser.add_argument("--profile", choices=PROFILES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        return run_profile(args)
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.lines} lines, {args.seconds:g}s per profile")
+    passthrough = [a for a in (argv if argv is not None else sys.argv[1:])]
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, SQLITE_PROFILE=profile, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+            subprocess.run(
+                [sys.executable, "-m", "benchmarks.sqlite_concurrency", *passthrough, "--profile", profile],
+                env=env, check=True
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,40 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from models.database import async_engine
 from routers import projects_router, scripts_router, audio_router, qc_router, settings_router
+from services.jobs import preload_default_engine, resume_pending_jobs, shutdown_executor
+from services.openai_client import openai_clients
+from services.resumable_uploads import run_upload_sweeper
+from services.script_parser import shutdown_pdf_executor
+from services.status_counters import build_missing_counters
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pick up transcription jobs that were still queued when the last process exited.
+    resume_pending_jobs()
+    # Count lines once for projects from before the status counters table
+    build_missing_counters()
+    # Load the default engine's model in the background so startup isn't held up
+    asyncio.get_running_loop().run_in_executor(None, preload_default_engine)
+    # Clean up resumable uploads that were abandoned before finalize
+    sweeper = asyncio.create_task(run_upload_sweeper())
+    yield
+    sweeper.cancel()
+    shutdown_executor(wait=False)
+    shutdown_pdf_executor(wait=False)
+    await openai_clients.aclose()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="Multicast QC Tool",
     description="Quality Control tool for multicast voice-over recordings at Pocket FM",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS: allow Vercel frontend + local dev (allow_credentials=True cannot use "*")
@@ -20,6 +49,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 app.include_router(projects_router)
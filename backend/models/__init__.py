@@ -1,6 +1,8 @@
-from .database import Base, engine, SessionLocal, get_db, Project, Artist, ScriptLine, AudioFile, Settings
+from .database import Base, engine, SessionLocal, async_engine, AsyncSessionLocal, get_db, Project, Artist, ScriptLine, AudioFile, Settings, TranscriptionJob, TranscriptionCacheEntry, ParsedScriptCacheEntry, TranscriptSegment, UploadSession, IngestBatch, IngestItem, StatusCounter, ScriptRevision
 from .schemas import (
     ProjectCreate, ProjectResponse, ArtistCreate, ArtistResponse,
-    ScriptLineResponse, AudioUploadResponse, TranscriptionRequest,
-    QCReportResponse, SettingsUpdate, ColorMapping, LineStatus, WhisperMode
+    ScriptLineResponse, AudioUploadResponse, TranscriptionRequest, TranscriptionJobResponse,
+    UploadSessionCreate, UploadSessionResponse, UploadChunk, UploadFinalizeRequest,
+    IngestItemResponse, IngestBatchResponse,
+    QCReportResponse, SettingsUpdate, ColorMapping, LineStatus, WhisperMode, MatchMode, JobStatus
 )
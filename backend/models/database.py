@@ -1,10 +1,12 @@
-from sqlalchemy import create_engine, Column, String, Integer, Float, DateTime, Text, ForeignKey, Boolean
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
+from sqlalchemy import create_engine, event, inspect, text, Column, Index, String, Integer, Float, DateTime, Text, ForeignKey, Boolean, LargeBinary
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, declarative_base, sessionmaker, relationship
 from datetime import datetime
 import os
 import uuid
 
+from .write_queue import serialize_writes
+
 # Use DATABASE_URL in production (e.g. Railway PostgreSQL); SQLite for local/dev.
 # Railway's filesystem is ephemeral — without a real DB, projects disappear after deploy/restart.
 DATABASE_URL = os.environ.get("DATABASE_URL") or "sqlite:///./multicast_qc.db"
@@ -14,17 +16,85 @@ if DATABASE_URL.startswith("postgres://"):
 _connect_args = {} if "sqlite" in DATABASE_URL else {}
 if "sqlite" in DATABASE_URL:
     _connect_args["check_same_thread"] = False
-engine = create_engine(DATABASE_URL, connect_args=_connect_args)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
 
+# Pool sizing for PostgreSQL. The API shares the async pool across all requests;
+# background workers use the sync pool. Pre-ping drops connections Railway closed while idle.
+_pool_args = {} if "sqlite" in DATABASE_URL else {
+    "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+    "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+    "pool_timeout": int(os.environ.get("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": True,
+}
+
+
+def _async_url(url: str) -> str:
+    """The same database through its asyncio driver (aiosqlite / asyncpg)."""
+    scheme, rest = url.split("://", 1)
+    backend = scheme.split("+", 1)[0]
+    driver = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}.get(backend)
+    return f"{backend}+{driver}://{rest}" if driver else url
+
+
+ASYNC_DATABASE_URL = _async_url(DATABASE_URL)
 
-def get_db():
-    db = SessionLocal()
+# SQLite tuning. Every SQLite connection waits up to SQLITE_BUSY_TIMEOUT_MS for
+# another connection's write lock, including ones in other processes, instead
+# of failing at once with "database is locked". SQLITE_PROFILE=production (opt-in)
+# adds WAL so reads never wait on a writer, and funnels this process's writes
+# through a single queue (see write_queue). The queue is per process: run one
+# API process per database file; other processes (e.g. TRANSCRIBE_EXECUTOR=process
+# workers) are only held back by the busy timeout.
+SQLITE_PRODUCTION = "sqlite" in DATABASE_URL and os.environ.get("SQLITE_PROFILE", "off").lower() == "production"
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "15000"))
+SQLITE_PRAGMAS = {"busy_timeout": SQLITE_BUSY_TIMEOUT_MS}
+if SQLITE_PRODUCTION:
+    SQLITE_PRAGMAS.update({
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -int(os.environ.get("SQLITE_CACHE_SIZE_KB", "65536")),
+        "mmap_size": int(os.environ.get("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    })
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
     try:
-        yield db
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
     finally:
-        db.close()
+        cursor.close()
+
+
+class QueuedSession(Session):
+    """Session whose write transactions take their turn in write_queue."""
+
+
+_session_class = QueuedSession if SQLITE_PRODUCTION else Session
+if SQLITE_PRODUCTION:
+    serialize_writes(QueuedSession)
+
+# Sync engine for background jobs, the CLI tools and schema setup
+engine = create_engine(DATABASE_URL, connect_args=_connect_args, **_pool_args)
+SessionLocal = sessionmaker(class_=_session_class, autocommit=False, autoflush=False, bind=engine)
+
+# Async engine for request handlers
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **_pool_args)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, sync_session_class=_session_class, info={"async": True},
+    autoflush=False, expire_on_commit=False
+)
+
+if "sqlite" in DATABASE_URL:
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _set_sqlite_pragmas)
+
+Base = declarative_base()
+
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
 
 def generate_uuid():
@@ -42,10 +112,21 @@ class Project(Base):
     script_uploaded = Column(Boolean, default=False)
     script_filename = Column(String, nullable=True)
     status = Column(String, default="draft")
+    # Per-project engine override (e.g. a faster, less accurate one for temp mixes)
+    transcription_engine = Column(String, nullable=True)
+    transcription_model = Column(String, nullable=True)
     
     artists = relationship("Artist", back_populates="project", cascade="all, delete-orphan")
     lines = relationship("ScriptLine", back_populates="project", cascade="all, delete-orphan")
     audio_files = relationship("AudioFile", back_populates="project", cascade="all, delete-orphan")
+    transcription_jobs = relationship("TranscriptionJob", back_populates="project", cascade="all, delete-orphan")
+    upload_sessions = relationship("UploadSession", back_populates="project", cascade="all, delete-orphan")
+    ingest_batches = relationship("IngestBatch", back_populates="project", cascade="all, delete-orphan")
+    status_counters = relationship("StatusCounter", cascade="all, delete-orphan")
+    script_revisions = relationship(
+        "ScriptRevision", back_populates="project",
+        order_by="ScriptRevision.number", cascade="all, delete-orphan"
+    )
 
 
 class Artist(Base):
@@ -73,11 +154,53 @@ class ScriptLine(Base):
     status = Column(String, default="pending")
     confidence = Column(Float, default=0.0)
     matched_text = Column(Text, nullable=True)
+    matched_audio_id = Column(String, nullable=True)
+    matched_start = Column(Float, nullable=True)  # seconds into the matched take
+    matched_end = Column(Float, nullable=True)
+    content_hash = Column(String, nullable=True)  # identifies the line across script revisions
+    
+    __table_args__ = (
+        Index("ix_script_lines_project_line", "project_id", "line_number"),
+        Index("ix_script_lines_artist_status", "artist_id", "status"),
+    )
     
     project = relationship("Project", back_populates="lines")
     artist = relationship("Artist", back_populates="lines")
 
 
+class ScriptRevision(Base):
+    __tablename__ = "script_revisions"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=False, index=True)
+    number = Column(Integer, nullable=False)
+    filename = Column(String, nullable=True)
+    lines_total = Column(Integer, default=0)
+    lines_kept = Column(Integer, default=0)
+    lines_added = Column(Integer, default=0)
+    lines_removed = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("uq_script_revisions_project_number", "project_id", "number", unique=True),
+    )
+    
+    project = relationship("Project", back_populates="script_revisions")
+
+
+class StatusCounter(Base):
+    """Line counts by status, kept in step with ScriptLine.status (see services.status_counters)."""
+    __tablename__ = "status_counters"
+    
+    project_id = Column(String, ForeignKey("projects.id"), primary_key=True)
+    artist_id = Column(String, primary_key=True, default="")  # "" = whole project
+    pending = Column(Integer, default=0, nullable=False)
+    found = Column(Integer, default=0, nullable=False)
+    partial = Column(Integer, default=0, nullable=False)
+    missing = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class AudioFile(Base):
     __tablename__ = "audio_files"
     
@@ -86,12 +209,154 @@ class AudioFile(Base):
     artist_id = Column(String, ForeignKey("artists.id"), nullable=True)
     filename = Column(String, nullable=False)
     filepath = Column(String, nullable=False)
+    content_hash = Column(String, nullable=True, index=True)  # sha256 of the audio bytes
+    size_bytes = Column(Integer, nullable=True)
+    # Of the uploaded file, filled in when it is decoded (services.audio_cache)
+    duration = Column(Float, nullable=True)
+    sample_rate = Column(Integer, nullable=True)
+    channels = Column(Integer, nullable=True)
     transcription = Column(Text, nullable=True)
+    transcript_index = Column(Text, nullable=True)  # serialized TranscriptIndex for re-matching
     status = Column(String, default="uploaded")
     created_at = Column(DateTime, default=datetime.utcnow)
     
     project = relationship("Project", back_populates="audio_files")
     artist = relationship("Artist", back_populates="audio_files")
+    jobs = relationship("TranscriptionJob", back_populates="audio", cascade="all, delete-orphan")
+    segments = relationship(
+        "TranscriptSegment", back_populates="audio", cascade="all, delete-orphan",
+        order_by="TranscriptSegment.position"
+    )
+
+
+class TranscriptSegment(Base):
+    __tablename__ = "transcript_segments"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    audio_id = Column(String, ForeignKey("audio_files.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    start = Column(Float, nullable=False)
+    end = Column(Float, nullable=False)
+    text = Column(Text, nullable=False)
+    avg_logprob = Column(Float, nullable=True)
+    tokens = Column(Text, nullable=False)  # normalized tokens, space separated
+    
+    audio = relationship("AudioFile", back_populates="segments")
+
+
+ACTIVE_JOB_STATUSES = ("queued", "running")
+
+
+class TranscriptionJob(Base):
+    __tablename__ = "transcription_jobs"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    audio_id = Column(String, ForeignKey("audio_files.id"), nullable=False)
+    status = Column(String, default="queued")
+    mode = Column(String, nullable=True)
+    # Engine and model picked when the job was queued; None resolves from mode
+    engine = Column(String, nullable=True)
+    model = Column(String, nullable=True)
+    error = Column(Text, nullable=True)
+    lines_matched = Column(Integer, default=0)
+    cache_hit = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        # At most one queued or running job per audio file, however fast requests arrive
+        Index(
+            "uq_transcription_jobs_active_audio", "audio_id", unique=True,
+            sqlite_where=status.in_(ACTIVE_JOB_STATUSES),
+            postgresql_where=status.in_(ACTIVE_JOB_STATUSES)
+        ),
+    )
+    
+    project = relationship("Project", back_populates="transcription_jobs")
+    audio = relationship("AudioFile", back_populates="jobs")
+
+
+class TranscriptionCacheEntry(Base):
+    __tablename__ = "transcription_cache"
+    
+    key = Column(String, primary_key=True)  # sha256 of content hash + engine + model + language
+    content_hash = Column(String, nullable=False, index=True)
+    engine = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    language = Column(String, nullable=False, default="auto")
+    transcription = Column(Text, nullable=False)
+    segments = Column(Text, nullable=True)  # JSON list of timestamped segments
+    size_bytes = Column(Integer, default=0)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class ParsedScriptCacheEntry(Base):
+    __tablename__ = "parsed_script_cache"
+    
+    key = Column(String, primary_key=True)  # sha256 of file hash + format + parser version
+    content_hash = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False)  # docx or pdf
+    parser_version = Column(String, nullable=False)
+    lines = Column(LargeBinary, nullable=False)  # zlib-compressed JSON list of [line_number, text, color]
+    line_count = Column(Integer, default=0)
+    size_bytes = Column(Integer, default=0)
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)  # becomes the AudioFile id
+    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    artist_id = Column(String, ForeignKey("artists.id"), nullable=False)
+    filename = Column(String, nullable=False)
+    total_size = Column(Integer, nullable=False)
+    received_bytes = Column(Integer, default=0)
+    chunks = Column(Text, nullable=True)  # JSON list of [offset, size, sha256] per accepted chunk
+    status = Column(String, default="open")  # open, finalized
+    audio_id = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, index=True)
+    
+    project = relationship("Project", back_populates="upload_sessions")
+
+
+class IngestBatch(Base):
+    __tablename__ = "ingest_batches"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    project_id = Column(String, ForeignKey("projects.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    project = relationship("Project", back_populates="ingest_batches")
+    items = relationship(
+        "IngestItem", back_populates="batch",
+        order_by="IngestItem.position", cascade="all, delete-orphan"
+    )
+
+
+class IngestItem(Base):
+    __tablename__ = "ingest_items"
+    
+    id = Column(String, primary_key=True, default=generate_uuid)
+    batch_id = Column(String, ForeignKey("ingest_batches.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)
+    filename = Column(String, nullable=False)
+    artist_id = Column(String, ForeignKey("artists.id"), nullable=True)
+    audio_id = Column(String, ForeignKey("audio_files.id"), nullable=True)
+    job_id = Column(String, ForeignKey("transcription_jobs.id"), nullable=True)
+    status = Column(String, default="queued")  # queued (see job), unassigned, rejected
+    error = Column(Text, nullable=True)
+    
+    batch = relationship("IngestBatch", back_populates="items")
+    artist = relationship("Artist")
+    job = relationship("TranscriptionJob")
 
 
 class Settings(Base):
@@ -100,6 +365,66 @@ class Settings(Base):
     id = Column(Integer, primary_key=True, default=1)
     openai_api_key = Column(String, nullable=True)
     whisper_mode = Column(String, default="local")
+    # Engine and model used in local mode; None falls back to TRANSCRIPTION_ENGINE
+    transcription_engine = Column(String, nullable=True)
+    transcription_model = Column(String, nullable=True)
+    match_mode = Column(String, default="fuzzy")
+
+
+def _add_missing_columns():
+    """create_all() never alters existing tables; add columns introduced since a DB was created."""
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+
+
+def _fail_duplicate_active_jobs():
+    """Databases from before the one-active-job index can hold duplicates; keep the oldest."""
+    if not inspect(engine).has_table(TranscriptionJob.__tablename__):
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE transcription_jobs SET status = 'failed', error = 'Duplicate of another job for this audio' "
+            "WHERE status IN ('queued', 'running') AND EXISTS ("
+            "SELECT 1 FROM transcription_jobs older WHERE older.audio_id = transcription_jobs.audio_id "
+            "AND older.status IN ('queued', 'running') AND (older.created_at < transcription_jobs.created_at "
+            "OR (older.created_at = transcription_jobs.created_at AND older.id < transcription_jobs.id)))"
+        ))
+
+
+def _renumber_duplicate_revisions():
+    """Databases from before the unique revision index can repeat numbers; renumber those projects by age."""
+    if not inspect(engine).has_table(ScriptRevision.__tablename__):
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE script_revisions SET number = ("
+            "SELECT COUNT(*) FROM script_revisions older WHERE older.project_id = script_revisions.project_id "
+            "AND (older.created_at < script_revisions.created_at "
+            "OR (older.created_at = script_revisions.created_at AND older.id <= script_revisions.id))) "
+            "WHERE project_id IN ("
+            "SELECT project_id FROM script_revisions GROUP BY project_id, number HAVING COUNT(*) > 1)"
+        ))
+
+
+def _add_missing_indexes():
+    """create_all() skips indexes on tables that already exist; create any that are new."""
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=conn, checkfirst=True)
 
 
 Base.metadata.create_all(bind=engine)
+_add_missing_columns()
+_fail_duplicate_active_jobs()
+_renumber_duplicate_revisions()
+_add_missing_indexes()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from enum import Enum
 import uuid
@@ -17,6 +17,18 @@ class WhisperMode(str, Enum):
     LOCAL = "local"
 
 
+class MatchMode(str, Enum):
+    FUZZY = "fuzzy"
+    ALIGNED = "aligned"
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
 class ProjectCreate(BaseModel):
     name: str
     show_code: str
@@ -31,6 +43,19 @@ class ProjectResponse(BaseModel):
     created_at: datetime
     script_uploaded: bool = False
     status: str = "draft"
+    total_lines: int = 0
+    found_lines: int = 0
+    partial_lines: int = 0
+    missing_lines: int = 0
+    completion_percentage: float = 0
+    transcription_engine: Optional[str] = None
+    transcription_model: Optional[str] = None
+
+
+class ProjectTranscriptionUpdate(BaseModel):
+    """Per-project engine override; a null engine goes back to the settings."""
+    engine: Optional[str] = None
+    model: Optional[str] = None
 
 
 class ArtistCreate(BaseModel):
@@ -57,6 +82,19 @@ class ScriptLineResponse(BaseModel):
     status: LineStatus = LineStatus.PENDING
     confidence: float = 0.0
     matched_text: Optional[str] = None
+    matched_audio_id: Optional[str] = None
+    matched_start: Optional[float] = None
+    matched_end: Optional[float] = None
+
+
+class ScriptRevisionResponse(BaseModel):
+    number: int
+    filename: Optional[str] = None
+    lines_total: int
+    lines_kept: int
+    lines_added: int
+    lines_removed: int
+    created_at: datetime
 
 
 class AudioUploadResponse(BaseModel):
@@ -65,6 +103,63 @@ class AudioUploadResponse(BaseModel):
     artist_id: str
     transcription: Optional[str] = None
     status: str = "uploaded"
+    duration: Optional[float] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+
+
+class UploadSessionCreate(BaseModel):
+    artist_id: str
+    filename: str
+    total_size: int
+
+
+class UploadChunk(BaseModel):
+    offset: int
+    size: int
+    sha256: str
+
+
+class UploadFinalizeRequest(BaseModel):
+    sha256: Optional[str] = None  # whole-file digest to verify, if the client has one
+
+
+class UploadSessionResponse(BaseModel):
+    id: str
+    project_id: str
+    artist_id: str
+    filename: str
+    total_size: int
+    received_bytes: int = 0
+    status: str = "open"
+    chunks: List[UploadChunk] = []
+    audio_id: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class IngestItemResponse(BaseModel):
+    filename: str
+    artist_id: Optional[str] = None
+    artist_name: Optional[str] = None
+    audio_id: Optional[str] = None
+    job_id: Optional[str] = None
+    status: str  # a JobStatus once queued, else unassigned or rejected
+    error: Optional[str] = None
+
+
+class IngestBatchResponse(BaseModel):
+    id: str
+    project_id: str
+    created_at: datetime
+    total: int
+    queued: int = 0
+    running: int = 0
+    done: int = 0
+    failed: int = 0
+    unassigned: int = 0
+    rejected: int = 0
+    items: List[IngestItemResponse] = []
 
 
 class TranscriptionRequest(BaseModel):
@@ -72,6 +167,22 @@ class TranscriptionRequest(BaseModel):
     mode: WhisperMode = WhisperMode.API
 
 
+class TranscriptionJobResponse(BaseModel):
+    id: str
+    audio_id: str
+    status: JobStatus = JobStatus.QUEUED
+    mode: Optional[str] = None
+    engine: Optional[str] = None
+    model: Optional[str] = None
+    error: Optional[str] = None
+    lines_matched: int = 0
+    cache_hit: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    transcription: Optional[str] = None
+
+
 class QCReportResponse(BaseModel):
     project_id: str
     project_name: str
@@ -88,6 +199,9 @@ class QCReportResponse(BaseModel):
 class SettingsUpdate(BaseModel):
     openai_api_key: Optional[str] = None
     whisper_mode: WhisperMode = WhisperMode.API
+    transcription_engine: Optional[str] = None
+    transcription_model: Optional[str] = None
+    match_mode: Optional[MatchMode] = None
 
 
 class ColorMapping(BaseModel):
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, Union
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session, SessionTransaction
+from sqlalchemy.util import await_only
+
+_Waiter = Union[threading.Event, asyncio.Future]
+
+
+class WriteQueue:
+    """
+    A first-come, first-served slot for the one transaction allowed to write.
+
+    Worker threads wait on an Event; request handlers wait on a Future so the
+    event loop keeps serving reads. Releasing hands the slot straight to the
+    next waiter, so nobody can barge in between.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Deque[_Waiter] = deque()
+        self._busy = False
+
+    def acquire(self):
+        with self._lock:
+            if not self._busy:
+                self._busy = True
+                return
+            waiter = threading.Event()
+            self._waiters.append(waiter)
+        waiter.wait()
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if not self._busy:
+                self._busy = True
+                return
+            waiter = loop.create_future()
+            self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+            # Otherwise the slot was already handed over and _grant passes it on
+            raise
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._busy = False
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+        else:
+            waiter.get_loop().call_soon_threadsafe(self._grant, waiter)
+
+    def _grant(self, waiter: asyncio.Future):
+        if waiter.done():
+            self.release()
+        else:
+            waiter.set_result(None)
+
+
+write_queue = WriteQueue()
+
+
+def _hold(session: Session):
+    if session.info.get("holds_write"):
+        return
+    if session.info.get("async"):
+        # Flushes of an AsyncSession run in a greenlet on the event loop
+        await_only(write_queue.acquire_async())
+    else:
+        write_queue.acquire()
+    session.info["holds_write"] = True
+
+
+def _before_flush(session: Session, flush_context, instances):
+    _hold(session)
+
+
+def _do_orm_execute(state: ORMExecuteState):
+    if state.is_insert or state.is_update or state.is_delete:
+        _hold(state.session)
+
+
+def _after_transaction_end(session: Session, transaction: SessionTransaction):
+    if transaction.parent is None and session.info.pop("holds_write", False):
+        write_queue.release()
+
+
+def serialize_writes(session_class):
+    """
+    Make sessions of this class take the write queue's slot before their
+    first INSERT, UPDATE or DELETE and give it back when the transaction ends.
+    """
+    event.listen(session_class, "before_flush", _before_flush)
+    event.listen(session_class, "do_orm_execute", _do_orm_execute)
+    event.listen(session_class, "after_transaction_end", _after_transaction_end)
@@ -1,14 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, BackgroundTasks
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, UploadFile, File, Form
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from typing import List, Optional, Tuple
 import os
 import uuid
-import shutil
 
-from models.database import get_db, Project, Artist, ScriptLine, AudioFile, Settings
-from models.schemas import AudioUploadResponse
-from services.transcriber import transcribe_audio
-from services.matcher import find_line_in_transcription
+from models.database import get_db, Project, Artist, AudioFile, Settings, TranscriptionJob, UploadSession, IngestBatch, IngestItem
+from models.schemas import (
+    AudioUploadResponse, TranscriptionJobResponse, JobStatus,
+    UploadSessionCreate, UploadSessionResponse, UploadFinalizeRequest,
+    IngestBatchResponse, IngestItemResponse
+)
+from services.ingest import ingest_files
+from services.jobs import enqueue_batch, enqueue_job, enqueue_preprocess
+from services.transcriber import resolve_engine
+from services.resumable_uploads import append_chunk, complete_part, discard_part, part_path, session_chunks
+from services.uploads import AUDIO_KINDS, MAX_AUDIO_BYTES, hash_file, stream_upload
 
 router = APIRouter(prefix="/audio", tags=["audio"])
 
@@ -21,31 +31,25 @@ async def upload_audio(
     project_id: str,
     artist_id: str = Form(...),
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload an audio file for a specific artist."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    artist = db.query(Artist).filter(Artist.id == artist_id).first()
+    artist = await db.get(Artist, artist_id)
     if not artist:
         raise HTTPException(status_code=404, detail="Artist not found")
     
-    allowed_extensions = ['.wav', '.mp3', '.m4a', '.ogg', '.flac']
-    ext = os.path.splitext(file.filename)[1].lower()
-    if ext not in allowed_extensions:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Unsupported audio format. Allowed: {', '.join(allowed_extensions)}"
-        )
-    
     file_id = str(uuid.uuid4())
     filename = f"{file_id}_{file.filename}"
     filepath = os.path.join(UPLOAD_DIR, filename)
     
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    content_hash, size_bytes, _ = await stream_upload(
+        file, filepath, AUDIO_KINDS, MAX_AUDIO_BYTES,
+        unsupported_detail=f"Unsupported audio format. Allowed: {', '.join('.' + k for k in AUDIO_KINDS)}"
+    )
     
     audio_file = AudioFile(
         id=file_id,
@@ -53,10 +57,14 @@ async def upload_audio(
         artist_id=artist_id,
         filename=file.filename,
         filepath=filepath,
+        content_hash=content_hash,
+        size_bytes=size_bytes,
         status="uploaded"
     )
     db.add(audio_file)
-    db.commit()
+    await db.commit()
+    # Decode now so the first transcription doesn't have to
+    enqueue_preprocess([file_id])
     
     return AudioUploadResponse(
         id=file_id,
@@ -66,123 +74,419 @@ async def upload_audio(
     )
 
 
-@router.post("/{project_id}/transcribe/{audio_id}")
+@router.post("/{project_id}/uploads", status_code=201, response_model=UploadSessionResponse)
+async def create_upload_session(
+    project_id: str,
+    request: UploadSessionCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Start a resumable upload for a large audio file.
+    
+    Send the file with PUT /uploads/{id}?offset=N in order, optionally with an
+    X-Chunk-SHA256 header per chunk, then POST /uploads/{id}/finalize. After an
+    interruption, GET the session and resume from received_bytes.
+    """
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    artist = await db.get(Artist, request.artist_id)
+    if not artist:
+        raise HTTPException(status_code=404, detail="Artist not found")
+    
+    if request.total_size <= 0:
+        raise HTTPException(status_code=400, detail="total_size must be positive")
+    if request.total_size > MAX_AUDIO_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size is {MAX_AUDIO_BYTES // (1024 * 1024)} MB"
+        )
+    
+    session = UploadSession(
+        id=str(uuid.uuid4()),
+        project_id=project_id,
+        artist_id=request.artist_id,
+        filename=os.path.basename(request.filename),
+        total_size=request.total_size
+    )
+    db.add(session)
+    await db.commit()
+    return _session_response(session)
+
+
+@router.get("/{project_id}/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def get_upload_session(project_id: str, upload_id: str, db: AsyncSession = Depends(get_db)):
+    """Get how much of a resumable upload has been received."""
+    return _session_response(await _get_session(db, project_id, upload_id))
+
+
+@router.put("/{project_id}/uploads/{upload_id}", response_model=UploadSessionResponse)
+async def upload_chunk(
+    project_id: str,
+    upload_id: str,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    x_chunk_sha256: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Append the request body to a resumable upload at the given byte offset."""
+    await _get_session(db, project_id, upload_id)
+    session = await append_chunk(db, upload_id, offset, request.stream(), x_chunk_sha256)
+    return _session_response(session)
+
+
+@router.post("/{project_id}/uploads/{upload_id}/finalize", response_model=AudioUploadResponse)
+async def finalize_upload(
+    project_id: str,
+    upload_id: str,
+    request: Optional[UploadFinalizeRequest] = None,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Turn a fully received upload into an AudioFile.
+    
+    The part file is renamed into place rather than copied. Finalizing an
+    already finalized session returns the same AudioFile.
+    """
+    session = await _get_session(db, project_id, upload_id)
+    if session.status == "finalized":
+        audio = await db.get(AudioFile, session.audio_id)
+        if not audio:
+            raise HTTPException(status_code=404, detail="Audio file not found")
+        return AudioUploadResponse(
+            id=audio.id, filename=audio.filename, artist_id=audio.artist_id, status=audio.status
+        )
+    
+    if (session.received_bytes or 0) != session.total_size:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload incomplete: {session.received_bytes or 0} of {session.total_size} bytes received"
+        )
+    
+    content_hash = await run_in_threadpool(hash_file, part_path(upload_id))
+    if request and request.sha256 and request.sha256.lower() != content_hash:
+        raise HTTPException(status_code=422, detail="File checksum mismatch")
+    
+    filepath = os.path.join(UPLOAD_DIR, f"{upload_id}_{session.filename}")
+    kind = complete_part(session, filepath)
+    if kind not in AUDIO_KINDS:
+        os.remove(filepath)
+        await db.delete(session)
+        await db.commit()
+        raise HTTPException(
+            status_code=415,
+            detail=f"Unsupported audio format. Allowed: {', '.join('.' + k for k in AUDIO_KINDS)}"
+        )
+    
+    audio_file = AudioFile(
+        id=upload_id,
+        project_id=project_id,
+        artist_id=session.artist_id,
+        filename=session.filename,
+        filepath=filepath,
+        content_hash=content_hash,
+        size_bytes=session.total_size,
+        status="uploaded"
+    )
+    db.add(audio_file)
+    session.status = "finalized"
+    session.audio_id = upload_id
+    await db.commit()
+    enqueue_preprocess([upload_id])
+    
+    return AudioUploadResponse(
+        id=upload_id,
+        filename=session.filename,
+        artist_id=session.artist_id,
+        status="uploaded"
+    )
+
+
+@router.delete("/{project_id}/uploads/{upload_id}")
+async def abort_upload(project_id: str, upload_id: str, db: AsyncSession = Depends(get_db)):
+    """Abandon a resumable upload and delete what was received."""
+    session = await _get_session(db, project_id, upload_id)
+    if session.status == "open":
+        discard_part(upload_id)
+    await db.delete(session)
+    await db.commit()
+    return {"message": "Upload aborted"}
+
+
+async def _get_session(db: AsyncSession, project_id: str, upload_id: str) -> UploadSession:
+    session = await db.scalar(select(UploadSession).where(
+        UploadSession.id == upload_id,
+        UploadSession.project_id == project_id
+    ))
+    if not session:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+
+def _session_response(session: UploadSession) -> UploadSessionResponse:
+    return UploadSessionResponse(
+        id=session.id,
+        project_id=session.project_id,
+        artist_id=session.artist_id,
+        filename=session.filename,
+        total_size=session.total_size,
+        received_bytes=session.received_bytes or 0,
+        status=session.status,
+        chunks=[{"offset": o, "size": n, "sha256": h} for o, n, h in session_chunks(session)],
+        audio_id=session.audio_id,
+        created_at=session.created_at,
+        updated_at=session.updated_at
+    )
+
+
+@router.post("/{project_id}/ingest", status_code=202, response_model=IngestBatchResponse)
+async def ingest_audio(
+    project_id: str,
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Upload many audio files (or zips of them) at once and transcribe them all.
+    
+    Each file is assigned to an artist from its name
+    ({ShowCode}_{EpisodeNumber}_{ArtistCode}_{Type}, where ArtistCode is the
+    artist's name, colour or number) and queued for transcription; a batch
+    feeds at most INGEST_CONCURRENCY jobs to the workers at a time. Poll
+    GET /ingest/{batch_id} for per-file progress.
+    """
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    mode, engine, model = await _transcription_config(db, project)
+    batch, job_ids = await ingest_files(db, project_id, files, UPLOAD_DIR, mode, engine, model)
+    enqueue_batch(job_ids)
+    return _batch_response(await _get_batch(db, project_id, batch.id))
+
+
+@router.get("/{project_id}/ingest/{batch_id}", response_model=IngestBatchResponse)
+async def get_ingest_batch(project_id: str, batch_id: str, db: AsyncSession = Depends(get_db)):
+    """Get per-file progress of a bulk ingest."""
+    batch = await _get_batch(db, project_id, batch_id)
+    
+    if not batch:
+        raise HTTPException(status_code=404, detail="Ingest batch not found")
+    
+    return _batch_response(batch)
+
+
+async def _get_batch(db: AsyncSession, project_id: str, batch_id: str) -> Optional[IngestBatch]:
+    """A batch with its items, their artists and jobs loaded, fresh from the database."""
+    return await db.scalar(
+        select(IngestBatch).where(
+            IngestBatch.id == batch_id,
+            IngestBatch.project_id == project_id
+        ).options(
+            selectinload(IngestBatch.items).selectinload(IngestItem.artist),
+            selectinload(IngestBatch.items).selectinload(IngestItem.job)
+        ).execution_options(populate_existing=True)
+    )
+
+
+def _batch_response(batch: IngestBatch) -> IngestBatchResponse:
+    items = []
+    counts = {}
+    for item in batch.items:
+        status = item.job.status if item.job is not None else item.status
+        error = item.job.error if item.job is not None else item.error
+        counts[status] = counts.get(status, 0) + 1
+        items.append(IngestItemResponse(
+            filename=item.filename,
+            artist_id=item.artist_id,
+            artist_name=item.artist.name if item.artist else None,
+            audio_id=item.audio_id,
+            job_id=item.job_id,
+            status=status,
+            error=error
+        ))
+    return IngestBatchResponse(
+        id=batch.id,
+        project_id=batch.project_id,
+        created_at=batch.created_at,
+        total=len(items),
+        items=items,
+        **counts
+    )
+
+
+@router.post("/{project_id}/transcribe/{audio_id}", status_code=202, response_model=TranscriptionJobResponse)
 async def transcribe_audio_file(
     project_id: str,
     audio_id: str,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Transcribe an uploaded audio file."""
-    audio = db.query(AudioFile).filter(
+    """
+    Queue an uploaded audio file for transcription and line matching.
+    
+    Always answers 202 with the queued job. Audio already transcribed with
+    the same engine (same bytes, any filename) is served from the
+    transcription cache by the worker, so that job finishes quickly.
+    """
+    audio = await db.scalar(select(AudioFile).where(
         AudioFile.id == audio_id,
         AudioFile.project_id == project_id
-    ).first()
+    ))
     
     if not audio:
         raise HTTPException(status_code=404, detail="Audio file not found")
     
-    settings = db.query(Settings).first()
-    if not settings:
-        settings = Settings(id=1, whisper_mode="local")
-        db.add(settings)
-        db.commit()
+    project = await db.get(Project, project_id)
+    mode, engine, model = await _transcription_config(db, project)
     
-    mode = settings.whisper_mode
-    api_key = settings.openai_api_key
+    active_job = _jobs().where(
+        TranscriptionJob.audio_id == audio_id,
+        TranscriptionJob.status.in_([JobStatus.QUEUED.value, JobStatus.RUNNING.value])
+    )
+    active = await db.scalar(active_job)
+    if active:
+        return _job_response(active)
     
-    if mode == "api" and not api_key:
-        raise HTTPException(
-            status_code=400,
-            detail="OpenAI API key not configured. Set it in settings or switch to local mode."
-        )
+    job = TranscriptionJob(
+        id=str(uuid.uuid4()),
+        project_id=project_id,
+        audio_id=audio_id,
+        status=JobStatus.QUEUED.value,
+        mode=mode,
+        engine=engine,
+        model=model
+    )
+    db.add(job)
+    audio.status = "queued"
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request queued this audio between the check and the insert
+        await db.rollback()
+        active = await db.scalar(active_job.execution_options(populate_existing=True))
+        if active is None:
+            raise
+        return _job_response(active)
+    
+    enqueue_job(job.id)
+    
+    job = await db.scalar(
+        _jobs().where(TranscriptionJob.id == job.id).execution_options(populate_existing=True)
+    )
+    return _job_response(job)
+
+
+@router.get("/{project_id}/jobs", response_model=List[TranscriptionJobResponse])
+async def get_transcription_jobs(project_id: str, db: AsyncSession = Depends(get_db)):
+    """List transcription jobs for a project, newest first."""
+    jobs = (await db.scalars(_jobs().where(
+        TranscriptionJob.project_id == project_id
+    ).order_by(TranscriptionJob.created_at.desc()))).all()
+    return [_job_response(j) for j in jobs]
+
+
+@router.get("/{project_id}/jobs/{job_id}", response_model=TranscriptionJobResponse)
+async def get_transcription_job(project_id: str, job_id: str, db: AsyncSession = Depends(get_db)):
+    """Get the state of a transcription job."""
+    job = await db.scalar(_jobs().where(
+        TranscriptionJob.id == job_id,
+        TranscriptionJob.project_id == project_id
+    ))
     
-    audio.status = "transcribing"
-    db.commit()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return _job_response(job)
+
+
+async def _transcription_config(db: AsyncSession, project: Project) -> Tuple[str, str, Optional[str]]:
+    """
+    The (mode, engine, model) a project's jobs run with, failing early if
+    the engine needs an API key that isn't configured.
+    
+    A project's own engine wins; otherwise API mode uses OpenAI and local
+    mode the engine and model chosen in settings.
+    """
+    settings = await db.scalar(select(Settings).limit(1))
+    if not settings:
+        settings = Settings(id=1, whisper_mode="local")
+        db.add(settings)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # Another request created the row first
+            await db.rollback()
+            await db.refresh(project)
+            settings = await db.scalar(select(Settings).limit(1))
+
+    if project.transcription_engine:
+        engine, model = project.transcription_engine, project.transcription_model
+    elif settings.whisper_mode == "local":
+        engine, model = settings.transcription_engine, settings.transcription_model
+    else:
+        engine, model = None, None
     
     try:
-        transcription = transcribe_audio(
-            filepath=audio.filepath,
-            mode=mode,
-            api_key=api_key
-        )
-        
-        audio.transcription = transcription
-        audio.status = "transcribed"
-        db.commit()
-        
-        lines = db.query(ScriptLine).filter(
-            ScriptLine.artist_id == audio.artist_id
-        ).all()
-        
-        for line in lines:
-            status, confidence, matched = find_line_in_transcription(
-                line.text, transcription
-            )
-            line.status = status
-            line.confidence = confidence
-            line.matched_text = matched
-        
-        db.commit()
-        
-        return {
-            "message": "Transcription complete",
-            "audio_id": audio_id,
-            "transcription": transcription,
-            "lines_matched": len(lines)
-        }
-        
-    except ImportError:
-        audio.status = "uploaded"  # keep so user can retry after switching to API
-        db.commit()
+        selected = resolve_engine(settings.whisper_mode, engine)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if selected.needs_api_key and not settings.openai_api_key:
         raise HTTPException(
             status_code=400,
-            detail="Local Whisper is not installed on this server. Go to Settings and switch to OpenAI API mode, then add your API key."
+            detail="OpenAI API key not configured. Set it in settings or switch to local mode."
         )
-    except Exception as e:
-        err_msg = str(e)
-        if "Local Whisper not installed" in err_msg or "openai-whisper" in err_msg:
-            audio.status = "uploaded"
-            db.commit()
-            raise HTTPException(
-                status_code=400,
-                detail="Local Whisper is not installed on this server. Go to Settings and switch to OpenAI API mode, then add your API key."
-            )
-        if "Numpy is not available" in err_msg or "numpy" in err_msg.lower():
-            audio.status = "uploaded"
-            db.commit()
-            raise HTTPException(
-                status_code=400,
-                detail="Numpy is missing in the backend. In the backend folder run: source venv/bin/activate && pip install numpy && restart the server."
-            )
-        audio.status = "error"
-        db.commit()
-        raise HTTPException(status_code=500, detail=f"Transcription failed: {err_msg}")
+    return ("api" if selected.needs_api_key else "local"), selected.name, model
+
+
+def _jobs():
+    """Select jobs with their audio file loaded, for _job_response."""
+    return select(TranscriptionJob).options(selectinload(TranscriptionJob.audio))
+
+
+def _job_response(job: TranscriptionJob) -> TranscriptionJobResponse:
+    return TranscriptionJobResponse(
+        id=job.id,
+        audio_id=job.audio_id,
+        status=job.status,
+        mode=job.mode,
+        engine=job.engine,
+        model=job.model,
+        error=job.error,
+        lines_matched=job.lines_matched or 0,
+        cache_hit=bool(job.cache_hit),
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+        transcription=job.audio.transcription if job.status == JobStatus.DONE.value else None
+    )
 
 
 @router.get("/{project_id}/files", response_model=List[AudioUploadResponse])
-def get_audio_files(project_id: str, db: Session = Depends(get_db)):
+async def get_audio_files(project_id: str, db: AsyncSession = Depends(get_db)):
     """Get all audio files for a project."""
-    files = db.query(AudioFile).filter(AudioFile.project_id == project_id).all()
+    files = (await db.scalars(select(AudioFile).where(AudioFile.project_id == project_id))).all()
     return [
         AudioUploadResponse(
             id=f.id,
             filename=f.filename,
             artist_id=f.artist_id,
             transcription=f.transcription,
-            status=f.status
+            status=f.status,
+            duration=f.duration,
+            sample_rate=f.sample_rate,
+            channels=f.channels
         )
         for f in files
     ]
 
 
 @router.get("/{project_id}/transcription/{audio_id}")
-def get_transcription(project_id: str, audio_id: str, db: Session = Depends(get_db)):
+async def get_transcription(project_id: str, audio_id: str, db: AsyncSession = Depends(get_db)):
     """Get transcription for a specific audio file."""
-    audio = db.query(AudioFile).filter(
+    audio = await db.scalar(select(AudioFile).where(
         AudioFile.id == audio_id,
         AudioFile.project_id == project_id
-    ).first()
+    ).options(selectinload(AudioFile.segments)))
     
     if not audio:
         raise HTTPException(status_code=404, detail="Audio file not found")
@@ -191,5 +495,9 @@ def get_transcription(project_id: str, audio_id: str, db: Session = Depends(get_
         "audio_id": audio_id,
         "filename": audio.filename,
         "transcription": audio.transcription,
+        "segments": [
+            {"start": seg.start, "end": seg.end, "text": seg.text}
+            for seg in audio.segments
+        ],
         "status": audio.status
     }
@@ -1,15 +1,40 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from models.database import get_db, Project, Artist, ScriptLine
-from models.schemas import ProjectCreate, ProjectResponse, ArtistResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from models.database import get_db, Project, Artist, StatusCounter
+from models.schemas import ProjectCreate, ProjectResponse, ProjectTranscriptionUpdate, ArtistResponse
+from services.engines import get_engine
+from services.qc_stats import summarize_counts
+from services.status_counters import PROJECT_SCOPE, counter_counts, read_counters
 import uuid
 
 router = APIRouter(prefix="/projects", tags=["projects"])
 
 
+def _project_response(project: Project, counter: Optional[StatusCounter]) -> ProjectResponse:
+    """A project with line status totals from its project-wide counter row (zeros without one)."""
+    counts = counter_counts(counter) if counter is not None else {}
+    return ProjectResponse(
+        id=project.id,
+        name=project.name,
+        show_code=project.show_code,
+        episode_number=project.episode_number,
+        created_at=project.created_at,
+        script_uploaded=project.script_uploaded,
+        status=project.status,
+        transcription_engine=project.transcription_engine,
+        transcription_model=project.transcription_model,
+        **summarize_counts(counts)
+    )
+
+
+async def _project_with_totals(db: AsyncSession, project: Project) -> ProjectResponse:
+    return _project_response(project, await db.get(StatusCounter, (project.id, PROJECT_SCOPE)))
+
+
 @router.post("/", response_model=ProjectResponse)
-def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
+async def create_project(project: ProjectCreate, db: AsyncSession = Depends(get_db)):
     """Create a new QC project."""
     db_project = Project(
         id=str(uuid.uuid4()),
@@ -18,63 +43,98 @@ def create_project(project: ProjectCreate, db: Session = Depends(get_db)):
         episode_number=project.episode_number
     )
     db.add(db_project)
-    db.commit()
-    db.refresh(db_project)
+    await db.commit()
+    await db.refresh(db_project)
     return db_project
 
 
 @router.get("/", response_model=List[ProjectResponse])
-def list_projects(db: Session = Depends(get_db)):
-    """List all projects."""
-    projects = db.query(Project).order_by(Project.created_at.desc()).all()
-    return projects
+async def list_projects(db: AsyncSession = Depends(get_db)):
+    """List all projects with their line status totals, read from the status counters."""
+    rows = (await db.execute(
+        select(Project, StatusCounter).outerjoin(
+            StatusCounter,
+            (StatusCounter.project_id == Project.id) & (StatusCounter.artist_id == PROJECT_SCOPE)
+        ).order_by(Project.created_at.desc())
+    )).all()
+    
+    return [_project_response(project, counter) for project, counter in rows]
 
 
 @router.get("/{project_id}", response_model=ProjectResponse)
-def get_project(project_id: str, db: Session = Depends(get_db)):
+async def get_project(project_id: str, db: AsyncSession = Depends(get_db)):
     """Get a specific project by ID."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    return project
+    return await _project_with_totals(db, project)
+
+
+@router.put("/{project_id}/transcription", response_model=ProjectResponse)
+async def set_project_transcription(
+    project_id: str,
+    update: ProjectTranscriptionUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Pick the transcription engine and model for this project's new jobs,
+    e.g. faster-whisper with a small model for a quick temp-mix pass.
+    A null engine clears the override.
+    """
+    project = await db.get(Project, project_id)
+    if not project:
+        raise HTTPException(status_code=404, detail="Project not found")
+    
+    if update.engine:
+        try:
+            get_engine(update.engine)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        project.transcription_engine = update.engine
+        project.transcription_model = update.model or None
+    else:
+        project.transcription_engine = None
+        project.transcription_model = None
+    
+    await db.commit()
+    return await _project_with_totals(db, project)
 
 
 @router.delete("/{project_id}")
-def delete_project(project_id: str, db: Session = Depends(get_db)):
+async def delete_project(project_id: str, db: AsyncSession = Depends(get_db)):
     """Delete a project."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
     return {"message": "Project deleted"}
 
 
 @router.get("/{project_id}/artists", response_model=List[ArtistResponse])
-def get_project_artists(project_id: str, db: Session = Depends(get_db)):
+async def get_project_artists(project_id: str, db: AsyncSession = Depends(get_db)):
     """Get all artists for a project with their line counts."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    artists = db.query(Artist).filter(Artist.project_id == project_id).all()
+    counts = await db.run_sync(read_counters, project_id)
+    artists = (await db.execute(
+        select(Artist.id, Artist.name, Artist.color).where(Artist.project_id == project_id)
+    )).all()
     
     result = []
     for artist in artists:
-        lines = db.query(ScriptLine).filter(ScriptLine.artist_id == artist.id).all()
-        total = len(lines)
-        found = sum(1 for l in lines if l.status == "found")
-        partial = sum(1 for l in lines if l.status == "partial")
-        missing = sum(1 for l in lines if l.status == "missing" or l.status == "pending")
-        
+        stats = summarize_counts(counts.get(artist.id, {}))
         result.append(ArtistResponse(
             id=artist.id,
             name=artist.name,
             color=artist.color,
-            total_lines=total,
-            found_lines=found,
-            partial_lines=partial,
-            missing_lines=missing
+            total_lines=stats["total_lines"],
+            found_lines=stats["found_lines"],
+            partial_lines=stats["partial_lines"],
+            missing_lines=stats["missing_lines"]
         ))
     
     return result
+
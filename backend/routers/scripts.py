@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import os
 import uuid
-import shutil
 
-from models.database import get_db, Project, Artist, ScriptLine
-from models.schemas import ScriptLineResponse, ColorMapping
+from models.database import get_db, Project, Artist, ScriptLine, ScriptRevision
+from models.schemas import ScriptLineResponse, ScriptRevisionResponse, ColorMapping, LineStatus
+from services.jobs import enqueue_rematch
+from services.script_cache import cache_key as script_cache_key, get_cached_lines, store_lines
+from services.script_ingest import replace_script_lines, revise_script_lines
+from services.status_counters import rebuild_counters
+from services.uploads import MAX_SCRIPT_BYTES, SCRIPT_KINDS, stream_upload
 from services.script_parser import parse_docx_with_all_lines, parse_pdf_with_all_lines, get_unique_colors
 
 router = APIRouter(prefix="/scripts", tags=["scripts"])
@@ -15,135 +22,192 @@ UPLOAD_DIR = "uploads/scripts"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 
+def _apply_script(db: Session, project_id: str, filename: str, all_lines: list) -> dict:
+    """Diff or load parsed lines into a project and record the revision. Caller commits."""
+    # A no-op write locks the project row (the database on SQLite), so uploads to
+    # one project take turns and each numbers its revision after the last
+    db.query(Project).filter(Project.id == project_id).update(
+        {Project.status: Project.status}, synchronize_session=False
+    )
+    project = db.get(Project, project_id, populate_existing=True)
+    has_lines = db.query(ScriptLine.id).filter(ScriptLine.project_id == project_id).first() is not None
+    if has_lines:
+        diff = revise_script_lines(db, project_id, all_lines)
+    else:
+        colors = replace_script_lines(db, project_id, all_lines)
+        diff = {"colors": colors, "kept": 0, "added": len(all_lines), "removed": 0, "added_line_ids": []}
+    
+    revision = ScriptRevision(
+        project_id=project_id,
+        number=db.query(func.coalesce(func.max(ScriptRevision.number), 0)).filter(
+            ScriptRevision.project_id == project_id
+        ).scalar() + 1,
+        filename=filename,
+        lines_total=len(all_lines),
+        lines_kept=diff["kept"],
+        lines_added=diff["added"],
+        lines_removed=diff["removed"]
+    )
+    db.add(revision)
+    
+    project.script_uploaded = True
+    project.script_filename = filename
+    project.status = "script_uploaded"
+    rebuild_counters(db, project_id)
+    diff["revision"] = revision.number
+    return diff
+
+
 @router.post("/{project_id}/upload")
 async def upload_script(
     project_id: str,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload a script file (DOCX or PDF) for a project."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    fn = (file.filename or "").lower()
-    if not (fn.endswith(".docx") or fn.endswith(".pdf")):
-        raise HTTPException(status_code=400, detail="Only DOCX and PDF files are supported")
-    
     file_id = str(uuid.uuid4())
     filename = f"{file_id}_{file.filename}"
     filepath = os.path.join(UPLOAD_DIR, filename)
     
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    content_hash, _, kind = await stream_upload(
+        file, filepath, SCRIPT_KINDS, MAX_SCRIPT_BYTES,
+        unsupported_detail="Only DOCX and PDF files are supported"
+    )
     
     try:
-        if fn.endswith(".pdf"):
-            all_lines = parse_pdf_with_all_lines(filepath)
-        else:
-            all_lines = parse_docx_with_all_lines(filepath)
-        colors = list(set(color for _, _, color in all_lines))
-        
-        db.query(ScriptLine).filter(ScriptLine.project_id == project_id).delete()
-        db.query(Artist).filter(Artist.project_id == project_id).delete()
-        
-        color_to_artist = {}
-        for i, color in enumerate(colors):
-            artist = Artist(
-                id=str(uuid.uuid4()),
-                project_id=project_id,
-                name=f"Artist {i + 1}",
-                color=color
-            )
-            db.add(artist)
-            color_to_artist[color] = artist.id
+        # The same document is often uploaded to several projects; parse it once
+        key = script_cache_key(content_hash, kind)
+        all_lines = await db.run_sync(get_cached_lines, key)
+        if all_lines is None:
+            parse = parse_pdf_with_all_lines if kind == "pdf" else parse_docx_with_all_lines
+            all_lines = await run_in_threadpool(parse, filepath)
+            await db.run_sync(store_lines, key, content_hash, kind, all_lines)
         
-        for line_num, text, color in all_lines:
-            script_line = ScriptLine(
-                id=str(uuid.uuid4()),
-                project_id=project_id,
-                artist_id=color_to_artist.get(color),
-                line_number=line_num,
-                text=text,
-                artist_color=color,
-                status="pending"
-            )
-            db.add(script_line)
+        diff = await db.run_sync(_apply_script, project_id, filename, all_lines)
+        await db.commit()
         
-        project.script_uploaded = True
-        project.script_filename = filename
-        project.status = "script_uploaded"
-        
-        db.commit()
+        # Only lines that are new in this revision need matching against existing takes
+        enqueue_rematch(project_id, diff["added_line_ids"])
         
         return {
             "message": "Script uploaded successfully",
             "total_lines": len(all_lines),
-            "colors_found": colors,
-            "artists_created": len(colors)
+            "colors_found": diff["colors"],
+            "artists_created": await db.scalar(
+                select(func.count()).select_from(Artist).where(Artist.project_id == project_id)
+            ),
+            "revision": diff["revision"],
+            "lines_kept": diff["kept"],
+            "lines_added": diff["added"],
+            "lines_removed": diff["removed"]
         }
         
     except Exception as e:
+        await db.rollback()
         os.remove(filepath)
         raise HTTPException(status_code=500, detail=f"Error parsing script: {str(e)}")
 
 
+@router.get("/{project_id}/revisions", response_model=List[ScriptRevisionResponse])
+async def get_script_revisions(project_id: str, db: AsyncSession = Depends(get_db)):
+    """List a project's script uploads with what each one changed."""
+    revisions = (await db.scalars(
+        select(ScriptRevision).where(ScriptRevision.project_id == project_id).order_by(ScriptRevision.number)
+    )).all()
+    return [
+        ScriptRevisionResponse(
+            number=r.number,
+            filename=r.filename,
+            lines_total=r.lines_total or 0,
+            lines_kept=r.lines_kept or 0,
+            lines_added=r.lines_added or 0,
+            lines_removed=r.lines_removed or 0,
+            created_at=r.created_at
+        )
+        for r in revisions
+    ]
+
+
 @router.get("/{project_id}/lines", response_model=List[ScriptLineResponse])
-def get_script_lines(project_id: str, db: Session = Depends(get_db)):
-    """Get all script lines for a project."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+async def get_script_lines(
+    project_id: str,
+    response: Response,
+    status: Optional[List[LineStatus]] = Query(None),
+    artist_id: Optional[str] = None,
+    after: Optional[int] = Query(None, description="Return lines after this line number"),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get script lines for a project in script order, optionally filtered by
+    status and artist.
+    
+    With limit, results are paged by line number: when more lines remain,
+    the X-Next-Cursor header holds the value to pass as `after` for the next page.
+    """
+    project = await db.scalar(select(Project.id).where(Project.id == project_id))
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    lines = db.query(ScriptLine).filter(
-        ScriptLine.project_id == project_id
-    ).order_by(ScriptLine.line_number).all()
+    query = select(
+        ScriptLine.id, ScriptLine.line_number, ScriptLine.text, ScriptLine.artist_color,
+        Artist.name.label("artist_name"), ScriptLine.status, ScriptLine.confidence,
+        ScriptLine.matched_text, ScriptLine.matched_audio_id,
+        ScriptLine.matched_start, ScriptLine.matched_end
+    ).outerjoin(
+        Artist, Artist.id == ScriptLine.artist_id
+    ).where(ScriptLine.project_id == project_id)
+    
+    if status:
+        query = query.where(ScriptLine.status.in_([s.value for s in status]))
+    if artist_id:
+        query = query.where(ScriptLine.artist_id == artist_id)
+    if after is not None:
+        query = query.where(ScriptLine.line_number > after)
+    query = query.order_by(ScriptLine.line_number)
     
-    result = []
-    for line in lines:
-        artist = db.query(Artist).filter(Artist.id == line.artist_id).first()
-        result.append(ScriptLineResponse(
-            id=line.id,
-            line_number=line.line_number,
-            text=line.text,
-            artist_color=line.artist_color,
-            artist_name=artist.name if artist else None,
-            status=line.status,
-            confidence=line.confidence,
-            matched_text=line.matched_text
-        ))
+    if limit is None:
+        return [ScriptLineResponse(**row._mapping) for row in await db.execute(query)]
     
-    return result
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers["X-Next-Cursor"] = str(rows[-1].line_number)
+    return [ScriptLineResponse(**row._mapping) for row in rows]
 
 
 @router.get("/{project_id}/colors")
-def get_script_colors(project_id: str, db: Session = Depends(get_db)):
+async def get_script_colors(project_id: str, db: AsyncSession = Depends(get_db)):
     """Get unique colors found in the script."""
-    project = db.query(Project).filter(Project.id == project_id).first()
+    project = await db.get(Project, project_id)
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    artists = db.query(Artist).filter(Artist.project_id == project_id).all()
+    artists = (await db.scalars(select(Artist).where(Artist.project_id == project_id))).all()
     return [{"color": a.color, "name": a.name, "id": a.id} for a in artists]
 
 
 @router.put("/{project_id}/artists/{artist_id}")
-def update_artist_name(
+async def update_artist_name(
     project_id: str,
     artist_id: str,
     mapping: ColorMapping,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update an artist's name."""
-    artist = db.query(Artist).filter(
+    artist = await db.scalar(select(Artist).where(
         Artist.id == artist_id,
         Artist.project_id == project_id
-    ).first()
+    ))
     
     if not artist:
         raise HTTPException(status_code=404, detail="Artist not found")
     
     artist.name = mapping.artist_name
-    db.commit()
+    await db.commit()
     
     return {"message": "Artist name updated", "artist_id": artist_id, "name": mapping.artist_name}
@@ -1,31 +1,38 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.database import get_db, Settings
 from models.schemas import SettingsUpdate, WhisperMode
+from services.engines import available_engines, get_engine
+from services.openai_client import openai_clients
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
 
 @router.get("/")
-def get_settings(db: Session = Depends(get_db)):
+async def get_settings(db: AsyncSession = Depends(get_db)):
     """Get current settings."""
-    settings = db.query(Settings).first()
+    settings = await db.scalar(select(Settings).limit(1))
     if not settings:
         settings = Settings(id=1, whisper_mode="local")
         db.add(settings)
-        db.commit()
+        await db.commit()
     
     return {
         "whisper_mode": settings.whisper_mode,
+        "transcription_engine": settings.transcription_engine,
+        "transcription_model": settings.transcription_model,
+        "engines": available_engines(),
+        "match_mode": settings.match_mode or "fuzzy",
         "api_key_configured": bool(settings.openai_api_key)
     }
 
 
 @router.put("/")
-def update_settings(update: SettingsUpdate, db: Session = Depends(get_db)):
+async def update_settings(update: SettingsUpdate, db: AsyncSession = Depends(get_db)):
     """Update settings."""
-    settings = db.query(Settings).first()
+    settings = await db.scalar(select(Settings).limit(1))
     if not settings:
         settings = Settings(id=1)
         db.add(settings)
@@ -36,26 +43,43 @@ def update_settings(update: SettingsUpdate, db: Session = Depends(get_db)):
     if update.whisper_mode is not None:
         settings.whisper_mode = update.whisper_mode.value
     
-    db.commit()
+    if update.transcription_engine is not None:
+        # An empty engine goes back to the server default (TRANSCRIPTION_ENGINE)
+        if update.transcription_engine:
+            try:
+                get_engine(update.transcription_engine)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+        settings.transcription_engine = update.transcription_engine or None
+    
+    if update.transcription_model is not None:
+        settings.transcription_model = update.transcription_model or None
+    
+    if update.match_mode is not None:
+        settings.match_mode = update.match_mode.value
+    
+    await db.commit()
     
     return {
         "message": "Settings updated",
         "whisper_mode": settings.whisper_mode,
+        "transcription_engine": settings.transcription_engine,
+        "transcription_model": settings.transcription_model,
+        "match_mode": settings.match_mode or "fuzzy",
         "api_key_configured": bool(settings.openai_api_key)
     }
 
 
 @router.post("/test-api-key")
-def test_api_key(db: Session = Depends(get_db)):
+async def test_api_key(db: AsyncSession = Depends(get_db)):
     """Test if the configured API key is valid."""
-    settings = db.query(Settings).first()
+    settings = await db.scalar(select(Settings).limit(1))
     if not settings or not settings.openai_api_key:
         raise HTTPException(status_code=400, detail="No API key configured")
     
     try:
-        from openai import OpenAI
-        client = OpenAI(api_key=settings.openai_api_key)
-        client.models.list()
+        # Same pooled client transcription uses; no retries, so a bad key answers at once
+        await openai_clients.async_client(settings.openai_api_key).models.list()
         return {"valid": True, "message": "API key is valid"}
     except Exception as e:
         return {"valid": False, "message": str(e)}
@@ -1,3 +1,4 @@
-from .script_parser import parse_docx_script, parse_docx_with_all_lines, get_unique_colors
+from .script_parser import parse_docx_script, parse_docx_with_all_lines, iter_docx_lines, get_unique_colors
 from .transcriber import transcribe_audio
-from .matcher import match_lines_to_transcription, calculate_qc_stats, find_line_in_transcription
+from .matcher import match_lines_to_transcription, align_lines_to_transcription, score_lines_batched, calculate_qc_stats, find_line_in_transcription
+from .transcript_index import TranscriptIndex, index_for_audio
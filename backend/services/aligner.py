@@ -0,0 +1,216 @@
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from rapidfuzz import fuzz, process
+
+from services.transcript_index import NGRAM, TranscriptIndex
+
+# A line's candidate span in the transcript: (start_token, end_token, score 0-100)
+Span = Tuple[int, int, float]
+
+
+def _find_anchors(
+    line_tokens: Sequence[Sequence[str]],
+    index: TranscriptIndex
+) -> List[Tuple[int, int, int]]:
+    """
+    Find lines that occur verbatim exactly once in the transcript.
+
+    Returns:
+        List of (line_index, start_token, end_token), sorted by line_index
+    """
+    ngrams = index.ngrams
+    tokens_t = index.tokens
+    anchors = []
+    for i, tokens in enumerate(line_tokens):
+        m = len(tokens)
+        if m < NGRAM:
+            continue
+        hits = [
+            p for p in ngrams.get(tuple(tokens[:NGRAM]), ())
+            if tokens_t[p:p + m] == list(tokens)
+        ]
+        if len(hits) == 1:
+            anchors.append((i, hits[0], hits[0] + m))
+    return anchors
+
+
+def _monotonic_anchors(anchors: List[Tuple[int, int, int]]) -> List[Tuple[int, int, int]]:
+    """Keep the longest chain of anchors whose transcript positions increase with line order."""
+    if not anchors:
+        return []
+    tails: List[int] = []          # smallest start position ending a chain of each length
+    tail_idx: List[int] = []
+    parent = [-1] * len(anchors)
+    for k, (_, start, _) in enumerate(anchors):
+        j = bisect_left(tails, start)
+        if j == len(tails):
+            tails.append(start)
+            tail_idx.append(k)
+        else:
+            tails[j] = start
+            tail_idx[j] = k
+        parent[k] = tail_idx[j - 1] if j > 0 else -1
+
+    chain = []
+    k = tail_idx[-1]
+    while k != -1:
+        chain.append(anchors[k])
+        k = parent[k]
+    chain.reverse()
+    return chain
+
+
+def _band_candidates(
+    line_text: str,
+    m: int,
+    lo: int,
+    hi: int,
+    index: TranscriptIndex,
+    limit: int,
+    min_score: float
+) -> List[Span]:
+    """Score every m-token window starting in [lo, hi) and return the best few."""
+    n = len(index)
+    last_start = max(lo, min(hi, n) - m)
+    spans = []
+    windows = []
+    for s in range(lo, last_start + 1):
+        e = min(s + m, n)
+        spans.append((s, e))
+        windows.append(index.span_text(s, e))
+    if not windows:
+        return []
+    best = process.extract(
+        line_text, windows, scorer=fuzz.ratio, limit=limit, score_cutoff=min_score
+    )
+    return [(spans[k][0], spans[k][1], score) for _, score, k in best]
+
+
+def align_lines(
+    line_tokens: Sequence[Sequence[str]],
+    index: TranscriptIndex,
+    min_band: int = 50,
+    band_factor: float = 3.0,
+    drift: float = 0.15,
+    candidates_per_line: int = 3,
+    min_score: float = 50.0,
+    max_overlap: int = 2
+) -> List[Optional[Tuple[int, int, float, bool]]]:
+    """
+    Align an ordered list of tokenized script lines against an indexed transcript.
+
+    Lines that occur verbatim exactly once seed a monotonic chain of anchors.
+    Every other line is only scored inside a band around its expected position,
+    interpolated between the surrounding anchors, and a dynamic program then
+    picks the highest-scoring set of candidates whose positions follow script order.
+
+    Returns:
+        One entry per line: (start_token, end_token, score, in_order) or None
+        when nothing in the line's band scored at least min_score. in_order is
+        False for a line whose best hit could not be placed on the ordered chain.
+    """
+    n = len(index)
+    results: List[Optional[Tuple[int, int, float, bool]]] = [None] * len(line_tokens)
+    if n == 0 or not line_tokens:
+        return results
+
+    # Script-side position of each line, in tokens, used to interpolate between anchors
+    script_pos = []
+    total = 0
+    for tokens in line_tokens:
+        script_pos.append(total)
+        total += len(tokens)
+
+    anchors = _monotonic_anchors(_find_anchors(line_tokens, index))
+    anchor_by_line = {i: (s, e) for i, s, e in anchors}
+    # (line_index, script_start, script_end, transcript_start, transcript_end), with virtual ends
+    fixed = (
+        [(-1, 0, 0, 0, 0)]
+        + [(i, script_pos[i], script_pos[i] + len(line_tokens[i]), s, e) for i, s, e in anchors]
+        + [(len(line_tokens), total, total, n, n)]
+    )
+
+    candidates: List[List[Span]] = []
+    seg = 0
+    for i, tokens in enumerate(line_tokens):
+        m = len(tokens)
+        if i in anchor_by_line:
+            s, e = anchor_by_line[i]
+            candidates.append([(s, e, 100.0)])
+            continue
+        if m == 0:
+            candidates.append([])
+            continue
+
+        while fixed[seg + 1][0] < i:
+            seg += 1
+        _, _, c_a, _, p_a = fixed[seg]
+        _, c_b, _, p_b, _ = fixed[seg + 1]
+        span = max(p_b - p_a, 0)
+        if c_b > c_a:
+            expected = p_a + (script_pos[i] - c_a) * span / (c_b - c_a)
+        else:
+            expected = p_a
+        half_width = max(min_band, band_factor * m, drift * span)
+        lo = max(p_a, int(expected - half_width))
+        hi = min(p_b, int(expected + half_width) + m)
+        if hi - lo < m:
+            # Squeezed between anchors: still give the line a window of its own length
+            lo = max(0, min(lo, n - m))
+            hi = min(n, lo + m)
+
+        candidates.append(_band_candidates(
+            " ".join(tokens), m, lo, hi, index, candidates_per_line, min_score
+        ))
+
+    # DP over candidates: best[c] = score(c) + best chain ending at or before c's start.
+    # A Fenwick tree keyed by end position gives prefix maxima in O(log n).
+    tree_val = [0.0] * (n + 2)
+    tree_ref: List[Optional[Tuple[int, int]]] = [None] * (n + 2)
+
+    def query(pos: int) -> Tuple[float, Optional[Tuple[int, int]]]:
+        best, ref = 0.0, None
+        pos = min(max(pos, 0), n) + 1
+        while pos > 0:
+            if tree_val[pos] > best:
+                best, ref = tree_val[pos], tree_ref[pos]
+            pos -= pos & -pos
+        return best, ref
+
+    def update(pos: int, val: float, ref: Tuple[int, int]):
+        pos = min(max(pos, 0), n) + 1
+        while pos <= n + 1:
+            if val > tree_val[pos]:
+                tree_val[pos], tree_ref[pos] = val, ref
+            pos += pos & -pos
+
+    chain_score: Dict[Tuple[int, int], float] = {}
+    back: Dict[Tuple[int, int], Optional[Tuple[int, int]]] = {}
+    for i, cands in enumerate(candidates):
+        scored = []
+        for k, (s, e, score) in enumerate(cands):
+            prev_best, prev_ref = query(s + max_overlap)
+            scored.append(((i, k), e, prev_best + score, prev_ref))
+        for ref, e, total_score, prev_ref in scored:
+            chain_score[ref] = total_score
+            back[ref] = prev_ref
+            update(e, total_score, ref)
+
+    on_chain: Dict[int, int] = {}
+    if chain_score:
+        ref: Optional[Tuple[int, int]] = max(chain_score, key=chain_score.get)
+        while ref is not None:
+            on_chain[ref[0]] = ref[1]
+            ref = back[ref]
+
+    for i, cands in enumerate(candidates):
+        if not cands:
+            continue
+        if i in on_chain:
+            s, e, score = cands[on_chain[i]]
+            results[i] = (s, e, score, True)
+        else:
+            s, e, score = max(cands, key=lambda c: c[2])
+            results[i] = (s, e, score, False)
+    return results
@@ -0,0 +1,172 @@
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from services.uploads import hash_file
+
+logger = logging.getLogger(__name__)
+
+# Audio is decoded once into the format Whisper works in (16 kHz mono float32)
+# and memory-mapped by every later transcription, chunking or silence pass
+SAMPLE_RATE = 16000
+PCM_DTYPE = np.float32
+AUDIO_CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR", "uploads/pcm")
+AUDIO_CACHE_MAX_BYTES = int(os.environ.get("AUDIO_CACHE_MAX_BYTES", str(10 * 1024 * 1024 * 1024)))
+
+_PCM_SUFFIX = ".f32"
+
+_decode_locks: Dict[str, threading.Lock] = {}
+_decode_locks_lock = threading.Lock()
+
+
+def decoder_available() -> bool:
+    return shutil.which("ffmpeg") is not None
+
+
+def probe_audio(filepath: str) -> Optional[Tuple[Optional[float], Optional[int], Optional[int]]]:
+    """(duration seconds, sample rate, channels) of a file's first audio stream, or None if ffprobe can't read it."""
+    if shutil.which("ffprobe") is None:
+        return None
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-select_streams", "a:0",
+             "-show_entries", "stream=sample_rate,channels:format=duration", "-of", "json", filepath],
+            capture_output=True, text=True, check=True
+        ).stdout
+        info = json.loads(out)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+    streams = info.get("streams") or [{}]
+    duration = (info.get("format") or {}).get("duration")
+    sample_rate = streams[0].get("sample_rate")
+    channels = streams[0].get("channels")
+    return (
+        float(duration) if duration not in (None, "N/A") else None,
+        int(sample_rate) if sample_rate else None,
+        int(channels) if channels else None
+    )
+
+
+def pcm_path(content_hash: str) -> str:
+    """Where the decoded PCM of some audio bytes lives; identical uploads share one file."""
+    return os.path.join(AUDIO_CACHE_DIR, content_hash + _PCM_SUFFIX)
+
+
+def _decode_lock(content_hash: str) -> threading.Lock:
+    with _decode_locks_lock:
+        return _decode_locks.setdefault(content_hash, threading.Lock())
+
+
+def decode_pcm(filepath: str, content_hash: str) -> Optional[str]:
+    """
+    Decode audio to cached 16 kHz mono float32 PCM unless it already is.
+
+    Returns:
+        Path of the raw PCM file, or None if ffmpeg is not installed
+    """
+    path = pcm_path(content_hash)
+    if os.path.exists(path):
+        # Bump mtime so eviction sees the entry as recently used
+        os.utime(path)
+        return path
+    if not decoder_available():
+        return None
+
+    with _decode_lock(content_hash):
+        if os.path.exists(path):
+            return path
+        os.makedirs(AUDIO_CACHE_DIR, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.part"
+        try:
+            subprocess.run(
+                ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostdin", "-y", "-i", filepath,
+                 "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "f32le", tmp],
+                capture_output=True, check=True
+            )
+            # Readers only ever see a complete file
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    evict(keep=path)
+    return path
+
+
+def load_pcm(path: str) -> np.ndarray:
+    """
+    Memory-map cached PCM as a float32 array.
+
+    The map is copy-on-write: reads share the OS page cache across workers,
+    and consumers that need a writable array (torch.from_numpy) get private
+    pages only for what they modify.
+    """
+    if os.path.getsize(path) == 0:
+        # mmap can't map an empty file
+        return np.zeros(0, dtype=PCM_DTYPE)
+    return np.memmap(path, dtype=PCM_DTYPE, mode="c")
+
+
+def evict(keep: Optional[str] = None) -> int:
+    """
+    Delete least recently used PCM files until the cache fits AUDIO_CACHE_MAX_BYTES.
+
+    Returns:
+        Number of files deleted
+    """
+    try:
+        entries = [
+            e for e in os.scandir(AUDIO_CACHE_DIR)
+            if e.is_file() and e.name.endswith(_PCM_SUFFIX)
+        ]
+    except FileNotFoundError:
+        return 0
+    stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+    total = sum(size for _, size, _ in stats)
+    removed = 0
+    for _, size, path in sorted(stats):
+        if total <= AUDIO_CACHE_MAX_BYTES:
+            break
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
+
+
+def prepare_audio(audio, decode: bool = True) -> Optional[str]:
+    """
+    Record an AudioFile's duration, sample rate and channel count, and
+    decode it to cached PCM. Caller commits.
+
+    Args:
+        audio: AudioFile to prepare
+        decode: Only probe; skip decoding (e.g. when the transcript is cached)
+
+    Returns:
+        Path of the cached PCM, or None if it wasn't decoded
+    """
+    if not audio.content_hash:
+        audio.content_hash = hash_file(audio.filepath)
+    if audio.sample_rate is None:
+        probed = probe_audio(audio.filepath)
+        if probed is not None:
+            audio.duration, audio.sample_rate, audio.channels = probed
+    if not decode:
+        return None
+
+    path = decode_pcm(audio.filepath, audio.content_hash)
+    if path is not None and audio.duration is None:
+        audio.duration = os.path.getsize(path) / np.dtype(PCM_DTYPE).itemsize / SAMPLE_RATE
+    return path
@@ -0,0 +1,275 @@
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from rapidfuzz import fuzz
+
+from services.audio_cache import SAMPLE_RATE
+from services.transcript_index import normalize_text
+
+# Long takes are split into windows of about CHUNK_SECONDS, cut at silence where
+# possible and overlapped by CHUNK_OVERLAP seconds so no word is lost at a cut.
+CHUNK_SECONDS = float(os.environ.get("TRANSCRIBE_CHUNK_SECONDS", "600"))
+CHUNK_OVERLAP = float(os.environ.get("TRANSCRIBE_CHUNK_OVERLAP", "5"))
+CHUNK_WORKERS = max(1, int(os.environ.get("TRANSCRIBE_CHUNK_WORKERS", "4")))
+SILENCE_NOISE_DB = os.environ.get("TRANSCRIBE_SILENCE_NOISE", "-35dB")
+SILENCE_MIN_SECONDS = 0.4
+# Speech rate upper bound used to size the overlap search when stitching
+WORDS_PER_SECOND = 4
+
+_SILENCE_RE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+
+# (start_seconds, duration_seconds, cut_seconds): the chunk owns audio from its cut
+# onwards; anything between start and cut is overlap with the previous chunk
+Chunk = Tuple[float, float, float]
+
+
+def ffmpeg_available() -> bool:
+    return shutil.which("ffmpeg") is not None and shutil.which("ffprobe") is not None
+
+
+def probe_duration(filepath: str) -> Optional[float]:
+    """Duration of an audio file in seconds, or None if ffprobe can't read it."""
+    try:
+        out = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+             "-of", "default=noprint_wrappers=1:nokey=1", filepath],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        return float(out)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+
+
+def detect_silences(filepath: str) -> List[Tuple[float, float]]:
+    """(start, end) of each silent stretch, via ffmpeg's silencedetect filter."""
+    try:
+        stderr = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-nostats", "-i", filepath,
+             "-af", f"silencedetect=noise={SILENCE_NOISE_DB}:d={SILENCE_MIN_SECONDS}",
+             "-f", "null", "-"],
+            capture_output=True, text=True, check=True
+        ).stderr
+    except (OSError, subprocess.CalledProcessError):
+        return []
+
+    silences = []
+    start = None
+    for kind, value in _SILENCE_RE.findall(stderr):
+        if kind == "start":
+            start = float(value)
+        elif start is not None:
+            silences.append((max(start, 0.0), float(value)))
+            start = None
+    return silences
+
+
+def _noise_amplitude(noise: str) -> float:
+    """silencedetect's noise tolerance ("-35dB" or an amplitude ratio) as an amplitude."""
+    if noise.lower().endswith("db"):
+        return 10 ** (float(noise[:-2]) / 20)
+    return float(noise)
+
+
+def detect_pcm_silences(
+    pcm: np.ndarray,
+    noise: str = SILENCE_NOISE_DB,
+    min_seconds: float = SILENCE_MIN_SECONDS
+) -> List[Tuple[float, float]]:
+    """
+    (start, end) of each silent stretch of decoded 16 kHz PCM, like
+    detect_silences but without decoding the source again.
+    """
+    frame = SAMPLE_RATE // 50  # 20 ms
+    frames = len(pcm) // frame
+    if frames == 0:
+        return []
+    threshold = _noise_amplitude(noise)
+    peaks = np.empty(frames, dtype=np.float32)
+    # A minute at a time, so a long take never needs a second full-size buffer
+    step = 3000
+    for i in range(0, frames, step):
+        j = min(frames, i + step)
+        peaks[i:j] = np.abs(pcm[i * frame:j * frame].reshape(j - i, frame)).max(axis=1)
+
+    quiet = np.concatenate(([0], (peaks < threshold).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(quiet))
+    min_frames = min_seconds * SAMPLE_RATE / frame
+    return [
+        (float(start * frame / SAMPLE_RATE), float(end * frame / SAMPLE_RATE))
+        for start, end in zip(edges[0::2], edges[1::2])
+        if end - start >= min_frames
+    ]
+
+
+def plan_chunks(
+    duration: float,
+    silences: List[Tuple[float, float]],
+    chunk_seconds: float = CHUNK_SECONDS,
+    overlap: float = CHUNK_OVERLAP
+) -> List[Chunk]:
+    """
+    Split [0, duration] into overlapping windows of about chunk_seconds.
+
+    Each cut moves to the middle of the nearest silence within a fifth of a
+    chunk of its fixed position; without one it stays put. Every chunk after
+    the first starts `overlap` seconds before its cut.
+    """
+    if duration <= chunk_seconds:
+        return [(0.0, duration, 0.0)]
+
+    midpoints = [(s + e) / 2 for s, e in silences]
+    tolerance = chunk_seconds / 5
+    cuts = []
+    prev = 0.0
+    while duration - prev > chunk_seconds:
+        target = prev + chunk_seconds
+        near = [m for m in midpoints if abs(m - target) <= tolerance and m > prev + overlap]
+        cut = min(near, key=lambda m: abs(m - target)) if near else target
+        cuts.append(cut)
+        prev = cut
+
+    bounds = [0.0] + cuts + [duration]
+    chunks = []
+    for i in range(len(bounds) - 1):
+        start = bounds[i] if i == 0 else max(0.0, bounds[i] - overlap)
+        chunks.append((start, bounds[i + 1] - start, bounds[i]))
+    return chunks
+
+
+def extract_chunk(filepath: str, start: float, duration: float, out_path: str):
+    """Write one window of the source as 16 kHz mono WAV, the format Whisper works in."""
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+         "-ss", f"{start:.3f}", "-t", f"{duration:.3f}", "-i", filepath,
+         "-ac", "1", "-ar", "16000", "-c:a", "pcm_s16le", out_path],
+        check=True
+    )
+
+
+def write_wav(pcm: np.ndarray, out_path: str):
+    """Write float PCM at SAMPLE_RATE as 16-bit mono WAV, for engines that only take files."""
+    with wave.open(out_path, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        out.writeframes((np.clip(pcm, -1.0, 1.0) * 32767).astype("<i2").tobytes())
+
+
+def _overlap_length(prev_words: List[str], next_words: List[str], max_words: int) -> int:
+    """How many leading words of next_words repeat the tail of prev_words."""
+    best_k, best_score = 0, 0.0
+    for k in range(min(max_words, len(prev_words), len(next_words)), 0, -1):
+        tail = normalize_text(" ".join(prev_words[-k:]))
+        head = normalize_text(" ".join(next_words[:k]))
+        if not tail or not head:
+            continue
+        score = fuzz.ratio(tail, head)
+        # Prefer the longest overlap that matches well; a cut can split a word
+        if score >= 85 and score > best_score:
+            best_k, best_score = k, score
+            if score == 100:
+                break
+    return best_k
+
+
+def stitch_transcripts(texts: List[str], overlap: float = CHUNK_OVERLAP) -> str:
+    """Join chunk transcripts in order, dropping text repeated across each overlap."""
+    max_words = max(1, int(overlap * WORDS_PER_SECOND) + 2)
+    words: List[str] = []
+    for text in texts:
+        chunk_words = (text or "").split()
+        if words and chunk_words:
+            chunk_words = chunk_words[_overlap_length(words, chunk_words, max_words):]
+        words.extend(chunk_words)
+    return " ".join(words)
+
+
+def stitch_segments(results: List[Dict], chunks: List[Chunk]) -> List[Dict]:
+    """
+    Merge per-chunk segments onto the source timeline.
+
+    Segment times are shifted by their chunk's start, and each chunk keeps
+    only the segments centred inside the stretch it owns (its cut up to the
+    next chunk's cut), so overlapped speech is kept exactly once.
+    """
+    merged = []
+    for i, (result, (start, _, cut)) in enumerate(zip(results, chunks)):
+        next_cut = chunks[i + 1][2] if i + 1 < len(chunks) else float("inf")
+        for seg in result.get("segments") or []:
+            seg = dict(seg, start=seg["start"] + start, end=seg["end"] + start)
+            if cut <= (seg["start"] + seg["end"]) / 2 < next_cut:
+                merged.append(seg)
+    return merged
+
+
+def transcribe_chunked(
+    filepath: str,
+    transcribe_chunk: Callable[[Union[str, np.ndarray]], Dict],
+    duration: Optional[float] = None,
+    chunk_seconds: float = CHUNK_SECONDS,
+    overlap: float = CHUNK_OVERLAP,
+    workers: int = CHUNK_WORKERS,
+    pcm: Optional[np.ndarray] = None,
+    pcm_chunks: bool = False
+) -> Dict:
+    """
+    Transcribe a long file as overlapping chunks in parallel and stitch the result.
+
+    Args:
+        filepath: Source audio
+        transcribe_chunk: Transcribes one chunk (a WAV file, or a slice of pcm
+            with pcm_chunks), returning text and segments
+        duration: Source duration in seconds, probed if not given
+        pcm: The source decoded to SAMPLE_RATE mono float PCM; silences and
+            chunks are then cut from it instead of decoding the source again
+        pcm_chunks: Pass chunks to transcribe_chunk as slices of pcm rather
+            than as WAV files
+
+    Returns:
+        Dict with "text" and "segments" on the source timeline. Segments are
+        stitched by timestamp; text falls back to word-overlap stitching when
+        an engine returns no segments.
+    """
+    if pcm is not None:
+        duration = len(pcm) / SAMPLE_RATE
+        silences = detect_pcm_silences(pcm)
+    else:
+        if duration is None:
+            duration = probe_duration(filepath)
+        if duration is None:
+            raise RuntimeError(f"Could not read audio duration of {os.path.basename(filepath)}")
+        silences = detect_silences(filepath)
+
+    chunks = plan_chunks(duration, silences, chunk_seconds, overlap)
+
+    with tempfile.TemporaryDirectory(prefix="qc_chunks_") as tmp:
+        def run(item: Tuple[int, Chunk]) -> Dict:
+            i, (start, length, _) = item
+            if pcm is not None:
+                window = pcm[int(start * SAMPLE_RATE):int((start + length) * SAMPLE_RATE)]
+                if pcm_chunks:
+                    return transcribe_chunk(window)
+            chunk_path = os.path.join(tmp, f"chunk_{i:04d}.wav")
+            if pcm is not None:
+                write_wav(window, chunk_path)
+            else:
+                extract_chunk(filepath, start, length, chunk_path)
+            try:
+                return transcribe_chunk(chunk_path)
+            finally:
+                os.remove(chunk_path)
+
+        with ThreadPoolExecutor(max_workers=min(workers, len(chunks))) as pool:
+            results = list(pool.map(run, enumerate(chunks)))
+
+    if all(r.get("segments") for r in results):
+        segments = stitch_segments(results, chunks)
+        return {"text": " ".join(seg["text"] for seg in segments), "segments": segments}
+    return {"text": stitch_transcripts([r["text"] for r in results], overlap), "segments": []}
@@ -0,0 +1,266 @@
+import hashlib
+import importlib.util
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional, Protocol, Union
+
+import numpy as np
+
+from services.chunking import ffmpeg_available, probe_duration
+from services.openai_client import openai_clients
+from services.model_registry import (
+    ModelKey, ModelRegistry, estimate_mb, registry, WHISPER_MODEL_SIZE, WHISPER_COMPUTE_TYPE
+)
+
+# Engine used in local mode when neither the project nor Settings picks one
+DEFAULT_LOCAL_ENGINE = os.environ.get("TRANSCRIPTION_ENGINE", "whisper-local")
+
+# faster-whisper (CTranslate2) defaults: int8 weights run several times faster than
+# PyTorch fp32 on CPU for a small accuracy cost
+FASTER_WHISPER_DEVICE = os.environ.get("FASTER_WHISPER_DEVICE", "cpu")
+FASTER_WHISPER_COMPUTE_TYPE = os.environ.get("FASTER_WHISPER_COMPUTE_TYPE", "int8")
+FASTER_WHISPER_CPU_THREADS = int(os.environ.get("FASTER_WHISPER_CPU_THREADS", "0"))
+FASTER_WHISPER_BEAM_SIZE = max(1, int(os.environ.get("FASTER_WHISPER_BEAM_SIZE", "5")))
+FASTER_WHISPER_VAD = os.environ.get("FASTER_WHISPER_VAD", "").lower() in ("1", "true", "yes")
+
+# Seconds the fake engine sleeps per second of audio, to stand in for a real engine's speed
+FAKE_REALTIME_FACTOR = float(os.environ.get("FAKE_ENGINE_REALTIME_FACTOR", "0"))
+
+_FAKE_WORDS = (
+    "the", "a", "we", "you", "they", "never", "always", "said", "came", "back", "here",
+    "there", "now", "then", "what", "where", "why", "night", "morning", "door", "road",
+    "time", "home", "light", "listen", "look", "wait", "run", "stay", "go", "know", "think",
+)
+_FAKE_WORDS_PER_SEGMENT = 12
+_FAKE_WORDS_PER_SECOND = 2.5
+
+# A file path, or 16 kHz mono float32 PCM for engines with accepts_pcm
+AudioInput = Union[str, np.ndarray]
+
+
+class TranscriptionEngine(Protocol):
+    """
+    A speech-to-text backend.
+
+    transcribe() returns a dict with "text" and "segments", a list of dicts
+    with start and end (seconds), text and avg_logprob.
+    """
+
+    name: str
+    default_model: str
+    needs_api_key: bool
+    # Largest file the engine accepts in one call; bigger files are always chunked
+    max_upload_bytes: Optional[int]
+    # Takes decoded PCM arrays as well as file paths
+    accepts_pcm: bool
+
+    def installed(self) -> bool:
+        ...
+
+    def transcribe(self, audio: AudioInput, model: Optional[str] = None, api_key: Optional[str] = None) -> Dict:
+        ...
+
+    def preload(self, model: Optional[str] = None) -> None:
+        """Load a model ahead of the first transcription; a no-op without local models."""
+        ...
+
+
+def segment_dict(segment: Any) -> Dict:
+    """Normalize a Whisper segment (dict or object) to start/end/text/avg_logprob."""
+    get = segment.get if isinstance(segment, dict) else lambda k: getattr(segment, k, None)
+    return {
+        "start": float(get("start") or 0.0),
+        "end": float(get("end") or 0.0),
+        "text": (get("text") or "").strip(),
+        "avg_logprob": get("avg_logprob"),
+    }
+
+
+class OpenAIEngine:
+    """OpenAI's hosted Whisper."""
+
+    name = "openai-api"
+    default_model = "whisper-1"
+    needs_api_key = True
+    # OpenAI rejects uploads above 25 MB
+    max_upload_bytes = 25 * 1024 * 1024
+    accepts_pcm = False
+
+    def installed(self) -> bool:
+        return True
+
+    def transcribe(self, audio: AudioInput, model: Optional[str] = None, api_key: Optional[str] = None) -> Dict:
+        if not api_key:
+            raise ValueError("OpenAI API key required for API mode")
+        # Pooled per key, rate-limited and retried on 429/5xx
+        return openai_clients.transcribe(api_key, audio, model or self.default_model)
+
+    def preload(self, model: Optional[str] = None) -> None:
+        pass
+
+
+class WhisperEngine:
+    """openai-whisper on PyTorch, models shared through the model registry."""
+
+    name = "whisper-local"
+    default_model = WHISPER_MODEL_SIZE
+    needs_api_key = False
+    max_upload_bytes = None
+    accepts_pcm = True
+
+    def installed(self) -> bool:
+        return importlib.util.find_spec("whisper") is not None
+
+    def transcribe(self, audio: AudioInput, model: Optional[str] = None, api_key: Optional[str] = None) -> Dict:
+        with registry.acquire(model) as whisper_model:
+            result = whisper_model.transcribe(audio, fp16=WHISPER_COMPUTE_TYPE == "float16")
+        return {
+            "text": result["text"],
+            "segments": [segment_dict(seg) for seg in result.get("segments", [])]
+        }
+
+    def preload(self, model: Optional[str] = None) -> None:
+        registry.preload(model)
+
+
+def _load_faster_whisper(size: str, device: str, compute_type: str) -> Any:
+    try:
+        from faster_whisper import WhisperModel
+    except ImportError:
+        raise ImportError(
+            "faster-whisper not installed. Install with: pip install faster-whisper\n"
+            "Or pick another transcription engine."
+        )
+    return WhisperModel(size, device=device, compute_type=compute_type, cpu_threads=FASTER_WHISPER_CPU_THREADS)
+
+
+def _estimate_ctranslate2_mb(key: ModelKey) -> int:
+    """fp32 estimate scaled down for quantized weights."""
+    compute_type = key[2]
+    if compute_type.startswith("int8"):
+        return max(1, estimate_mb(key) // 4)
+    if compute_type in ("float16", "bfloat16"):
+        return max(1, estimate_mb(key) // 2)
+    return estimate_mb(key)
+
+
+# CTranslate2 models are separate from the PyTorch ones and get their own registry
+faster_whisper_registry = ModelRegistry(loader=_load_faster_whisper, estimate=_estimate_ctranslate2_mb)
+
+
+class FasterWhisperEngine:
+    """Whisper on CTranslate2 via faster-whisper, int8-quantized on CPU by default."""
+
+    name = "faster-whisper"
+    default_model = WHISPER_MODEL_SIZE
+    needs_api_key = False
+    max_upload_bytes = None
+    accepts_pcm = True
+
+    def installed(self) -> bool:
+        return importlib.util.find_spec("faster_whisper") is not None
+
+    def transcribe(self, audio: AudioInput, model: Optional[str] = None, api_key: Optional[str] = None) -> Dict:
+        with faster_whisper_registry.acquire(
+            model or self.default_model, FASTER_WHISPER_DEVICE, FASTER_WHISPER_COMPUTE_TYPE
+        ) as whisper_model:
+            segments, _ = whisper_model.transcribe(
+                audio, beam_size=FASTER_WHISPER_BEAM_SIZE, vad_filter=FASTER_WHISPER_VAD
+            )
+            # Segments are decoded lazily; consume them while the model is checked out
+            segments = [segment_dict(seg) for seg in segments]
+        return {"text": " ".join(seg["text"] for seg in segments), "segments": segments}
+
+    def preload(self, model: Optional[str] = None) -> None:
+        faster_whisper_registry.preload(model or self.default_model, FASTER_WHISPER_DEVICE, FASTER_WHISPER_COMPUTE_TYPE)
+
+
+def _fake_duration(filepath: str) -> float:
+    duration = probe_duration(filepath) if ffmpeg_available() else None
+    if duration is None:
+        # 16 kHz 16-bit mono
+        duration = os.path.getsize(filepath) / 32000
+    return duration
+
+
+class FakeEngine:
+    """
+    Offline, deterministic stand-in for tests and benchmarks.
+
+    Returns the text of a sidecar file (the audio path with a .txt suffix)
+    when there is one, otherwise words derived from the file's bytes, spread
+    evenly over the audio's duration. The same file always gives the same
+    transcript.
+    """
+
+    name = "fake"
+    default_model = "v1"
+    needs_api_key = False
+    max_upload_bytes = None
+    # Works from the file so sidecar transcripts can be found
+    accepts_pcm = False
+
+    def installed(self) -> bool:
+        return True
+
+    def transcribe(self, audio: AudioInput, model: Optional[str] = None, api_key: Optional[str] = None) -> Dict:
+        duration = _fake_duration(audio)
+        sidecar = os.path.splitext(audio)[0] + ".txt"
+        if os.path.exists(sidecar):
+            with open(sidecar, encoding="utf-8") as f:
+                words = f.read().split()
+        else:
+            digest = hashlib.sha256()
+            with open(audio, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            rng = random.Random(digest.hexdigest() + (model or self.default_model))
+            words = [rng.choice(_FAKE_WORDS) for _ in range(max(1, int(duration * _FAKE_WORDS_PER_SECOND)))]
+
+        groups = [words[i:i + _FAKE_WORDS_PER_SEGMENT] for i in range(0, len(words), _FAKE_WORDS_PER_SEGMENT)]
+        step = duration / max(1, len(groups))
+        segments = [
+            {"start": i * step, "end": (i + 1) * step, "text": " ".join(group), "avg_logprob": -0.1}
+            for i, group in enumerate(groups)
+        ]
+        if FAKE_REALTIME_FACTOR > 0:
+            time.sleep(duration * FAKE_REALTIME_FACTOR)
+        return {"text": " ".join(words), "segments": segments}
+
+    def preload(self, model: Optional[str] = None) -> None:
+        pass
+
+
+_ENGINES: Dict[str, TranscriptionEngine] = {}
+
+
+def register_engine(engine: TranscriptionEngine) -> TranscriptionEngine:
+    """Make an engine selectable by name, replacing any engine of the same name."""
+    _ENGINES[engine.name] = engine
+    return engine
+
+
+def get_engine(name: str) -> TranscriptionEngine:
+    """Look up a registered engine; raises ValueError for unknown names."""
+    try:
+        return _ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown transcription engine '{name}'. Available: {', '.join(sorted(_ENGINES))}")
+
+
+def available_engines() -> List[Dict]:
+    """Registered engines, for the settings page."""
+    return [
+        {
+            "name": engine.name,
+            "default_model": engine.default_model,
+            "needs_api_key": engine.needs_api_key,
+            "installed": engine.installed(),
+        }
+        for engine in _ENGINES.values()
+    ]
+
+
+for _engine in (OpenAIEngine(), WhisperEngine(), FasterWhisperEngine(), FakeEngine()):
+    register_engine(_engine)
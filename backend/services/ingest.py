@@ -0,0 +1,243 @@
+import hashlib
+import os
+import re
+import uuid
+import zipfile
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from models.database import Artist, AudioFile, IngestBatch, IngestItem, ScriptLine, TranscriptionJob
+from models.schemas import JobStatus
+from services.uploads import AUDIO_KINDS, CHUNK_SIZE, MAX_AUDIO_BYTES, sniff_kind, stream_upload
+
+_KEY_RE = re.compile(r'[^a-z0-9]')
+_NUMBERED_RE = re.compile(r'^[a-z]*?(\d+)$')
+_HEX_RE = re.compile(r'^#?([0-9a-f]{6})$')
+_TOKEN_SPLIT_RE = re.compile(r'[_\-\s.]+')
+
+# (filename, saved path or None, sha256, size, error)
+Extracted = Tuple[str, Optional[str], Optional[str], int, Optional[str]]
+
+
+def _key(value: str) -> str:
+    return _KEY_RE.sub('', value.lower())
+
+
+def parse_audio_filename(filename: str) -> Optional[Dict[str, str]]:
+    """
+    Split a name following {ShowCode}_{EpisodeNumber}_{ArtistCode}_{Type}.
+
+    Returns:
+        Dict with show_code, episode, artist_code and type, or None if the
+        name doesn't follow the convention
+    """
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    parts = stem.split("_")
+    if len(parts) < 4 or not all(parts[:3]):
+        return None
+    return {
+        "show_code": parts[0],
+        "episode": parts[1],
+        "artist_code": parts[2],
+        "type": "_".join(parts[3:]),
+    }
+
+
+class ArtistResolver:
+    """
+    Maps audio filenames to a project's artists.
+
+    A code matches an artist by name (ignoring case, spaces and punctuation),
+    by colour hex, or by number: VOA2 / A2 / 2 is "Artist 2" while artists
+    keep their default names, otherwise the second artist to speak in the
+    script.
+    """
+
+    def __init__(self, db: Session, project_id: str):
+        artists = db.query(Artist).filter(Artist.project_id == project_id).all()
+        first_line = dict(
+            db.query(ScriptLine.artist_id, func.min(ScriptLine.line_number))
+            .filter(ScriptLine.project_id == project_id)
+            .group_by(ScriptLine.artist_id)
+            .all()
+        )
+        self.by_name = {_key(a.name): a for a in artists}
+        self.by_color = {a.color.lstrip("#").lower(): a for a in artists if a.color}
+        ordered = sorted(artists, key=lambda a: (first_line.get(a.id) is None, first_line.get(a.id) or 0))
+        self.by_number = {i + 1: a for i, a in enumerate(ordered)}
+
+    def match_code(self, code: str) -> Optional[Artist]:
+        key = _key(code)
+        if not key:
+            return None
+        if key in self.by_name:
+            return self.by_name[key]
+        hex_match = _HEX_RE.match(code.strip().lower())
+        if hex_match and hex_match.group(1) in self.by_color:
+            return self.by_color[hex_match.group(1)]
+        numbered = _NUMBERED_RE.match(key)
+        if numbered:
+            n = int(numbered.group(1))
+            return self.by_name.get(f"artist{n}") or self.by_number.get(n)
+        return None
+
+    def resolve(self, filename: str) -> Optional[Artist]:
+        """Artist for a file, or None when it can't be told unambiguously."""
+        parsed = parse_audio_filename(filename)
+        if parsed:
+            return self.match_code(parsed["artist_code"])
+        # Off-convention names: accept a single artist named (or coloured) by some token
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        found = {}
+        for token in _TOKEN_SPLIT_RE.split(stem):
+            key = _key(token)
+            artist = self.by_name.get(key) or self.by_color.get(key)
+            if artist is not None:
+                found[artist.id] = artist
+        return next(iter(found.values())) if len(found) == 1 else None
+
+
+def is_zip_upload(upload: UploadFile) -> bool:
+    name = (upload.filename or "").lower()
+    return name.endswith(".zip") or upload.content_type in ("application/zip", "application/x-zip-compressed")
+
+
+def _extract_zip(source: BinaryIO, upload_dir: str, resolver: ArtistResolver) -> List[Tuple[Optional[Artist], Extracted]]:
+    """
+    Copy each audio member of a zip into upload_dir, hashing as it goes.
+    Members that can't be assigned an artist are not extracted.
+    """
+    results = []
+    try:
+        archive = zipfile.ZipFile(source)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=415, detail="Not a valid zip archive")
+    with archive:
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or not name or name.startswith(".") or info.filename.startswith("__MACOSX/"):
+                continue
+            artist = resolver.resolve(name)
+            if artist is None:
+                results.append((None, (name, None, None, info.file_size, None)))
+                continue
+            if info.file_size > MAX_AUDIO_BYTES:
+                results.append((artist, (name, None, None, info.file_size, "File too large")))
+                continue
+
+            filepath = os.path.join(upload_dir, f"{uuid.uuid4()}_{name}")
+            hasher = hashlib.sha256()
+            size = 0
+            error = None
+            with archive.open(info) as member, open(filepath, "wb") as out:
+                while True:
+                    chunk = member.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    if size == 0 and sniff_kind(chunk[:16]) not in AUDIO_KINDS:
+                        error = "Unsupported audio format"
+                        break
+                    size += len(chunk)
+                    if size > MAX_AUDIO_BYTES:
+                        error = "File too large"
+                        break
+                    hasher.update(chunk)
+                    out.write(chunk)
+            if error:
+                os.remove(filepath)
+                results.append((artist, (name, None, None, size, error)))
+            else:
+                results.append((artist, (name, filepath, hasher.hexdigest(), size, None)))
+    return results
+
+
+async def ingest_files(
+    db: AsyncSession,
+    project_id: str,
+    files: List[UploadFile],
+    upload_dir: str,
+    mode: str,
+    engine: Optional[str] = None,
+    model: Optional[str] = None
+) -> Tuple[IngestBatch, List[str]]:
+    """
+    Save a batch of audio files (plain or zipped), assign each to an artist
+    and create a queued transcription job per assigned file.
+
+    Files without a resolvable artist are recorded as unassigned, and files
+    rejected by format or size as rejected; neither stops the batch.
+
+    Returns:
+        The committed batch and the ids of the jobs to enqueue
+    """
+    resolver = await db.run_sync(ArtistResolver, project_id)
+    batch = IngestBatch(id=str(uuid.uuid4()), project_id=project_id)
+    db.add(batch)
+
+    saved: List[Tuple[Optional[Artist], Extracted]] = []
+    for upload in files:
+        if is_zip_upload(upload):
+            saved.extend(await run_in_threadpool(_extract_zip, upload.file, upload_dir, resolver))
+            continue
+        name = os.path.basename(upload.filename or "audio")
+        artist = resolver.resolve(name)
+        if artist is None:
+            saved.append((None, (name, None, None, 0, None)))
+            continue
+        filepath = os.path.join(upload_dir, f"{uuid.uuid4()}_{name}")
+        try:
+            content_hash, size, _ = await stream_upload(upload, filepath, AUDIO_KINDS, MAX_AUDIO_BYTES)
+        except HTTPException as e:
+            saved.append((artist, (name, None, None, 0, str(e.detail))))
+            continue
+        saved.append((artist, (name, filepath, content_hash, size, None)))
+
+    job_ids = []
+    for position, (artist, (name, filepath, content_hash, size, error)) in enumerate(saved):
+        item = IngestItem(
+            batch_id=batch.id,
+            position=position,
+            filename=name,
+            artist_id=artist.id if artist else None
+        )
+        if artist is None:
+            item.status = "unassigned"
+            item.error = "No artist matches this filename"
+        elif filepath is None:
+            item.status = "rejected"
+            item.error = error
+        else:
+            audio_id = str(uuid.uuid4())
+            db.add(AudioFile(
+                id=audio_id,
+                project_id=project_id,
+                artist_id=artist.id,
+                filename=name,
+                filepath=filepath,
+                content_hash=content_hash,
+                size_bytes=size,
+                status="queued"
+            ))
+            job = TranscriptionJob(
+                id=str(uuid.uuid4()),
+                project_id=project_id,
+                audio_id=audio_id,
+                status=JobStatus.QUEUED.value,
+                mode=mode,
+                engine=engine,
+                model=model
+            )
+            db.add(job)
+            item.audio_id = audio_id
+            item.job_id = job.id
+            item.status = JobStatus.QUEUED.value
+            job_ids.append(job.id)
+        db.add(item)
+
+    await db.commit()
+    return batch, job_ids
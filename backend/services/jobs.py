@@ -0,0 +1,386 @@
+import logging
+import os
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Tuple
+
+from models.database import engine, SessionLocal, AudioFile, ScriptLine, Settings, TranscriptionJob, TranscriptSegment
+from models.schemas import JobStatus
+from services.audio_cache import load_pcm, prepare_audio
+from services.transcriber import transcribe_audio, describe_engine, resolve_engine
+from services.matcher import match_lines_to_transcription
+from services.model_registry import WHISPER_PRELOAD
+from services.status_counters import apply_status_changes, set_line_statuses
+from services.transcript_index import index_for_audio, normalize_text
+from services.transcription_cache import cache_key, get_cached_transcription, store_transcription
+from services.uploads import hash_file
+
+logger = logging.getLogger(__name__)
+
+# Transcription runs off the event loop in a bounded pool. "thread" is fine for the
+# OpenAI API and for Whisper (torch releases the GIL); "process" isolates local models.
+TRANSCRIBE_WORKERS = max(1, int(os.environ.get("TRANSCRIBE_WORKERS", "2")))
+TRANSCRIBE_EXECUTOR = os.environ.get("TRANSCRIBE_EXECUTOR", "thread").lower()
+# Jobs from one bulk ingest in the pool at once, so a large batch can't starve other uploads
+INGEST_CONCURRENCY = max(1, int(os.environ.get("INGEST_CONCURRENCY", "2")))
+
+LOCAL_WHISPER_MISSING = (
+    "Local Whisper is not installed on this server. Go to Settings and switch to "
+    "OpenAI API mode, then add your API key."
+)
+FASTER_WHISPER_MISSING = (
+    "faster-whisper is not installed on this server. Install it with "
+    "pip install faster-whisper, or pick another engine in Settings."
+)
+NUMPY_MISSING = (
+    "Numpy is missing in the backend. In the backend folder run: "
+    "source venv/bin/activate && pip install numpy && restart the server."
+)
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker_process():
+    """Drop pooled connections inherited from the parent process after fork."""
+    engine.dispose(close=False)
+
+
+def get_executor() -> Executor:
+    """Return the shared transcription pool, creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            if TRANSCRIBE_EXECUTOR == "process":
+                _executor = ProcessPoolExecutor(
+                    max_workers=TRANSCRIBE_WORKERS,
+                    initializer=_init_worker_process
+                )
+            else:
+                _executor = ThreadPoolExecutor(
+                    max_workers=TRANSCRIBE_WORKERS,
+                    thread_name_prefix="transcribe"
+                )
+        return _executor
+
+
+def shutdown_executor(wait: bool = False):
+    """Stop accepting jobs; queued jobs stay 'queued' in the DB and resume on next start."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait, cancel_futures=True)
+            _executor = None
+
+
+def _log_unhandled(future: Future):
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Transcription job crashed", exc_info=future.exception())
+
+
+def enqueue_job(job_id: str) -> Future:
+    """Submit a queued job to the worker pool."""
+    future = get_executor().submit(run_transcription_job, job_id)
+    future.add_done_callback(_log_unhandled)
+    return future
+
+
+def enqueue_batch(job_ids: List[str], concurrency: int = INGEST_CONCURRENCY):
+    """
+    Feed a batch of queued jobs to the pool, at most `concurrency` at a time.
+
+    Each finished job submits the next one, so the rest of the batch waits
+    here rather than in the pool queue ahead of other projects' uploads.
+    """
+    pending = deque(job_ids)
+    lock = threading.Lock()
+
+    def submit_next(_: Optional[Future] = None):
+        with lock:
+            if not pending:
+                return
+            job_id = pending.popleft()
+        try:
+            future = enqueue_job(job_id)
+        except RuntimeError:
+            # Pool shut down; the job stays queued and resumes on next start
+            return
+        future.add_done_callback(submit_next)
+
+    for _ in range(min(concurrency, len(job_ids))):
+        submit_next()
+
+
+def _prepare(audio: AudioFile, decode: bool = True) -> Optional[str]:
+    """prepare_audio, logging failures: an engine can still try the original file."""
+    try:
+        return prepare_audio(audio, decode)
+    except Exception:
+        logger.warning("Could not decode %s", audio.filepath, exc_info=True)
+        return None
+
+
+def preprocess_audio(audio_ids: List[str]) -> None:
+    """Decode uploaded audio to the PCM cache ahead of transcription. Runs inside the pool."""
+    db = SessionLocal()
+    try:
+        for audio in db.query(AudioFile).filter(AudioFile.id.in_(audio_ids)).all():
+            _prepare(audio)
+            db.commit()
+    finally:
+        db.close()
+
+
+def enqueue_preprocess(audio_ids: List[str]) -> Optional[Future]:
+    """Submit decoding of newly uploaded audio to the worker pool."""
+    if not audio_ids:
+        return None
+    future = get_executor().submit(preprocess_audio, audio_ids)
+    future.add_done_callback(_log_unhandled)
+    return future
+
+
+def resume_pending_jobs() -> int:
+    """
+    Re-submit jobs left 'queued' by a previous process and fail the ones that
+    were mid-run when it stopped.
+
+    Returns:
+        Number of jobs re-submitted
+    """
+    db = SessionLocal()
+    try:
+        interrupted = db.query(TranscriptionJob).filter(
+            TranscriptionJob.status == JobStatus.RUNNING.value
+        ).all()
+        for job in interrupted:
+            job.status = JobStatus.FAILED.value
+            job.error = "Interrupted by server restart"
+            job.finished_at = datetime.utcnow()
+            if job.audio is not None and job.audio.status == "transcribing":
+                job.audio.status = "uploaded"
+        db.commit()
+
+        queued_ids = [
+            job_id for (job_id,) in db.query(TranscriptionJob.id).filter(
+                TranscriptionJob.status == JobStatus.QUEUED.value
+            ).order_by(TranscriptionJob.created_at)
+        ]
+    finally:
+        db.close()
+
+    for job_id in queued_ids:
+        enqueue_job(job_id)
+    return len(queued_ids)
+
+
+def preload_default_engine() -> None:
+    """
+    Load the model new jobs will run on at startup when WHISPER_PRELOAD is
+    set: the engine and model picked in Settings, or the mode's default engine.
+    """
+    if not WHISPER_PRELOAD:
+        return
+    db = SessionLocal()
+    try:
+        settings = db.query(Settings).first()
+        mode = (settings.whisper_mode if settings else None) or "local"
+        engine_name = model = None
+        if settings and mode == "local":
+            engine_name, model = settings.transcription_engine, settings.transcription_model
+    finally:
+        db.close()
+    try:
+        resolve_engine(mode, engine_name).preload(model)
+    except Exception:
+        logger.warning("Model preload failed", exc_info=True)
+
+
+def _classify_failure(error: Exception) -> Tuple[str, str]:
+    """
+    Map a transcription failure to (audio_status, error_text).
+
+    Missing-dependency errors leave the file 'uploaded' so the user can retry
+    after switching modes; anything else marks it 'error'.
+    """
+    err_msg = str(error)
+    if "faster-whisper not installed" in err_msg:
+        return "uploaded", FASTER_WHISPER_MISSING
+    if isinstance(error, ImportError) and "numpy" not in err_msg.lower():
+        return "uploaded", LOCAL_WHISPER_MISSING
+    if "Local Whisper not installed" in err_msg or "openai-whisper" in err_msg:
+        return "uploaded", LOCAL_WHISPER_MISSING
+    if "Numpy is not available" in err_msg or "numpy" in err_msg.lower():
+        return "uploaded", NUMPY_MISSING
+    return "error", f"Transcription failed: {err_msg}"
+
+
+def _match_values(match: Dict, audio_id: str) -> Dict:
+    """Line columns for a match result, as set_line_statuses() takes them."""
+    return {
+        "status": match["status"],
+        "confidence": match["confidence"],
+        "matched_text": match["matched_text"],
+        "matched_audio_id": audio_id if match["matched_text"] else None,
+        "matched_start": match["start_time"],
+        "matched_end": match["end_time"],
+    }
+
+
+def run_transcription_job(job_id: str) -> None:
+    """Transcribe a job's audio file and match its artist's lines. Runs inside the pool."""
+    db = SessionLocal()
+    try:
+        job = db.get(TranscriptionJob, job_id)
+        if job is None or job.status != JobStatus.QUEUED.value:
+            return
+
+        audio = job.audio
+        if audio is None:
+            job.status = JobStatus.FAILED.value
+            job.error = "Audio file not found"
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            return
+
+        settings = db.query(Settings).first()
+        mode = job.mode or (settings.whisper_mode if settings else "local")
+        api_key = settings.openai_api_key if settings else None
+        match_mode = (settings.match_mode if settings else None) or "fuzzy"
+
+        job.status = JobStatus.RUNNING.value
+        job.started_at = datetime.utcnow()
+        audio.status = "transcribing"
+        db.commit()
+
+        try:
+            if not audio.content_hash:
+                audio.content_hash = hash_file(audio.filepath)
+            engine_name, model = describe_engine(mode, job.engine, job.model)
+            key = cache_key(audio.content_hash, engine_name, model)
+
+            result = get_cached_transcription(db, key)
+            if result is not None:
+                job.cache_hit = True
+                _prepare(audio, decode=False)
+            else:
+                # Decoded once per file (usually already at upload); retries reuse it
+                pcm_file = _prepare(audio)
+                result = transcribe_audio(
+                    filepath=audio.filepath,
+                    mode=mode,
+                    api_key=api_key,
+                    model_size=model,
+                    engine=engine_name,
+                    pcm=load_pcm(pcm_file) if pcm_file else None
+                )
+                store_transcription(
+                    db, key, audio.content_hash, engine_name, model, None,
+                    result["text"], result["segments"]
+                )
+
+            audio.transcription = result["text"]
+            audio.transcript_index = None
+            audio.segments = [
+                TranscriptSegment(
+                    position=i,
+                    start=seg["start"],
+                    end=seg["end"],
+                    text=seg["text"],
+                    avg_logprob=seg.get("avg_logprob"),
+                    tokens=normalize_text(seg["text"])
+                )
+                for i, seg in enumerate(result["segments"])
+            ]
+            audio.status = "transcribed"
+            db.flush()
+            index = index_for_audio(audio)
+            db.commit()
+
+            lines = db.query(ScriptLine).filter(
+                ScriptLine.artist_id == audio.artist_id
+            ).order_by(ScriptLine.line_number).all()
+
+            matches = match_lines_to_transcription(
+                [line.text for line in lines], index, mode=match_mode
+            )
+            changes = set_line_statuses(db, audio.project_id, {
+                line.id: _match_values(match, audio.id) for line, match in zip(lines, matches)
+            })
+            apply_status_changes(db, audio.project_id, changes)
+
+            job.lines_matched = len(lines)
+            job.status = JobStatus.DONE.value
+            job.finished_at = datetime.utcnow()
+            db.commit()
+
+        except Exception as e:
+            db.rollback()
+            audio_status, error_text = _classify_failure(e)
+            audio.status = audio_status
+            job.status = JobStatus.FAILED.value
+            job.error = error_text
+            job.finished_at = datetime.utcnow()
+            db.commit()
+    finally:
+        db.close()
+
+
+def rematch_lines(project_id: str, line_ids: List[str]) -> int:
+    """
+    Match specific lines against the existing transcripts of their artist,
+    keeping the best match across that artist's takes. Used after a script
+    revision so only added or changed lines are re-matched. Runs inside the pool.
+
+    Returns:
+        Number of lines that got a match result
+    """
+    db = SessionLocal()
+    try:
+        settings = db.query(Settings).first()
+        match_mode = (settings.match_mode if settings else None) or "fuzzy"
+
+        lines = db.query(ScriptLine).filter(
+            ScriptLine.id.in_(line_ids),
+            ScriptLine.artist_id.isnot(None)
+        ).order_by(ScriptLine.line_number).all()
+        by_artist: Dict[str, List[ScriptLine]] = defaultdict(list)
+        for line in lines:
+            by_artist[line.artist_id].append(line)
+
+        values = {}
+        for artist_id, artist_lines in by_artist.items():
+            takes = db.query(AudioFile).filter(
+                AudioFile.artist_id == artist_id,
+                AudioFile.transcription.isnot(None)
+            ).all()
+            best: List[Optional[Tuple[Dict, str]]] = [None] * len(artist_lines)
+            for audio in takes:
+                index = index_for_audio(audio)
+                matches = match_lines_to_transcription(
+                    [line.text for line in artist_lines], index, mode=match_mode
+                )
+                for k, match in enumerate(matches):
+                    if best[k] is None or match["confidence"] > best[k][0]["confidence"]:
+                        best[k] = (match, audio.id)
+            for line, found in zip(artist_lines, best):
+                if found is not None:
+                    values[line.id] = _match_values(*found)
+
+        changes = set_line_statuses(db, project_id, values)
+        apply_status_changes(db, project_id, changes)
+        db.commit()
+        return len(changes)
+    finally:
+        db.close()
+
+
+def enqueue_rematch(project_id: str, line_ids: List[str]) -> Optional[Future]:
+    """Submit re-matching of revised script lines to the worker pool."""
+    if not line_ids:
+        return None
+    future = get_executor().submit(rematch_lines, project_id, line_ids)
+    future.add_done_callback(_log_unhandled)
+    return future
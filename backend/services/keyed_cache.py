@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+_UPSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+class KeyedCache:
+    """
+    A least-recently-used cache kept in a database table.
+
+    The table's model needs a string primary key `key` and size_bytes,
+    hit_count and last_used_at columns. Entries are evicted, least recently
+    used first, once the table exceeds max_entries rows or max_bytes in total.
+    """
+
+    def __init__(self, model: Any, max_entries: int, max_bytes: int):
+        self.model = model
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    def get(self, db: Session, key: str) -> Optional[Any]:
+        """Return the entry for a key and mark it as recently used, or None. Caller commits."""
+        entry = db.get(self.model, key)
+        if entry is None:
+            return None
+        entry.last_used_at = datetime.utcnow()
+        entry.hit_count = (entry.hit_count or 0) + 1
+        return entry
+
+    def store(self, db: Session, key: str, identity: dict, values: dict):
+        """
+        Insert or refresh an entry, then evict down to the bounds. Caller commits.
+
+        Args:
+            identity: Columns fixed by the key, written only on insert
+            values: The cached payload and its size_bytes, written every time
+
+        Written as one INSERT ... ON CONFLICT DO UPDATE, so two requests
+        storing the same key at once both succeed instead of the second
+        failing on the primary key.
+        """
+        values = {**values, "last_used_at": datetime.utcnow()}
+        insert = _UPSERTS.get(db.get_bind().dialect.name)
+        if insert is None:
+            db.merge(self.model(key=key, **identity, **values))
+        else:
+            stmt = insert(self.model).values(key=key, **identity, **values)
+            db.execute(stmt.on_conflict_do_update(index_elements=[self.model.key], set_=values))
+        db.flush()
+        self.evict(db)
+
+    def evict(self, db: Session) -> int:
+        """
+        Drop least recently used entries until the cache fits its bounds.
+
+        Returns:
+            Number of entries evicted
+        """
+        model = self.model
+        count, total_bytes = db.query(
+            func.count(model.key),
+            func.coalesce(func.sum(model.size_bytes), 0)
+        ).one()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return 0
+
+        oldest = db.query(model.key, model.size_bytes).order_by(model.last_used_at).yield_per(100)
+        doomed = []
+        for key, size in oldest:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            doomed.append(key)
+            count -= 1
+            total_bytes -= size or 0
+        if doomed:
+            db.query(model).filter(model.key.in_(doomed)).delete(synchronize_session=False)
+        return len(doomed)
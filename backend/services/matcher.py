@@ -1,99 +1,307 @@
 from rapidfuzz import fuzz, process
-from typing import List, Dict, Tuple, Optional
-import re
+from typing import List, Dict, Tuple, Optional, Union
+import os
 
+import numpy as np
 
-def normalize_text(text: str) -> str:
-    """Normalize text for comparison."""
-    text = text.lower().strip()
-    text = re.sub(r'[^\w\s]', '', text)
-    text = re.sub(r'\s+', ' ', text)
-    return text
+from services.aligner import align_lines
+from services.transcript_index import TranscriptIndex, normalize_text
+
+# Matcher functions take either raw transcription text or a prebuilt TranscriptIndex
+Transcript = Union[str, TranscriptIndex]
+
+# rapidfuzz worker threads for batch scoring; -1 uses every core
+MATCH_WORKERS = int(os.environ.get("MATCH_WORKERS", "-1"))
+
+
+def as_index(transcription: Transcript) -> TranscriptIndex:
+    """Return a TranscriptIndex, building one if given raw text."""
+    if isinstance(transcription, TranscriptIndex):
+        return transcription
+    return TranscriptIndex.build(transcription)
 
 
 def find_line_in_transcription(
     line: str,
-    transcription: str,
+    transcription: Transcript,
     threshold: float = 0.75
 ) -> Tuple[str, float, Optional[str]]:
     """
     Find if a specific line exists in the transcription.
     
+    Only the candidate spans proposed by the transcript's n-gram index are
+    fuzzy-scored; a line with no candidates is missing without any scoring.
+    
     Returns:
         Tuple of (status, confidence, matched_text)
         status: "found", "partial", or "missing"
+        matched_text: the matching part of the transcript as transcribed
     """
+    index = as_index(transcription)
     norm_line = normalize_text(line)
-    norm_trans = normalize_text(transcription)
+    norm_trans = index.text
     
     if not norm_line or not norm_trans:
         return "missing", 0.0, None
     
     if norm_line in norm_trans:
-        return "found", 1.0, line
+        start = index.token_at(norm_trans.find(norm_line))
+        return "found", 1.0, index.raw_span_text(start, start + len(norm_line.split()))
+    
+    spans = index.candidate_spans(norm_line.split())
+    if not spans:
+        return "missing", 0.0, None
     
-    ratio = fuzz.partial_ratio(norm_line, norm_trans) / 100.0
+    ratio = max(
+        fuzz.partial_ratio(norm_line, index.span_text(start, end)) for start, end in spans
+    ) / 100.0
     
     if ratio >= threshold:
-        return "found", ratio, extract_matched_portion(line, transcription)
+        return "found", ratio, extract_matched_portion(line, index, spans=spans)
     elif ratio >= 0.5:
-        return "partial", ratio, extract_matched_portion(line, transcription)
+        return "partial", ratio, extract_matched_portion(line, index, spans=spans)
     else:
         return "missing", ratio, None
 
 
-def extract_matched_portion(line: str, transcription: str, window: int = 50) -> Optional[str]:
-    """Extract the portion of transcription that best matches the line."""
+def extract_matched_portion(
+    line: str,
+    transcription: Transcript,
+    window: int = 50,
+    spans: Optional[List[Tuple[int, int]]] = None
+) -> Optional[str]:
+    """
+    Extract the portion of transcription that best matches the line.
+    
+    Window starts are limited to the given candidate spans, or to the spans
+    the n-gram index proposes; the whole transcript is scanned only when it
+    proposes none. Windows are scored normalized and returned as transcribed.
+    """
+    index = as_index(transcription)
     norm_line = normalize_text(line)
-    norm_trans = normalize_text(transcription)
     
-    words = norm_trans.split()
+    words = index.tokens
     line_words = norm_line.split()
     
     if len(words) < len(line_words):
-        return transcription
+        return index.raw_span_text(0, len(words))
+    
+    if spans is None:
+        spans = index.candidate_spans(line_words)
+    last_start = len(words) - len(line_words)
+    if spans:
+        starts = sorted({i for start, end in spans for i in range(start, min(end, last_start + 1))})
+    else:
+        starts = range(last_start + 1)
     
     best_score = 0
-    best_start = 0
+    best_start = starts[0] if starts else 0
+    span = len(line_words) + 5
     
-    for i in range(len(words) - len(line_words) + 1):
-        window_text = " ".join(words[i:i + len(line_words) + 5])
+    for i in starts:
+        window_text = index.span_text(i, min(i + span, len(words)))
         score = fuzz.ratio(norm_line, window_text)
         if score > best_score:
             best_score = score
             best_start = i
     
-    matched_words = words[best_start:best_start + len(line_words) + 5]
-    return " ".join(matched_words)
+    return index.raw_span_text(best_start, min(best_start + span, len(words)))
 
 
-def match_lines_to_transcription(
+def align_lines_to_transcription(
     expected_lines: List[str],
-    transcription: str,
+    transcription: Transcript,
     threshold: float = 0.75
 ) -> List[Dict]:
     """
-    Match a list of expected lines against a transcription.
+    Match lines in script order with a banded, anchor-seeded alignment.
+    
+    Each line is only scored near where it is expected in the take, so a line
+    cannot be "found" at some unrelated spot far away. Hits that break script
+    order are reported as partial at most.
     
     Returns:
-        List of dicts with line, status, confidence, and matched_text
+        List of dicts with line, status, confidence, matched_text, and
+        start_time/end_time (seconds, None without segment timings)
     """
-    results = []
+    index = as_index(transcription)
+    line_tokens = [normalize_text(line).split() for line in expected_lines]
+    alignment = align_lines(line_tokens, index)
     
-    for line in expected_lines:
-        status, confidence, matched = find_line_in_transcription(
-            line, transcription, threshold
-        )
+    results = []
+    for line, hit in zip(expected_lines, alignment):
+        if hit is None:
+            status, confidence, matched = "missing", 0.0, None
+        else:
+            start, end, score, in_order = hit
+            confidence = score / 100.0
+            matched = index.raw_span_text(start, end)
+            if confidence >= threshold and in_order:
+                status = "found"
+            elif confidence >= 0.5:
+                status = "partial"
+            else:
+                status, matched = "missing", None
+        start_time, end_time = index.time_span(start, end) if matched else (None, None)
         results.append({
             "line": line,
             "status": status,
             "confidence": confidence,
-            "matched_text": matched
+            "matched_text": matched,
+            "start_time": start_time,
+            "end_time": end_time
         })
     
     return results
 
 
+def _best_windows_batched(
+    line_ids: np.ndarray,
+    norm_lines: List[str],
+    line_spans: List[List[Tuple[int, int]]],
+    index: TranscriptIndex,
+    workers: int
+) -> Dict[int, Tuple[str, int, int]]:
+    """
+    Batch version of extract_matched_portion for many lines at once.
+    
+    Returns:
+        Dict of line index -> (matched_text, start_token, end_token)
+    """
+    words = index.tokens
+    matched: Dict[int, Tuple[str, int, int]] = {}
+    queries, windows, starts, bounds = [], [], [], []
+    for i in line_ids:
+        m = len(norm_lines[i].split())
+        if len(words) < m:
+            matched[i] = (index.raw_span_text(0, len(words)), 0, len(words))
+            continue
+        last_start = len(words) - m
+        line_starts = sorted({
+            k for start, end in line_spans[i] for k in range(start, min(end, last_start + 1))
+        }) or [0]
+        bounds.append((i, len(windows), len(windows) + len(line_starts), m + 5))
+        for k in line_starts:
+            queries.append(norm_lines[i])
+            windows.append(index.span_text(k, min(k + m + 5, len(words))))
+            starts.append(k)
+    
+    if not windows:
+        return matched
+    scores = process.cpdist(queries, windows, scorer=fuzz.ratio, workers=workers)
+    for i, lo, hi, span in bounds:
+        best_start = starts[lo + int(np.argmax(scores[lo:hi]))]
+        best_end = min(best_start + span, len(words))
+        matched[i] = (index.raw_span_text(best_start, best_end), best_start, best_end)
+    return matched
+
+
+def score_lines_batched(
+    expected_lines: List[str],
+    transcription: Transcript,
+    threshold: float = 0.75,
+    workers: Optional[int] = None
+) -> List[Dict]:
+    """
+    Score all lines of an artist in one multi-threaded rapidfuzz call.
+    
+    Every (line, candidate span) pair is scored with process.cpdist, the
+    pairwise form of cdist, so only each line's own candidates are computed.
+    Per-line maxima and status thresholds are reduced with NumPy. Results
+    are the same as calling find_line_in_transcription line by line.
+    
+    Returns:
+        List of dicts with line, status, confidence, matched_text, and
+        start_time/end_time (seconds, None without segment timings)
+    """
+    index = as_index(transcription)
+    workers = MATCH_WORKERS if workers is None else workers
+    norm_lines = [normalize_text(line) for line in expected_lines]
+    n_lines = len(norm_lines)
+    
+    exact = np.zeros(n_lines, dtype=bool)
+    line_spans: List[List[Tuple[int, int]]] = [[] for _ in range(n_lines)]
+    pair_line, pair_text = [], []
+    for i, norm_line in enumerate(norm_lines):
+        if not norm_line or not index.text:
+            continue
+        if norm_line in index.text:
+            exact[i] = True
+            continue
+        line_spans[i] = index.candidate_spans(norm_line.split())
+        for start, end in line_spans[i]:
+            pair_line.append(i)
+            pair_text.append(index.span_text(start, end))
+    
+    confidence = np.zeros(n_lines)
+    if pair_text:
+        pair_ids = np.asarray(pair_line)
+        scores = process.cpdist(
+            [norm_lines[i] for i in pair_line], pair_text,
+            scorer=fuzz.partial_ratio, workers=workers
+        )
+        np.maximum.at(confidence, pair_ids, scores / 100.0)
+    confidence[exact] = 1.0
+    
+    found = confidence >= threshold
+    partial = ~found & (confidence >= 0.5)
+    status = np.select([found, partial], ["found", "partial"], default="missing")
+    
+    matched = _best_windows_batched(
+        np.flatnonzero((found | partial) & ~exact), norm_lines, line_spans, index, workers
+    )
+    for i in np.flatnonzero(exact):
+        start = index.token_at(index.text.find(norm_lines[i]))
+        end = start + len(norm_lines[i].split())
+        matched[i] = (index.raw_span_text(start, end), start, end)
+    
+    results = []
+    for i, line in enumerate(expected_lines):
+        text, start, end = matched.get(i, (None, 0, 0))
+        start_time, end_time = index.time_span(start, end)
+        results.append({
+            "line": line,
+            "status": str(status[i]),
+            "confidence": float(confidence[i]),
+            "matched_text": text,
+            "start_time": start_time,
+            "end_time": end_time
+        })
+    return results
+
+
+def match_lines_to_transcription(
+    expected_lines: List[str],
+    transcription: Transcript,
+    threshold: float = 0.75,
+    mode: str = "fuzzy",
+    workers: Optional[int] = None
+) -> List[Dict]:
+    """
+    Match a list of expected lines against a transcription.
+    
+    Args:
+        expected_lines: Lines in script order
+        transcription: Transcribed text of the take, or its TranscriptIndex
+        threshold: Minimum confidence for "found"
+        mode: "fuzzy" scores each line on its own against the few candidate
+            spans TranscriptIndex.candidate_spans() proposes for it,
+            "aligned" uses the order-aware alignment
+        workers: rapidfuzz threads for batch scoring (default MATCH_WORKERS)
+    
+    Returns:
+        List of dicts with line, status, confidence, matched_text, and
+        start_time/end_time (seconds, None without segment timings).
+        matched_text is the matching part of the transcript as transcribed,
+        with its case and punctuation, in every mode.
+    """
+    index = as_index(transcription)
+    if mode == "aligned":
+        return align_lines_to_transcription(expected_lines, index, threshold)
+    
+    return score_lines_batched(expected_lines, index, threshold, workers)
+
+
 def calculate_qc_stats(match_results: List[Dict]) -> Dict:
     """Calculate QC statistics from match results."""
     total = len(match_results)
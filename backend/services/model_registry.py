@@ -0,0 +1,167 @@
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Registry bounds and defaults, configurable per deployment
+WHISPER_MODEL_SIZE = os.environ.get("WHISPER_MODEL_SIZE", "base")
+WHISPER_DEVICE = os.environ.get("WHISPER_DEVICE", "auto")
+WHISPER_COMPUTE_TYPE = os.environ.get("WHISPER_COMPUTE_TYPE", "float32")
+WHISPER_MAX_MODELS = max(1, int(os.environ.get("WHISPER_MAX_MODELS", "2")))
+WHISPER_MEMORY_BUDGET_MB = int(os.environ.get("WHISPER_MEMORY_BUDGET_MB", "4096"))
+WHISPER_CONCURRENCY = max(1, int(os.environ.get("WHISPER_CONCURRENCY", "1")))
+WHISPER_PRELOAD = os.environ.get("WHISPER_PRELOAD", "").lower() in ("1", "true", "yes")
+
+# Rough resident size per model (fp32 weights plus runtime overhead), used
+# before a model is loaded and when its parameters can't be measured
+_ESTIMATED_MB = {
+    "tiny": 150, "base": 300, "small": 1000, "medium": 2600,
+    "large": 5200, "large-v2": 5200, "large-v3": 5200, "turbo": 3300,
+}
+
+ModelKey = Tuple[str, str, str]  # (size, device, compute_type)
+
+
+def estimate_mb(key: ModelKey) -> int:
+    """Expected resident size of a model before it is loaded."""
+    return _ESTIMATED_MB.get(key[0], 1000)
+
+
+class _Entry:
+    def __init__(self, model: Any, size_mb: int, concurrency: int):
+        self.model = model
+        self.size_mb = size_mb
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+def _measure_mb(model: Any, fallback: int) -> int:
+    """Size of a torch model's parameters in MB, or the fallback estimate."""
+    try:
+        total = sum(p.numel() * p.element_size() for p in model.parameters())
+        return max(1, int(total / (1024 * 1024)))
+    except Exception:
+        return fallback
+
+
+def _load_whisper(size: str, device: str, compute_type: str) -> Any:
+    try:
+        import numpy  # noqa: F401 - required by whisper/torch
+    except ImportError:
+        raise ImportError(
+            "Numpy is not available. Install with: pip install numpy\n"
+            "Then restart the backend."
+        )
+    try:
+        import whisper
+    except ImportError:
+        raise ImportError(
+            "Local Whisper not installed. Install with: pip install openai-whisper\n"
+            "Or use API mode instead."
+        )
+    return whisper.load_model(size, device=None if device == "auto" else device)
+
+
+class ModelRegistry:
+    """
+    Loaded Whisper models keyed by (size, device, compute type).
+
+    Keeps at most max_models resident within a memory budget, evicting the
+    least recently used idle model to make room, and lets up to `concurrency`
+    inferences run on each model at once.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, str, str], Any] = _load_whisper,
+        estimate: Callable[[ModelKey], int] = estimate_mb,
+        max_models: int = WHISPER_MAX_MODELS,
+        memory_budget_mb: int = WHISPER_MEMORY_BUDGET_MB,
+        concurrency: int = WHISPER_CONCURRENCY
+    ):
+        self._loader = loader
+        self._estimate = estimate
+        self.max_models = max_models
+        self.memory_budget_mb = memory_budget_mb
+        self.concurrency = concurrency
+        self._entries: Dict[ModelKey, _Entry] = {}
+        self._lock = threading.Lock()
+        self._load_locks: Dict[ModelKey, threading.Lock] = {}
+
+    def _evict_for(self, needed_mb: int):
+        """Drop idle models, least recently used first, until needed_mb fits. Caller holds _lock."""
+        def over_budget():
+            used = sum(e.size_mb for e in self._entries.values())
+            return len(self._entries) >= self.max_models or used + needed_mb > self.memory_budget_mb
+
+        while over_budget():
+            idle = [(e.last_used, k) for k, e in self._entries.items() if e.in_use == 0]
+            if not idle:
+                # Everything resident is busy; go over budget rather than fail the request
+                return
+            _, key = min(idle)
+            logger.info("Evicting Whisper model %s", key)
+            del self._entries[key]
+
+    def _checkout(self, key: ModelKey) -> _Entry:
+        """Return the entry for key, loading it if needed, marked as in use."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.in_use += 1
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other models stay usable; one loader per key
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.in_use += 1
+                    return entry
+                estimate = self._estimate(key)
+                self._evict_for(estimate)
+
+            model = self._loader(*key)
+            entry = _Entry(model, _measure_mb(model, estimate), self.concurrency)
+            with self._lock:
+                entry.in_use += 1
+                self._entries[key] = entry
+            return entry
+
+    @contextmanager
+    def acquire(
+        self,
+        size: Optional[str] = None,
+        device: Optional[str] = None,
+        compute_type: Optional[str] = None
+    ) -> Iterator[Any]:
+        """Borrow a model for one inference, loading it if needed."""
+        key = (size or WHISPER_MODEL_SIZE, device or WHISPER_DEVICE, compute_type or WHISPER_COMPUTE_TYPE)
+        entry = self._checkout(key)
+        try:
+            with entry.semaphore:
+                yield entry.model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def preload(self, size: Optional[str] = None, device: Optional[str] = None, compute_type: Optional[str] = None):
+        """Load a model ahead of the first request."""
+        with self.acquire(size, device, compute_type):
+            pass
+
+    def loaded(self) -> Dict[ModelKey, int]:
+        """Resident models and their size in MB."""
+        with self._lock:
+            return {k: e.size_mb for k, e in self._entries.items()}
+
+
+registry = ModelRegistry()
+
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import wave
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+import httpx
+import openai
+from openai import AsyncOpenAI, OpenAI
+
+from services.chunking import ffmpeg_available, probe_duration
+
+logger = logging.getLogger(__name__)
+
+# Point at a proxy or a local stub server; None uses OpenAI
+OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL") or None
+OPENAI_TIMEOUT_SECONDS = float(os.environ.get("OPENAI_TIMEOUT_SECONDS", "600"))
+# Per API key: requests in flight, and the rate limits to stay under
+OPENAI_MAX_CONCURRENCY = max(1, int(os.environ.get("OPENAI_MAX_CONCURRENCY", "8")))
+OPENAI_REQUESTS_PER_MINUTE = float(os.environ.get("OPENAI_REQUESTS_PER_MINUTE", "50"))
+OPENAI_AUDIO_MINUTES_PER_MINUTE = float(os.environ.get("OPENAI_AUDIO_MINUTES_PER_MINUTE", "0"))
+# Retries on 429, 5xx, timeouts and dropped connections, with jittered exponential backoff
+OPENAI_MAX_RETRIES = max(0, int(os.environ.get("OPENAI_MAX_RETRIES", "5")))
+OPENAI_RETRY_BASE_SECONDS = float(os.environ.get("OPENAI_RETRY_BASE_SECONDS", "1"))
+OPENAI_RETRY_MAX_SECONDS = float(os.environ.get("OPENAI_RETRY_MAX_SECONDS", "60"))
+
+# Rough bitrate for compressed audio whose duration can't be read (128 kbps)
+_FALLBACK_BYTES_PER_SECOND = 16000
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Rate limiter refilling `rate` tokens a second up to `capacity`.
+
+    reserve() takes tokens immediately and returns how long the caller must
+    wait before using them, so blocking threads and coroutines can share one
+    bucket; a rate of 0 or less disables the limit.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float = 1.0) -> float:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative queues the caller behind earlier reservations
+            self._tokens -= amount
+            return max(0.0, -self._tokens / self.rate)
+
+
+class _KeyLimits:
+    def __init__(self):
+        # Per-minute limits are enforced over shorter windows too, so pace evenly
+        # with about a second of burst rather than spending a minute's budget at once
+        self.requests = TokenBucket(OPENAI_REQUESTS_PER_MINUTE / 60)
+        self.audio_seconds = TokenBucket(OPENAI_AUDIO_MINUTES_PER_MINUTE)
+        self.slots = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+
+    def reserve(self, seconds: float) -> float:
+        return max(self.requests.reserve(), self.audio_seconds.reserve(seconds))
+
+
+def audio_seconds(filepath: str) -> float:
+    """Duration of an upload for the audio-minutes limit; estimated from size if unreadable."""
+    try:
+        with wave.open(filepath, "rb") as w:
+            return w.getnframes() / w.getframerate()
+    except (wave.Error, EOFError, OSError):
+        pass
+    duration = probe_duration(filepath) if ffmpeg_available() else None
+    if duration is None:
+        duration = os.path.getsize(filepath) / _FALLBACK_BYTES_PER_SECOND
+    return duration
+
+
+def _retryable(error: Exception) -> bool:
+    if isinstance(error, (openai.RateLimitError, openai.APIConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code >= 500
+
+
+def _retry_delay(attempt: int, error: Exception) -> float:
+    """Full-jitter exponential backoff, never sooner than the server's Retry-After."""
+    delay = random.uniform(0, min(OPENAI_RETRY_MAX_SECONDS, OPENAI_RETRY_BASE_SECONDS * 2 ** attempt))
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    try:
+        delay = max(delay, min(OPENAI_RETRY_MAX_SECONDS, float(retry_after)))
+    except (TypeError, ValueError):
+        pass
+    return delay
+
+
+def _transcript_dict(transcript) -> Dict:
+    # Imported here: services.engines imports this module
+    from services.engines import segment_dict
+
+    return {
+        "text": transcript.text,
+        "segments": [segment_dict(seg) for seg in (getattr(transcript, "segments", None) or [])]
+    }
+
+
+class OpenAIClients:
+    """
+    OpenAI clients shared per API key.
+
+    Each key gets one client, so HTTP connections are kept alive and reused,
+    plus a concurrency cap and token buckets for requests and audio minutes.
+    Transcription jobs and their chunks run in worker threads, so many files
+    go out in parallel through call(); calls that fail with 429, 5xx or a
+    connection error are retried with jittered exponential backoff. Request
+    handlers get a pooled async client for quick calls such as the key test.
+
+    Args:
+        http_client: Transport for the sync clients, e.g. a stub in tests
+    """
+
+    def __init__(self, http_client: Optional[httpx.Client] = None):
+        self._http_client = http_client
+        self._lock = threading.Lock()
+        self._clients: Dict[str, OpenAI] = {}
+        self._async_clients: Dict[str, Tuple[asyncio.AbstractEventLoop, AsyncOpenAI]] = {}
+        self._limits: Dict[str, _KeyLimits] = {}
+
+    def _key_limits(self, api_key: str) -> _KeyLimits:
+        with self._lock:
+            return self._limits.setdefault(api_key, _KeyLimits())
+
+    def client(self, api_key: str) -> OpenAI:
+        """The shared sync client for a key."""
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                # Retries are ours, so they also go through the rate limits
+                client = OpenAI(
+                    api_key=api_key, base_url=OPENAI_BASE_URL,
+                    timeout=OPENAI_TIMEOUT_SECONDS, max_retries=0,
+                    http_client=self._http_client
+                )
+                self._clients[api_key] = client
+            return client
+
+    def async_client(self, api_key: str) -> AsyncOpenAI:
+        """The shared async client for a key on the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._async_clients.get(api_key)
+            if entry is None or entry[0] is not loop:
+                # A client's connections belong to the loop that opened them
+                entry = (loop, AsyncOpenAI(
+                    api_key=api_key, base_url=OPENAI_BASE_URL,
+                    timeout=OPENAI_TIMEOUT_SECONDS, max_retries=0
+                ))
+                self._async_clients[api_key] = entry
+            return entry[1]
+
+    def call(self, api_key: str, fn: Callable[[OpenAI], T], seconds: float = 0.0) -> T:
+        """Run fn(client) within the key's limits, retrying transient failures."""
+        limits = self._key_limits(api_key)
+        client = self.client(api_key)
+        with limits.slots:
+            for attempt in range(OPENAI_MAX_RETRIES + 1):
+                time.sleep(limits.reserve(seconds))
+                try:
+                    return fn(client)
+                except Exception as e:
+                    if attempt == OPENAI_MAX_RETRIES or not _retryable(e):
+                        raise
+                    delay = _retry_delay(attempt, e)
+                    logger.info("OpenAI call failed (%s); retry %d in %.1fs", e, attempt + 1, delay)
+                    time.sleep(delay)
+
+    def transcribe(self, api_key: str, filepath: str, model: str = "whisper-1") -> Dict:
+        """Transcribe one file; returns text and segments like the transcription engines."""
+        def create(client: OpenAI):
+            with open(filepath, "rb") as audio_file:
+                return client.audio.transcriptions.create(
+                    model=model, file=audio_file, response_format="verbose_json"
+                )
+        return _transcript_dict(self.call(api_key, create, audio_seconds(filepath)))
+
+    async def aclose(self):
+        """Close every client's connections. Call on the loop the async clients were made on."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = list(self._clients.values())
+            async_clients = list(self._async_clients.values())
+            self._clients.clear()
+            self._async_clients.clear()
+        for client in clients:
+            client.close()
+        for client_loop, client in async_clients:
+            if client_loop is loop:
+                await client.close()
+
+
+openai_clients = OpenAIClients()
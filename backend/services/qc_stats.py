@@ -0,0 +1,54 @@
+from collections import defaultdict
+from typing import Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models.database import ScriptLine
+
+# status -> count
+StatusCounts = Dict[str, int]
+
+
+def line_status_counts(db: Session, project_id: str) -> Dict[Optional[str], StatusCounts]:
+    """
+    Count a project's script lines per artist and status in one GROUP BY.
+
+    Returns:
+        artist_id (None for unassigned lines) -> status -> count
+    """
+    rows = db.query(
+        ScriptLine.artist_id, ScriptLine.status, func.count()
+    ).filter(
+        ScriptLine.project_id == project_id
+    ).group_by(ScriptLine.artist_id, ScriptLine.status).all()
+
+    counts: Dict[Optional[str], StatusCounts] = defaultdict(dict)
+    for artist_id, status, n in rows:
+        counts[artist_id][status] = n
+    return counts
+
+
+def merge_counts(*counts: StatusCounts) -> StatusCounts:
+    """Add status counts together, e.g. all artists into a project total."""
+    merged: StatusCounts = defaultdict(int)
+    for c in counts:
+        for status, n in c.items():
+            merged[status] += n
+    return dict(merged)
+
+
+def summarize_counts(counts: StatusCounts) -> Dict:
+    """Totals and completion for a set of status counts; pending lines count as missing."""
+    total = sum(counts.values())
+    found = counts.get("found", 0)
+    partial = counts.get("partial", 0)
+    missing = counts.get("missing", 0) + counts.get("pending", 0)
+    completion = (found + partial * 0.5) / total * 100 if total > 0 else 0
+    return {
+        "total_lines": total,
+        "found_lines": found,
+        "partial_lines": partial,
+        "missing_lines": missing,
+        "completion_percentage": round(completion, 1)
+    }
@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiofiles
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.database import SessionLocal, UploadSession
+from services.uploads import sniff_kind
+
+logger = logging.getLogger(__name__)
+
+# Parts live next to finished audio so finalize is a same-filesystem rename
+PARTS_DIR = os.path.join("uploads", "audio", ".parts")
+os.makedirs(PARTS_DIR, exist_ok=True)
+
+UPLOAD_CHUNK_MAX_BYTES = int(os.environ.get("UPLOAD_CHUNK_MAX_BYTES", str(64 * 1024 * 1024)))
+UPLOAD_SESSION_TTL_HOURS = float(os.environ.get("UPLOAD_SESSION_TTL_HOURS", "24"))
+UPLOAD_SWEEP_INTERVAL_SECONDS = float(os.environ.get("UPLOAD_SWEEP_INTERVAL_SECONDS", "3600"))
+
+# One writer per session; a client retrying a chunk must not interleave with itself
+_session_locks: Dict[str, asyncio.Lock] = {}
+
+
+def part_path(session_id: str) -> str:
+    return os.path.join(PARTS_DIR, f"{session_id}.part")
+
+
+def session_chunks(session: UploadSession) -> List[List]:
+    """Accepted chunks of a session as [offset, size, sha256]."""
+    return json.loads(session.chunks) if session.chunks else []
+
+
+def _truncate(path: str, size: int):
+    if os.path.exists(path):
+        os.truncate(path, size)
+
+
+async def append_chunk(
+    db: AsyncSession,
+    session_id: str,
+    offset: int,
+    body: AsyncIterator[bytes],
+    checksum: Optional[str] = None
+) -> UploadSession:
+    """
+    Append one chunk to a session's part file at offset.
+
+    Chunks must arrive in order: offset has to equal the bytes received so
+    far. Re-sending an already accepted chunk (same offset and checksum) is a
+    no-op, so a client that lost a response can simply retry. A chunk whose
+    SHA-256 doesn't match `checksum`, or that would overrun the declared
+    size, is discarded and the part file rolled back to offset.
+
+    Returns:
+        The session, committed with the chunk recorded
+    """
+    lock = _session_locks.setdefault(session_id, asyncio.Lock())
+    async with lock:
+        # Read state under the lock so a concurrent retry sees the committed offset
+        session = await db.get(UploadSession, session_id, populate_existing=True)
+        if session is None or session.status != "open":
+            raise HTTPException(status_code=404, detail="Upload session not found or already finalized")
+        received = session.received_bytes or 0
+        chunks = session_chunks(session)
+        if offset < received:
+            if checksum and any(c[0] == offset and c[2] == checksum for c in chunks):
+                return session
+            raise HTTPException(
+                status_code=409,
+                detail=f"Chunk at offset {offset} already received; resume from {received}"
+            )
+        if offset > received:
+            raise HTTPException(status_code=409, detail=f"Expected chunk at offset {received}")
+
+        path = part_path(session.id)
+        if offset and (not os.path.exists(path) or os.path.getsize(path) < offset):
+            raise HTTPException(status_code=410, detail="Received data is missing on the server; start a new upload")
+        # A process killed mid-chunk leaves bytes past the committed offset; drop them
+        # so the retry lands at offset rather than after them
+        _truncate(path, offset)
+        hasher = hashlib.sha256()
+        size = 0
+        try:
+            async with aiofiles.open(path, "ab") as out:
+                async for data in body:
+                    size += len(data)
+                    if size > UPLOAD_CHUNK_MAX_BYTES:
+                        raise HTTPException(
+                            status_code=413,
+                            detail=f"Chunk too large. Maximum is {UPLOAD_CHUNK_MAX_BYTES // (1024 * 1024)} MB"
+                        )
+                    if offset + size > session.total_size:
+                        raise HTTPException(status_code=413, detail="Chunk runs past the declared file size")
+                    hasher.update(data)
+                    await out.write(data)
+            digest = hasher.hexdigest()
+            if size == 0:
+                raise HTTPException(status_code=400, detail="Empty chunk")
+            if checksum and checksum.lower() != digest:
+                raise HTTPException(status_code=422, detail="Chunk checksum mismatch")
+        except BaseException:
+            _truncate(path, offset)
+            raise
+
+        chunks.append([offset, size, digest])
+        session.chunks = json.dumps(chunks)
+        session.received_bytes = offset + size
+        session.updated_at = datetime.utcnow()
+        await db.commit()
+        return session
+
+
+def complete_part(session: UploadSession, dest: str) -> str:
+    """
+    Move a fully received part file into place as dest, without copying it.
+
+    Returns:
+        Detected audio kind, from the file's leading bytes
+    """
+    path = part_path(session.id)
+    with open(path, "rb") as f:
+        kind = sniff_kind(f.read(16))
+    os.replace(path, dest)
+    _session_locks.pop(session.id, None)
+    return kind
+
+
+def discard_part(session_id: str):
+    _session_locks.pop(session_id, None)
+    path = part_path(session_id)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def sweep_stale_sessions(ttl_hours: float = UPLOAD_SESSION_TTL_HOURS) -> int:
+    """
+    Delete upload sessions untouched for ttl_hours and their part files,
+    plus any equally old part file no session refers to (e.g. after a
+    project delete).
+
+    Returns:
+        Number of sessions removed
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
+    db = SessionLocal()
+    try:
+        stale = db.query(UploadSession).filter(UploadSession.updated_at < cutoff).all()
+        for session in stale:
+            if session.status == "open":
+                discard_part(session.id)
+            db.delete(session)
+        db.commit()
+
+        live = {sid for (sid,) in db.query(UploadSession.id).filter(UploadSession.status == "open")}
+        for name in os.listdir(PARTS_DIR):
+            session_id, ext = os.path.splitext(name)
+            path = os.path.join(PARTS_DIR, name)
+            if (ext == ".part" and session_id not in live
+                    and datetime.utcfromtimestamp(os.path.getmtime(path)) < cutoff):
+                discard_part(session_id)
+        if stale:
+            logger.info("Swept %d stale upload sessions", len(stale))
+        return len(stale)
+    finally:
+        db.close()
+
+
+async def run_upload_sweeper(interval: float = UPLOAD_SWEEP_INTERVAL_SECONDS):
+    """Sweep stale upload sessions every interval seconds until cancelled."""
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, sweep_stale_sessions)
+        except Exception:
+            logger.warning("Upload sweep failed", exc_info=True)
+        await asyncio.sleep(interval)
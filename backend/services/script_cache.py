@@ -0,0 +1,53 @@
+import hashlib
+import json
+import os
+import zlib
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from models.database import ParsedScriptCacheEntry
+from services.keyed_cache import KeyedCache
+from services.script_parser import PARSER_VERSION
+
+# Size bounds for the cache table; least recently used entries are evicted first
+CACHE_MAX_ENTRIES = int(os.environ.get("SCRIPT_CACHE_MAX_ENTRIES", "500"))
+CACHE_MAX_BYTES = int(os.environ.get("SCRIPT_CACHE_MAX_BYTES", str(100 * 1024 * 1024)))
+
+script_cache = KeyedCache(ParsedScriptCacheEntry, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+
+# (line_number, text, color) as the script parsers return them
+ParsedLine = Tuple[int, str, str]
+
+
+def cache_key(content_hash: str, kind: str) -> str:
+    """Key a parse by script content, format and the parser version that produced it."""
+    raw = f"{content_hash}|{kind}|{PARSER_VERSION}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _pack(lines: List[ParsedLine]) -> bytes:
+    return zlib.compress(json.dumps(lines, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def _unpack(blob: bytes) -> List[ParsedLine]:
+    return [tuple(line) for line in json.loads(zlib.decompress(blob).decode("utf-8"))]
+
+
+def get_cached_lines(db: Session, key: str) -> Optional[List[ParsedLine]]:
+    """
+    Return the cached parse for a key, as the script parsers return it,
+    and mark the entry as recently used.
+    """
+    entry = script_cache.get(db, key)
+    return _unpack(entry.lines) if entry is not None else None
+
+
+def store_lines(db: Session, key: str, content_hash: str, kind: str, lines: List[ParsedLine]):
+    """Insert or refresh a cache entry, then evict down to the configured bounds."""
+    packed = _pack(lines)
+    script_cache.store(
+        db, key,
+        identity=dict(content_hash=content_hash, kind=kind, parser_version=PARSER_VERSION),
+        values=dict(lines=packed, line_count=len(lines), size_bytes=len(packed))
+    )
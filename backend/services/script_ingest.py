@@ -0,0 +1,191 @@
+import csv
+import hashlib
+import io
+import re
+import uuid
+from difflib import SequenceMatcher
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+from models.database import Artist, AudioFile, ScriptLine
+from services.transcript_index import normalize_text
+
+# (line_number, text, color) as the script parsers return them
+ParsedLine = Tuple[int, str, str]
+
+_DEFAULT_ARTIST_NAME = re.compile(r"Artist (\d+)")
+
+_LINE_COLUMNS = (
+    "id", "project_id", "artist_id", "line_number", "text", "artist_color", "status", "confidence", "content_hash"
+)
+
+
+def line_hash(text: str, color: str) -> str:
+    """Identity of a line across revisions: its normalized text and who reads it."""
+    return hashlib.sha256(f"{color.upper()}|{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+def _line_rows(project_id: str, parsed: Sequence[ParsedLine], color_to_artist: Dict[str, str]) -> List[Dict]:
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "project_id": project_id,
+            "artist_id": color_to_artist.get(color),
+            "line_number": line_num,
+            "text": text,
+            "artist_color": color,
+            "status": "pending",
+            "confidence": 0.0,
+            "content_hash": line_hash(text, color),
+        }
+        for line_num, text, color in parsed
+    ]
+
+
+def _insert_lines(db: Session, rows: List[Dict]):
+    if not rows:
+        return
+    if db.get_bind().dialect.name == "postgresql":
+        _copy_lines(db, rows)
+    else:
+        db.execute(insert(ScriptLine), rows)
+
+
+def _copy_lines(db: Session, rows: List[Dict]):
+    """Stream rows into script_lines with PostgreSQL COPY on the session's own connection."""
+    dbapi_connection = db.connection().connection
+    if db.get_bind().dialect.driver == "asyncpg":
+        # Request handlers reach here through AsyncSession.run_sync; await the driver directly
+        await_only(dbapi_connection.driver_connection.copy_records_to_table(
+            ScriptLine.__tablename__,
+            records=[tuple(row[c] for c in _LINE_COLUMNS) for row in rows],
+            columns=list(_LINE_COLUMNS)
+        ))
+        return
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(["" if row[c] is None else row[c] for c in _LINE_COLUMNS])
+    buffer.seek(0)
+    cursor = dbapi_connection.cursor()
+    try:
+        # Empty fields are NULL in CSV COPY; that's only wanted for artist_id
+        cursor.copy_expert(
+            f"COPY {ScriptLine.__tablename__} ({', '.join(_LINE_COLUMNS)}) FROM STDIN "
+            "WITH (FORMAT csv, FORCE_NOT_NULL (text, artist_color))",
+            buffer
+        )
+    finally:
+        cursor.close()
+
+
+def replace_script_lines(db: Session, project_id: str, parsed: Sequence[ParsedLine]) -> List[str]:
+    """
+    Replace a project's artists and lines with a freshly parsed script.
+
+    Old rows go in two DELETE statements, artists come back in one
+    executemany INSERT and lines in one more (COPY on PostgreSQL), all with
+    client-generated ids and inside the caller's transaction. Artists are
+    numbered in the order their colour first appears in the script.
+
+    Returns:
+        Colours found, in order of first appearance
+    """
+    db.flush()
+    db.execute(delete(ScriptLine).where(ScriptLine.project_id == project_id))
+    db.execute(delete(Artist).where(Artist.project_id == project_id))
+
+    colors = list(dict.fromkeys(color for _, _, color in parsed))
+    artist_rows = [
+        {"id": str(uuid.uuid4()), "project_id": project_id, "name": f"Artist {i + 1}", "color": color}
+        for i, color in enumerate(colors)
+    ]
+    color_to_artist = {row["color"]: row["id"] for row in artist_rows}
+    if artist_rows:
+        db.execute(insert(Artist), artist_rows)
+
+    _insert_lines(db, _line_rows(project_id, parsed, color_to_artist))
+
+    # Drop anything the session still holds for the replaced rows
+    db.expire_all()
+    return colors
+
+
+def revise_script_lines(db: Session, project_id: str, parsed: Sequence[ParsedLine]) -> Dict:
+    """
+    Apply a re-uploaded script to a project as a diff against its current lines.
+
+    Lines are compared by line_hash() with a sequence matcher. Unchanged
+    lines keep their id, status and match and are only renumbered; changed
+    and added lines are inserted as pending; removed lines are deleted.
+    Artists are carried over by colour, so renames survive; new colours get
+    new artists, and artists left with no lines and no audio are dropped.
+
+    Returns:
+        Dict with colors (in order of first appearance), kept, added,
+        removed, and added_line_ids (the lines that need matching)
+    """
+    db.flush()
+    old = db.query(
+        ScriptLine.id, ScriptLine.text, ScriptLine.artist_color, ScriptLine.content_hash
+    ).filter(ScriptLine.project_id == project_id).order_by(ScriptLine.line_number).all()
+    old_hashes = [row.content_hash or line_hash(row.text, row.artist_color) for row in old]
+    new_hashes = [line_hash(text, color) for _, text, color in parsed]
+
+    colors = list(dict.fromkeys(color for _, _, color in parsed))
+    artists = db.query(Artist.id, Artist.name, Artist.color).filter(Artist.project_id == project_id).all()
+    # An artist without a colour (e.g. from an older database) can never own parsed lines
+    color_to_artist = {a.color.upper(): a.id for a in artists if a.color}
+    # Number new artists after the highest default name, so none repeats an existing one
+    numbers = [int(m.group(1)) for m in (_DEFAULT_ARTIST_NAME.fullmatch(a.name or "") for a in artists) if m]
+    last_number = max(numbers, default=0)
+    new_artists = []
+    for color in colors:
+        if color.upper() not in color_to_artist:
+            artist_id = str(uuid.uuid4())
+            last_number += 1
+            new_artists.append({
+                "id": artist_id,
+                "project_id": project_id,
+                "name": f"Artist {last_number}",
+                "color": color,
+            })
+            color_to_artist[color.upper()] = artist_id
+    if new_artists:
+        db.execute(insert(Artist), new_artists)
+
+    kept, added, removed = [], [], []
+    matcher = SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                line_num, text, _ = parsed[j]
+                kept.append({"id": old[i].id, "line_number": line_num, "text": text, "content_hash": new_hashes[j]})
+        else:
+            removed.extend(old[i].id for i in range(i1, i2))
+            added.extend(parsed[j1:j2])
+
+    if removed:
+        db.execute(delete(ScriptLine).where(ScriptLine.id.in_(removed)))
+    if kept:
+        db.execute(update(ScriptLine), kept)
+    added_rows = _line_rows(project_id, added, {c: color_to_artist[c.upper()] for c in colors})
+    _insert_lines(db, added_rows)
+
+    used = {color_to_artist[c.upper()] for c in colors}
+    with_audio = {a for (a,) in db.query(AudioFile.artist_id).filter(AudioFile.project_id == project_id).distinct()}
+    unused = [a.id for a in artists if a.id not in used and a.id not in with_audio]
+    if unused:
+        db.execute(delete(Artist).where(Artist.id.in_(unused)))
+
+    db.expire_all()
+    return {
+        "colors": colors,
+        "kept": len(kept),
+        "added": len(added_rows),
+        "removed": len(removed),
+        "added_line_ids": [row["id"] for row in added_rows],
+    }
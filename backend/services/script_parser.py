@@ -1,30 +1,210 @@
-from docx import Document
-from docx.shared import RGBColor
-from typing import Dict, List, Tuple
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+import os
 import re
+import threading
+import xml.etree.ElementTree as ET
+import zipfile
 
 try:
     import pdfplumber
 except ImportError:
     pdfplumber = None
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-def rgb_to_hex(rgb: RGBColor) -> str:
-    """Convert RGBColor to hex string."""
-    if rgb is None:
-        return "#000000"
-    return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}".upper()
+# PDF pages are parsed in a process pool, PDF_PAGES_PER_TASK pages per task
+PDF_PARSE_WORKERS = max(1, int(os.environ.get("PDF_PARSE_WORKERS", str(min(4, os.cpu_count() or 1)))))
+PDF_PAGES_PER_TASK = max(1, int(os.environ.get("PDF_PAGES_PER_TASK", "10")))
 
+_pdf_executor: Optional[Executor] = None
+_pdf_executor_lock = threading.Lock()
 
-def get_run_color(run) -> str:
-    """Extract color from a run, checking both direct color and style."""
-    if run.font.color.rgb:
-        return rgb_to_hex(run.font.color.rgb)
-    
-    if run.font.color.theme_color:
-        return "#000000"
-    
-    return "#000000"
+# Bump when a change to the parsers changes their output, so cached parses are not reused
+PARSER_VERSION = "3"
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+
+DEFAULT_COLOR = "#000000"
+
+# w:themeColor -> clrScheme entry, with Word's default colour mapping for text/background
+_THEME_SLOTS = {
+    "dark1": "dk1", "light1": "lt1", "dark2": "dk2", "light2": "lt2",
+    "text1": "dk1", "background1": "lt1", "text2": "dk2", "background2": "lt2",
+    "accent1": "accent1", "accent2": "accent2", "accent3": "accent3",
+    "accent4": "accent4", "accent5": "accent5", "accent6": "accent6",
+    "hyperlink": "hlink", "followedHyperlink": "folHlink",
+}
+
+# Paragraph children whose runs belong to the paragraph's text
+_RUN_CONTAINERS = {_W + tag for tag in ("hyperlink", "ins", "smartTag", "sdt", "sdtContent", "fldSimple", "customXml")}
+
+# (paragraph text, [(run text, run colour)] for runs with visible text)
+DocxParagraph = Tuple[str, List[Tuple[str, str]]]
+
+
+def _apply_tint_shade(hex_color: str, tint: Optional[str], shade: Optional[str]) -> str:
+    channels = [int(hex_color[i:i + 2], 16) for i in (1, 3, 5)]
+    if tint:
+        t = int(tint, 16) / 255
+        channels = [round(255 - (255 - c) * t) for c in channels]
+    if shade:
+        s = int(shade, 16) / 255
+        channels = [round(c * s) for c in channels]
+    return "#" + "".join(f"{c:02X}" for c in channels)
+
+
+def _theme_colors(package: zipfile.ZipFile) -> Dict[str, str]:
+    """clrScheme slot (dk1, accent1, ...) -> hex from the document's theme, if it has one."""
+    names = sorted(n for n in package.namelist() if n.startswith("word/theme/") and n.endswith(".xml"))
+    if not names:
+        return {}
+    scheme = ET.fromstring(package.read(names[0])).find(f"{_A}themeElements/{_A}clrScheme")
+    colors = {}
+    for slot in scheme if scheme is not None else ():
+        srgb = slot.find(_A + "srgbClr")
+        sys_clr = slot.find(_A + "sysClr")
+        value = srgb.get("val") if srgb is not None else sys_clr.get("lastClr") if sys_clr is not None else None
+        if value:
+            colors[slot.tag[len(_A):]] = "#" + value.upper()
+    return colors
+
+
+class DocxColors:
+    """
+    Resolves the colour a run is displayed in: its own w:color, then its
+    character style, then its paragraph style (each following basedOn), then
+    the document defaults. Theme colours are looked up in the document's theme
+    with tint and shade applied; "auto" and unset colours are black.
+    """
+
+    def __init__(self, package: zipfile.ZipFile):
+        self.theme = _theme_colors(package)
+        self.style_colors: Dict[str, Optional[str]] = {}
+        self.based_on: Dict[str, str] = {}
+        self.default_paragraph_style: Optional[str] = None
+        self.default_color: Optional[str] = None
+        self._resolved: Dict[str, Optional[str]] = {}
+
+        if "word/styles.xml" not in package.namelist():
+            return
+        styles = ET.fromstring(package.read("word/styles.xml"))
+        self.default_color = self.color_of(styles.find(f"{_W}docDefaults/{_W}rPrDefault/{_W}rPr"))
+        for style in styles.iter(_W + "style"):
+            style_id = style.get(_W + "styleId")
+            if not style_id:
+                continue
+            if style.get(_W + "type") == "paragraph" and style.get(_W + "default") in ("1", "true", "on"):
+                self.default_paragraph_style = style_id
+            based_on = style.find(_W + "basedOn")
+            if based_on is not None:
+                self.based_on[style_id] = based_on.get(_W + "val")
+            self.style_colors[style_id] = self.color_of(style.find(_W + "rPr"))
+
+    def color_of(self, rpr: Optional[ET.Element]) -> Optional[str]:
+        """Hex colour set directly in a run-properties element, or None."""
+        color = rpr.find(_W + "color") if rpr is not None else None
+        if color is None:
+            return None
+        theme_color = color.get(_W + "themeColor")
+        if theme_color and _THEME_SLOTS.get(theme_color) in self.theme:
+            return _apply_tint_shade(
+                self.theme[_THEME_SLOTS[theme_color]], color.get(_W + "themeTint"), color.get(_W + "themeShade")
+            )
+        value = color.get(_W + "val")
+        if not value or value == "auto":
+            return DEFAULT_COLOR
+        return "#" + value.upper()
+
+    def style_color(self, style_id: Optional[str]) -> Optional[str]:
+        """Colour a style sets, directly or through the styles it is based on."""
+        if style_id is None:
+            return None
+        if style_id not in self._resolved:
+            color, seen, current = None, set(), style_id
+            while current and current not in seen and color is None:
+                seen.add(current)
+                color = self.style_colors.get(current)
+                current = self.based_on.get(current)
+            self._resolved[style_id] = color
+        return self._resolved[style_id]
+
+    def run_color(self, rpr: Optional[ET.Element], paragraph_style: Optional[str]) -> str:
+        r_style = rpr.find(_W + "rStyle") if rpr is not None else None
+        return (
+            self.color_of(rpr)
+            or self.style_color(r_style.get(_W + "val") if r_style is not None else None)
+            or self.style_color(paragraph_style or self.default_paragraph_style)
+            or self.default_color
+            or DEFAULT_COLOR
+        )
+
+
+def _run_text(run: ET.Element) -> str:
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _W + "t":
+            parts.append(child.text or "")
+        elif tag in (_W + "tab", _W + "ptab"):
+            parts.append("\t")
+        elif tag == _W + "cr" or (tag == _W + "br" and child.get(_W + "type") in (None, "textWrapping")):
+            parts.append("\n")
+        elif tag == _W + "noBreakHyphen":
+            parts.append("-")
+    return "".join(parts)
+
+
+def _paragraph_runs(container: ET.Element) -> Iterator[ET.Element]:
+    for child in container:
+        if child.tag == _W + "r":
+            yield child
+        elif child.tag in _RUN_CONTAINERS:
+            yield from _paragraph_runs(child)
+
+
+def _read_paragraph(p: ET.Element, colors: DocxColors) -> DocxParagraph:
+    p_style = p.find(f"{_W}pPr/{_W}pStyle")
+    paragraph_style = p_style.get(_W + "val") if p_style is not None else None
+    texts, runs = [], []
+    for run in _paragraph_runs(p):
+        text = _run_text(run)
+        texts.append(text)
+        if text.strip():
+            runs.append((text, colors.run_color(run.find(_W + "rPr"), paragraph_style)))
+    return "".join(texts), runs
+
+
+def iter_docx_paragraphs(filepath: str) -> Iterator[DocxParagraph]:
+    """
+    Stream the body paragraphs of a DOCX file with their coloured runs.
+
+    word/document.xml is read with iterparse and each paragraph is dropped
+    from the tree once read, so memory stays flat however long the script is.
+    Only top-level body paragraphs are read (not tables, headers or text boxes).
+    """
+    with zipfile.ZipFile(filepath) as package:
+        colors = DocxColors(package)
+        with package.open("word/document.xml") as stream:
+            depth = 0
+            body = None
+            for event, elem in ET.iterparse(stream, events=("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 2 and elem.tag == _W + "body":
+                        body = elem
+                    continue
+                depth -= 1
+                if depth == 2 and body is not None:
+                    if elem.tag == _W + "p":
+                        yield _read_paragraph(elem, colors)
+                    body.remove(elem)
 
 
 def parse_docx_script(filepath: str) -> Dict[str, List[Tuple[int, str]]]:
@@ -34,88 +214,74 @@ def parse_docx_script(filepath: str) -> Dict[str, List[Tuple[int, str]]]:
     Returns:
         Dict mapping color hex codes to list of (line_number, text) tuples
     """
-    doc = Document(filepath)
     lines_by_color: Dict[str, List[Tuple[int, str]]] = {}
     line_number = 0
     
-    for para in doc.paragraphs:
-        if not para.text.strip():
+    for para_text, runs in iter_docx_paragraphs(filepath):
+        if not para_text.strip():
             continue
             
         line_number += 1
         current_color = None
         current_text = []
         
-        for run in para.runs:
-            if not run.text.strip():
-                continue
-                
-            color = get_run_color(run)
-            
+        for run_text, color in runs:
             if current_color is None:
                 current_color = color
             
             if color == current_color:
-                current_text.append(run.text)
+                current_text.append(run_text)
             else:
                 if current_text and current_color:
                     text = "".join(current_text).strip()
                     if text:
-                        if current_color not in lines_by_color:
-                            lines_by_color[current_color] = []
-                        lines_by_color[current_color].append((line_number, text))
+                        lines_by_color.setdefault(current_color, []).append((line_number, text))
                 
                 current_color = color
-                current_text = [run.text]
+                current_text = [run_text]
         
         if current_text and current_color:
             text = "".join(current_text).strip()
             if text:
-                if current_color not in lines_by_color:
-                    lines_by_color[current_color] = []
-                lines_by_color[current_color].append((line_number, text))
+                lines_by_color.setdefault(current_color, []).append((line_number, text))
     
     return lines_by_color
 
 
-def parse_docx_with_all_lines(filepath: str) -> List[Tuple[int, str, str]]:
+def iter_docx_lines(filepath: str) -> Iterator[Tuple[int, str, str]]:
     """
-    Parse a DOCX file and return all lines with their colors.
-    
-    Returns:
-        List of (line_number, text, color_hex) tuples in order
+    Lazily yield (line_number, text, color_hex) for each non-empty paragraph.
+
+    A line's colour is that of its longest run with visible text.
     """
-    doc = Document(filepath)
-    all_lines: List[Tuple[int, str, str]] = []
     line_number = 0
-    
-    for para in doc.paragraphs:
-        text = para.text.strip()
+    for para_text, runs in iter_docx_paragraphs(filepath):
+        text = para_text.strip()
         if not text:
             continue
-            
         line_number += 1
-        
-        dominant_color = "#000000"
+        dominant_color = DEFAULT_COLOR
         max_length = 0
-        
-        for run in para.runs:
-            if run.text.strip():
-                color = get_run_color(run)
-                if len(run.text) > max_length:
-                    max_length = len(run.text)
-                    dominant_color = color
-        
-        all_lines.append((line_number, text, dominant_color))
+        for run_text, color in runs:
+            if len(run_text) > max_length:
+                max_length = len(run_text)
+                dominant_color = color
+        yield line_number, text, dominant_color
+
+
+def parse_docx_with_all_lines(filepath: str) -> List[Tuple[int, str, str]]:
+    """
+    Parse a DOCX file and return all lines with their colors.
     
-    return all_lines
+    Returns:
+        List of (line_number, text, color_hex) tuples in order
+    """
+    return list(iter_docx_lines(filepath))
 
 
 def get_unique_colors(filepath: str) -> List[str]:
     """Get list of unique colors found in the document."""
-    lines = parse_docx_with_all_lines(filepath)
-    colors = list(set(color for _, _, color in lines))
-    return sorted(colors)
+    return sorted({color for _, _, color in iter_docx_lines(filepath)})
 
 
 def _pdf_char_color_to_hex(char: dict) -> str:
@@ -134,53 +300,138 @@ def _pdf_char_color_to_hex(char: dict) -> str:
     return f"#{r:02x}{g:02x}{b:02x}".upper()
 
 
-def parse_pdf_with_all_lines(filepath: str) -> List[Tuple[int, str, str]]:
+def _pdf_page_lines(page) -> List[Tuple[str, str]]:
     """
-    Parse a PDF and return lines with (line_number, text, color_hex).
-    Groups by vertical position (line); uses character fill color when available.
+    (text, color_hex) for each visual line of a page.
+
+    Chars are bucketed by top rounded to 3px and ordered by (bucket, x0, x1)
+    with one lexsort; each line's colour is the one covering the most text,
+    summed with a single bincount over (line, colour) pairs.
     """
+    chars = page.chars
+    if not chars:
+        # Fallback: extract text by line
+        text = page.extract_text() or ""
+        return [(line.strip(), "#000000") for line in text.splitlines() if line.strip()]
+
+    n = len(chars)
+    top = np.fromiter((c.get("top", 0) for c in chars), dtype=np.float64, count=n)
+    x0 = np.fromiter((c.get("x0", 0) for c in chars), dtype=np.float64, count=n)
+    x1 = np.fromiter((c.get("x1", 0) for c in chars), dtype=np.float64, count=n)
+    texts = [c.get("text") or "" for c in chars]
+    lengths = np.fromiter((len(t) for t in texts), dtype=np.float64, count=n)
+    palette: Dict[str, int] = {}
+    color_ids = np.fromiter(
+        (palette.setdefault(_pdf_char_color_to_hex(c), len(palette)) for c in chars), dtype=np.int64, count=n
+    )
+
+    bucket = np.round(top / 3) * 3
+    order = np.lexsort((x1, x0, bucket))
+    bucket = bucket[order]
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(bucket)) + 1))
+    line_ids = np.zeros(n, dtype=np.int64)
+    line_ids[starts[1:]] = 1
+    line_ids = np.cumsum(line_ids)
+
+    weights = np.bincount(
+        line_ids * len(palette) + color_ids[order], weights=lengths[order], minlength=len(starts) * len(palette)
+    ).reshape(len(starts), len(palette))
+    dominant = weights.argmax(axis=1)
+    colors = list(palette)
+
+    ordered_text = [texts[i] for i in order]
+    bounds = list(starts) + [n]
+    lines = []
+    for k in range(len(starts)):
+        text = "".join(ordered_text[bounds[k]:bounds[k + 1]]).strip()
+        if text:
+            lines.append((text, colors[dominant[k]]))
+    return lines
+
+
+def _parse_pdf_pages(filepath: str, first: int, last: int) -> List[Tuple[str, str]]:
+    """Lines of pages [first, last), releasing each page's chars once it's read."""
+    lines: List[Tuple[str, str]] = []
+    with pdfplumber.open(filepath, pages=list(range(first + 1, last + 1))) as pdf:
+        for page in pdf.pages:
+            lines.extend(_pdf_page_lines(page))
+            page.close()
+    return lines
+
+
+def _check_pdf_support():
     if pdfplumber is None:
         raise ImportError("pdfplumber is required for PDF uploads. pip install pdfplumber")
-    all_lines: List[Tuple[int, str, str]] = []
-    line_number = 0
+    if np is None:
+        raise ImportError("numpy is required for PDF uploads. pip install numpy")
+
+
+def get_pdf_executor() -> Executor:
+    """Return the shared PDF parsing pool, creating it on first use."""
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is None:
+            _pdf_executor = ProcessPoolExecutor(max_workers=PDF_PARSE_WORKERS)
+        return _pdf_executor
+
+
+def shutdown_pdf_executor(wait: bool = False):
+    global _pdf_executor
+    with _pdf_executor_lock:
+        if _pdf_executor is not None:
+            _pdf_executor.shutdown(wait=wait, cancel_futures=True)
+            _pdf_executor = None
+
+
+def iter_pdf_lines(filepath: str, workers: Optional[int] = None) -> Iterator[Tuple[int, str, str]]:
+    """
+    Lazily yield (line_number, text, color_hex) for a PDF, numbered across pages.
+
+    Runs of PDF_PAGES_PER_TASK pages are parsed in the shared process pool
+    and yielded in page order as they finish, with at most two runs per
+    worker in flight so a long PDF's chars are never all held at once.
+    Small PDFs, and workers=1, are parsed in this process.
+    """
+    _check_pdf_support()
+    workers = PDF_PARSE_WORKERS if workers is None else max(1, workers)
     with pdfplumber.open(filepath) as pdf:
-        for page in pdf.pages:
-            chars = page.chars
-            if not chars:
-                # Fallback: extract text by line
-                text = page.extract_text()
-                if text:
-                    for raw_line in text.splitlines():
-                        line_text = raw_line.strip()
-                        if line_text:
-                            line_number += 1
-                            all_lines.append((line_number, line_text, "#000000"))
-                continue
-            # Group chars by approximate line (top within 3px)
-            lines_by_top: Dict[float, List[dict]] = {}
-            for c in chars:
-                top = round(c.get("top", 0) / 3) * 3
-                if top not in lines_by_top:
-                    lines_by_top[top] = []
-                lines_by_top[top].append(c)
-            for top in sorted(lines_by_top.keys()):
-                line_chars = lines_by_top[top]
-                line_chars.sort(key=lambda x: (x.get("x0", 0), x.get("x1", 0)))
-                # Build text and dominant color for the line
-                parts = []
-                color_counts: Dict[str, int] = {}
-                for c in line_chars:
-                    t = c.get("text") or ""
-                    parts.append(t)
-                    hex_color = _pdf_char_color_to_hex(c)
-                    color_counts[hex_color] = color_counts.get(hex_color, 0) + len(t)
-                text = "".join(parts).strip()
-                if not text:
-                    continue
-                line_number += 1
-                dominant_color = max(color_counts, key=color_counts.get) if color_counts else "#000000"
-                all_lines.append((line_number, text, dominant_color))
-    return all_lines
+        page_count = len(pdf.pages)
+    ranges = [(i, min(i + PDF_PAGES_PER_TASK, page_count)) for i in range(0, page_count, PDF_PAGES_PER_TASK)]
+
+    line_number = 0
+    if workers == 1 or len(ranges) <= 1:
+        results = (_parse_pdf_pages(filepath, first, last) for first, last in ranges)
+    else:
+        results = _pooled_pdf_ranges(filepath, ranges, workers * 2)
+    for lines in results:
+        for text, color in lines:
+            line_number += 1
+            yield line_number, text, color
+
+
+def _pooled_pdf_ranges(filepath: str, ranges: List[Tuple[int, int]], window: int) -> Iterator[List[Tuple[str, str]]]:
+    executor = get_pdf_executor()
+    pending: Deque[Future] = deque()
+    remaining = iter(ranges)
+    try:
+        for first, last in islice(remaining, window):
+            pending.append(executor.submit(_parse_pdf_pages, filepath, first, last))
+        while pending:
+            lines = pending.popleft().result()
+            for first, last in islice(remaining, 1):
+                pending.append(executor.submit(_parse_pdf_pages, filepath, first, last))
+            yield lines
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def parse_pdf_with_all_lines(filepath: str) -> List[Tuple[int, str, str]]:
+    """
+    Parse a PDF and return lines with (line_number, text, color_hex).
+    Groups by vertical position (line); uses character fill color when available.
+    """
+    return list(iter_pdf_lines(filepath))
 
 
 def extract_character_names(text: str) -> Tuple[str, str]:
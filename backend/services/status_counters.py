@@ -0,0 +1,209 @@
+"""
+Materialized line-status counters per artist and per project.
+
+Every change to ScriptLine.status must be made with set_line_statuses() and
+passed to apply_status_changes() (or followed by rebuild_counters() after
+bulk rewrites) in the same transaction, so summary reads never have to count
+lines. Repair with:
+
+    python -m services.status_counters --check
+    python -m services.status_counters --rebuild [PROJECT_ID ...]
+"""
+import argparse
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from models.database import SessionLocal, Project, ScriptLine, StatusCounter
+from services.qc_stats import StatusCounts, line_status_counts, merge_counts
+
+PROJECT_SCOPE = ""   # artist_id of the whole-project row
+STATUSES = ("pending", "found", "partial", "missing")
+_ID_BATCH = 500      # line ids per IN (...) when reading old statuses
+
+# (artist_id, old status or None for a new line, new status or None for a deleted line)
+StatusChange = Tuple[Optional[str], Optional[str], Optional[str]]
+
+
+def counter_counts(row: StatusCounter) -> StatusCounts:
+    """Non-zero status counts of one counter row."""
+    return {status: getattr(row, status) or 0 for status in STATUSES if getattr(row, status)}
+
+
+def set_line_statuses(db: Session, project_id: str, values: Dict[str, dict]) -> List[StatusChange]:
+    """
+    Write new statuses, and any other columns, to a batch of a project's lines
+    in a few statements. Caller commits.
+
+    Args:
+        values: Columns to set per line id, each including "status"
+
+    The project's counter row is locked first, so status writers for one
+    project take turns: the old statuses read under that lock are the ones
+    this write replaces, and two jobs moving the same line never both count
+    its old status. Lines deleted in the meantime are skipped.
+
+    Returns:
+        The status changes to pass to apply_status_changes()
+    """
+    if not values:
+        return []
+    # A no-op write: a row lock on PostgreSQL, the write lock on SQLite
+    db.query(StatusCounter).filter(
+        StatusCounter.project_id == project_id,
+        StatusCounter.artist_id == PROJECT_SCOPE
+    ).update({StatusCounter.pending: StatusCounter.pending}, synchronize_session=False)
+
+    ids = list(values)
+    old: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+    for start in range(0, len(ids), _ID_BATCH):
+        rows = db.query(ScriptLine.id, ScriptLine.artist_id, ScriptLine.status).filter(
+            ScriptLine.id.in_(ids[start:start + _ID_BATCH])
+        )
+        old.update((row.id, (row.artist_id, row.status)) for row in rows)
+    if not old:
+        return []
+
+    db.execute(
+        update(ScriptLine).execution_options(synchronize_session=False),
+        [{"id": line_id, **values[line_id]} for line_id in old]
+    )
+    return [(artist_id, status, values[line_id]["status"]) for line_id, (artist_id, status) in old.items()]
+
+
+def rebuild_counters(db: Session, project_id: str):
+    """Recount a project's lines from scratch and replace its counter rows. Caller commits."""
+    db.flush()
+    db.query(StatusCounter).filter(StatusCounter.project_id == project_id).delete()
+    counts = line_status_counts(db, project_id)
+    scopes = {PROJECT_SCOPE: merge_counts(*counts.values())}
+    for artist_id, artist_counts in counts.items():
+        if artist_id is not None:
+            scopes[artist_id] = artist_counts
+    for artist_id, c in scopes.items():
+        db.add(StatusCounter(
+            project_id=project_id,
+            artist_id=artist_id,
+            **{status: c.get(status, 0) for status in STATUSES}
+        ))
+    db.flush()
+
+
+def apply_status_changes(db: Session, project_id: str, changes: Iterable[StatusChange]):
+    """
+    Move counters for a set of line status changes. Caller commits.
+
+    Deltas are applied as SQL increments, so concurrent jobs updating the
+    same project don't overwrite each other's counts. Old statuses must be
+    the ones set_line_statuses() replaced, not ones read earlier.
+    """
+    deltas: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+    for artist_id, old, new in changes:
+        if old == new:
+            continue
+        for scope in (PROJECT_SCOPE, artist_id) if artist_id else (PROJECT_SCOPE,):
+            if old in STATUSES:
+                deltas[scope][old] -= 1
+            if new in STATUSES:
+                deltas[scope][new] += 1
+    if not deltas:
+        return
+
+    for scope, delta in deltas.items():
+        values = {getattr(StatusCounter, status): getattr(StatusCounter, status) + n
+                  for status, n in delta.items() if n}
+        if not values:
+            continue
+        updated = db.query(StatusCounter).filter(
+            StatusCounter.project_id == project_id,
+            StatusCounter.artist_id == scope
+        ).update(values, synchronize_session=False)
+        if not updated:
+            # Counters were never materialized for this project; count once instead
+            rebuild_counters(db, project_id)
+            return
+
+
+def read_counters(db: Session, project_id: str) -> Dict[Optional[str], StatusCounts]:
+    """
+    A project's counters in the shape of qc_stats.line_status_counts(), with
+    the whole-project totals under PROJECT_SCOPE. Read-only: a project with no
+    counter rows reads as empty (all zeros).
+    """
+    rows = db.query(StatusCounter).filter(StatusCounter.project_id == project_id).all()
+    return {row.artist_id: counter_counts(row) for row in rows}
+
+
+def build_missing_counters() -> int:
+    """
+    Build counters for projects that have lines but no counter rows, i.e.
+    ones created before the counters table. Run once at startup.
+
+    Returns:
+        Number of projects built
+    """
+    db = SessionLocal()
+    try:
+        has_counters = db.query(StatusCounter.project_id).filter(StatusCounter.project_id == Project.id).exists()
+        has_lines = db.query(ScriptLine.id).filter(ScriptLine.project_id == Project.id).exists()
+        project_ids = [pid for (pid,) in db.query(Project.id).filter(has_lines, ~has_counters)]
+        for project_id in project_ids:
+            rebuild_counters(db, project_id)
+            db.commit()
+        return len(project_ids)
+    finally:
+        db.close()
+
+
+def check_counters(db: Session, project_id: str) -> List[str]:
+    """Differences between a project's counters and a fresh count, as readable lines."""
+    stored = {
+        row.artist_id: counter_counts(row)
+        for row in db.query(StatusCounter).filter(StatusCounter.project_id == project_id)
+    }
+    counts = line_status_counts(db, project_id)
+    actual = {PROJECT_SCOPE: merge_counts(*counts.values())}
+    actual.update({a: c for a, c in counts.items() if a is not None})
+
+    problems = []
+    for scope in sorted(set(stored) | set(actual)):
+        have = {s: n for s, n in stored.get(scope, {}).items() if n}
+        want = {s: n for s, n in actual.get(scope, {}).items() if s in STATUSES and n}
+        if have != want:
+            label = "project" if scope == PROJECT_SCOPE else f"artist {scope}"
+            problems.append(f"{project_id} {label}: stored {have}, actual {want}")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check or rebuild line status counters.")
+    action = parser.add_mutually_exclusive_group(required=True)
+    action.add_argument("--check", action="store_true", help="report counters that disagree with the lines")
+    action.add_argument("--rebuild", action="store_true", help="recount and rewrite counters")
+    parser.add_argument("project_ids", nargs="*", help="limit to these projects (default: all)")
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        project_ids = args.project_ids or [pid for (pid,) in db.query(Project.id)]
+        problems = 0
+        for project_id in project_ids:
+            if args.rebuild:
+                rebuild_counters(db, project_id)
+                db.commit()
+                print(f"Rebuilt {project_id}")
+            else:
+                for problem in check_counters(db, project_id):
+                    problems += 1
+                    print(problem)
+        if args.check:
+            print(f"{problems} inconsistent counter(s) in {len(project_ids)} project(s)")
+        return 1 if problems else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,71 +1,85 @@
 import os
-from typing import Optional
-from openai import OpenAI
-
-_whisper_model = None
-
-
-def transcribe_with_api(filepath: str, api_key: str) -> str:
-    """Transcribe audio using OpenAI Whisper API."""
-    client = OpenAI(api_key=api_key)
-    
-    with open(filepath, "rb") as audio_file:
-        transcript = client.audio.transcriptions.create(
-            model="whisper-1",
-            file=audio_file,
-            response_format="text"
-        )
-    
-    return transcript
-
-
-def transcribe_with_local(filepath: str, model_size: str = "tiny") -> str:
-    """Transcribe audio using local Whisper model."""
-    global _whisper_model
-
-    try:
-        import numpy  # noqa: F401 - required by whisper/torch
-    except ImportError:
-        raise ImportError(
-            "Numpy is not available. Install with: pip install numpy\n"
-            "Then restart the backend."
-        )
-    try:
-        import whisper
-    except ImportError:
-        raise ImportError(
-            "Local Whisper not installed. Install with: pip install openai-whisper\n"
-            "Or use API mode instead."
-        )
-    
-    if _whisper_model is None:
-        _whisper_model = whisper.load_model(model_size)
-    
-    result = _whisper_model.transcribe(filepath)
-    return result["text"]
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from services.audio_cache import SAMPLE_RATE
+from services.chunking import CHUNK_SECONDS, ffmpeg_available, probe_duration, transcribe_chunked
+from services.engines import DEFAULT_LOCAL_ENGINE, TranscriptionEngine, get_engine
+
+API_ENGINE = "openai-api"
+
+
+def resolve_engine(mode: str, engine: Optional[str] = None) -> TranscriptionEngine:
+    """
+    The engine a transcription runs on: the named engine if given, otherwise
+    OpenAI in API mode and TRANSCRIPTION_ENGINE in local mode.
+    """
+    if engine:
+        return get_engine(engine)
+    return get_engine(API_ENGINE if mode == "api" else DEFAULT_LOCAL_ENGINE)
+
+
+def describe_engine(mode: str, engine: Optional[str] = None, model: Optional[str] = None) -> Tuple[str, str]:
+    """Return (engine, model) identifying what a transcription call would run."""
+    selected = resolve_engine(mode, engine)
+    return selected.name, model or selected.default_model
+
+
+def _should_chunk(filepath: str, engine: TranscriptionEngine, duration: Optional[float]) -> bool:
+    if duration is not None and duration > CHUNK_SECONDS * 1.25:
+        return True
+    return engine.max_upload_bytes is not None and os.path.getsize(filepath) > engine.max_upload_bytes
 
 
 def transcribe_audio(
     filepath: str,
     mode: str = "api",
     api_key: Optional[str] = None,
-    model_size: str = "base"
-) -> str:
+    model_size: Optional[str] = None,
+    chunked: Optional[bool] = None,
+    engine: Optional[str] = None,
+    pcm: Optional[np.ndarray] = None
+) -> Dict:
     """
     Transcribe audio file using specified mode.
-    
+
+    Long takes, and files over the engine's upload limit, are split into
+    overlapping chunks that are transcribed in parallel and stitched back
+    together.
+
     Args:
         filepath: Path to audio file
-        mode: "api" for OpenAI API, "local" for local Whisper
+        mode: "api" for OpenAI API, "local" for a local engine
         api_key: OpenAI API key (required for API mode)
-        model_size: Whisper model size for local mode (tiny, base, small, medium, large)
-    
+        model_size: Model for the engine (for Whisper: tiny, base, small, medium,
+            large); defaults to the engine's default model
+        chunked: Force chunking on or off; decided from duration and size if None
+        engine: Registered engine name, overriding the one mode selects
+        pcm: The file already decoded to 16 kHz mono float32 (see
+            services.audio_cache); engines that accept PCM read it instead of
+            decoding the file, and chunks are cut from it
+
     Returns:
-        Transcribed text
+        Dict with "text" and "segments", a list of dicts with start and end
+        (seconds), text and avg_logprob
     """
-    if mode == "api":
-        if not api_key:
-            raise ValueError("OpenAI API key required for API mode")
-        return transcribe_with_api(filepath, api_key)
-    else:
-        return transcribe_with_local(filepath, model_size)
+    selected = resolve_engine(mode, engine)
+    if selected.needs_api_key and not api_key:
+        raise ValueError("OpenAI API key required for API mode")
+    transcribe_one = lambda audio: selected.transcribe(audio, model_size, api_key)
+    use_pcm = pcm is not None and selected.accepts_pcm
+
+    duration = len(pcm) / SAMPLE_RATE if pcm is not None else None
+    if chunked is None:
+        if duration is not None:
+            chunked = _should_chunk(filepath, selected, duration)
+        elif ffmpeg_available():
+            duration = probe_duration(filepath)
+            chunked = _should_chunk(filepath, selected, duration)
+        else:
+            chunked = False
+
+    if chunked:
+        return transcribe_chunked(filepath, transcribe_one, duration, pcm=pcm, pcm_chunks=use_pcm)
+    return transcribe_one(pcm if use_pcm else filepath)
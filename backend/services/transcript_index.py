@@ -0,0 +1,319 @@
+import json
+import re
+import threading
+from bisect import bisect_right
+from collections import OrderedDict, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_SPACE_RE = re.compile(r'\s+')
+_WORD_RE = re.compile(r'\S+')
+
+# Bump when normalization or the persisted layout changes so indexes are rebuilt
+INDEX_VERSION = 3
+_CACHE_SIZE = 32
+
+NGRAM = 3            # word n-gram size for the primary inverted index
+SHINGLE = 3          # char shingle size for the fallback index
+MAX_POSTINGS = 500   # n-grams more frequent than this carry no position signal
+
+_cache: "OrderedDict[str, TranscriptIndex]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text for comparison."""
+    text = text.lower().strip()
+    text = _PUNCT_RE.sub('', text)
+    text = _SPACE_RE.sub(' ', text)
+    return text
+
+
+def _raw_tokens(text: str, base: int = 0) -> Tuple[List[str], List[Tuple[int, int]]]:
+    """
+    Normalized tokens of text and the (start, end) char span of each in text,
+    shifted by base. The tokens are the same as normalize_text(text).split().
+    """
+    tokens, spans = [], []
+    for m in _WORD_RE.finditer(text):
+        token = _PUNCT_RE.sub('', m.group().lower())
+        if token:
+            tokens.append(token)
+            spans.append((base + m.start(), base + m.end()))
+    return tokens, spans
+
+
+class TranscriptIndex:
+    """
+    A transcription normalized once for matching.
+
+    Holds the normalized text, its tokens and the char offset of each token in
+    that text, so matcher functions never re-normalize or re-split the transcript.
+    Word n-gram and char-shingle inverted indexes are built lazily on first
+    candidate lookup and live as long as the (cached) index does.
+    When built from timestamped segments it also maps tokens back to time, and
+    when built from raw text it maps them back to that text for reporting.
+    """
+
+    def __init__(
+        self,
+        tokens: List[str],
+        offsets: Optional[List[int]] = None,
+        segment_starts: Optional[List[int]] = None,
+        segment_times: Optional[List[Tuple[float, float]]] = None,
+        raw: Optional[str] = None,
+        raw_spans: Optional[List[Tuple[int, int]]] = None
+    ):
+        self.tokens = tokens
+        self.text = " ".join(tokens)
+        self._ngrams: Optional[Dict[Tuple[str, ...], List[int]]] = None
+        self._shingles: Optional[Dict[str, List[int]]] = None
+        if offsets is None:
+            offsets = []
+            pos = 0
+            for tok in tokens:
+                offsets.append(pos)
+                pos += len(tok) + 1
+        self.offsets = offsets
+        # Token index where each segment begins, and its (start, end) in seconds
+        self.segment_starts = segment_starts or []
+        self.segment_times = [tuple(t) for t in (segment_times or [])]
+        # The transcript as transcribed, and each token's (start, end) char span in it
+        self.raw = raw
+        self.raw_spans = [tuple(span) for span in raw_spans] if raw is not None and raw_spans is not None else None
+
+    @classmethod
+    def build(cls, transcription: str, segments: Optional[Sequence[Dict]] = None) -> "TranscriptIndex":
+        """
+        Index a transcription. With segments (dicts with start, end and raw
+        "text" or normalized "tokens"), tokens are taken segment by segment
+        so positions can be mapped to timecodes. Matched spans can be mapped
+        back to raw text unless a segment only has tokens.
+        """
+        if not segments:
+            tokens, spans = _raw_tokens(transcription or "")
+            return cls(tokens, raw=transcription or "", raw_spans=spans)
+        tokens: List[str] = []
+        starts, times = [], []
+        raw_parts: Optional[List[str]] = []
+        raw_spans: List[Tuple[int, int]] = []
+        raw_len = 0
+        for seg in segments:
+            if seg.get("text") is not None:
+                # Whisper segment text usually carries its own leading space
+                text = seg["text"] if not raw_len or seg["text"][:1].isspace() else " " + seg["text"]
+                seg_tokens, seg_spans = _raw_tokens(text, raw_len)
+                if raw_parts is not None:
+                    raw_parts.append(text)
+                    raw_spans.extend(seg_spans)
+                    raw_len += len(text)
+            else:
+                seg_tokens = seg["tokens"].split()
+                raw_parts = None
+            if not seg_tokens:
+                continue
+            starts.append(len(tokens))
+            times.append((seg["start"], seg["end"]))
+            tokens.extend(seg_tokens)
+        raw = "".join(raw_parts) if raw_parts is not None else None
+        return cls(tokens, segment_starts=starts, segment_times=times, raw=raw, raw_spans=raw_spans)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def span_text(self, start: int, end: int) -> str:
+        """Normalized text of tokens[start:end], sliced without re-joining."""
+        if end <= start:
+            return ""
+        return self.text[self.offsets[start]:self.offsets[end - 1] + len(self.tokens[end - 1])]
+
+    def raw_span_text(self, start: int, end: int) -> str:
+        """
+        tokens[start:end] as they appear in the raw transcript, with its case
+        and punctuation; the normalized text when the index has no raw text.
+        """
+        if end <= start:
+            return ""
+        if self.raw_spans is None:
+            return self.span_text(start, end)
+        return self.raw[self.raw_spans[start][0]:self.raw_spans[end - 1][1]]
+
+    def token_at(self, char_pos: int) -> int:
+        """Token index containing a char offset of the normalized text."""
+        return max(0, bisect_right(self.offsets, char_pos) - 1)
+
+    def time_span(self, start: int, end: int) -> Tuple[Optional[float], Optional[float]]:
+        """
+        (start, end) seconds of the segments covering tokens[start:end], or
+        (None, None) when the index has no segment timings.
+        """
+        if not self.segment_starts or end <= start:
+            return None, None
+        first = max(0, bisect_right(self.segment_starts, start) - 1)
+        last = max(0, bisect_right(self.segment_starts, end - 1) - 1)
+        return self.segment_times[first][0], self.segment_times[last][1]
+
+    @property
+    def ngrams(self) -> Dict[Tuple[str, ...], List[int]]:
+        """Word n-gram -> token positions where it starts."""
+        if self._ngrams is None:
+            postings: Dict[Tuple[str, ...], List[int]] = defaultdict(list)
+            tokens = self.tokens
+            for pos in range(len(tokens) - NGRAM + 1):
+                postings[tuple(tokens[pos:pos + NGRAM])].append(pos)
+            self._ngrams = dict(postings)
+        return self._ngrams
+
+    @property
+    def shingles(self) -> Dict[str, List[int]]:
+        """Char shingle -> token positions containing it."""
+        if self._shingles is None:
+            postings: Dict[str, List[int]] = defaultdict(list)
+            for pos, tok in enumerate(self.tokens):
+                for sh in _token_shingles(tok):
+                    postings[sh].append(pos)
+            self._shingles = dict(postings)
+        return self._shingles
+
+    def candidate_spans(self, line_tokens: Sequence[str], limit: int = 5) -> List[Tuple[int, int]]:
+        """
+        Propose token spans where a line may have been read.
+
+        Every word n-gram of the line shared with the transcript votes for the
+        start position it implies. Lines too short for n-grams, or with no
+        n-gram hits, fall back to voting with char shingles. Spans are padded
+        so a fuzzy scorer can absorb small insertions and deletions.
+
+        Returns:
+            Up to limit (start, end) token spans, best supported first; empty
+            when nothing in the transcript resembles the line
+        """
+        m = len(line_tokens)
+        if m == 0 or not self.tokens:
+            return []
+
+        votes: Dict[int, float] = defaultdict(float)
+        if m >= NGRAM:
+            ngrams = self.ngrams
+            for j in range(m - NGRAM + 1):
+                positions = ngrams.get(tuple(line_tokens[j:j + NGRAM]), ())
+                if len(positions) > MAX_POSTINGS:
+                    continue
+                for p in positions:
+                    votes[p - j] += 1.0
+            min_votes = 1.0
+        if not votes:
+            shingles = self.shingles
+            line_shingles = 0
+            for j, tok in enumerate(line_tokens):
+                tok_shingles = _token_shingles(tok)
+                line_shingles += len(tok_shingles)
+                for sh in tok_shingles:
+                    positions = shingles.get(sh, ())
+                    if len(positions) > MAX_POSTINGS:
+                        continue
+                    for p in positions:
+                        votes[p - j] += 1.0
+            min_votes = max(2.0, 0.3 * line_shingles)
+
+        return self._rank_starts(votes, m, limit, min_votes)
+
+    def _rank_starts(
+        self,
+        votes: Dict[int, float],
+        m: int,
+        limit: int,
+        min_votes: float
+    ) -> List[Tuple[int, int]]:
+        """Cluster nearby implied starts and return the best-supported padded spans."""
+        if not votes:
+            return []
+        n = len(self.tokens)
+        max_width = max(2, m // 2)
+        clusters = []   # [first_start, last_start, total_votes]
+        for start in sorted(votes):
+            if clusters and start - clusters[-1][1] <= 2 and start - clusters[-1][0] <= max_width:
+                clusters[-1][1] = start
+                clusters[-1][2] += votes[start]
+            else:
+                clusters.append([start, start, votes[start]])
+
+        clusters = [c for c in clusters if c[2] >= min_votes]
+        clusters.sort(key=lambda c: c[2], reverse=True)
+        pad = 2
+        spans = []
+        for first, last, _ in clusters[:limit]:
+            start = max(0, first - pad)
+            end = min(n, last + m + pad + 3)
+            if start < end:
+                spans.append((start, end))
+        return spans
+
+    def to_json(self) -> str:
+        return json.dumps({
+            "v": INDEX_VERSION,
+            "tokens": self.tokens,
+            "offsets": self.offsets,
+            "segment_starts": self.segment_starts,
+            "segment_times": self.segment_times,
+            "raw": self.raw,
+            "raw_spans": self.raw_spans,
+        })
+
+    @classmethod
+    def from_json(cls, data: str) -> Optional["TranscriptIndex"]:
+        """Load a persisted index, or None if it is missing or from an older version."""
+        try:
+            payload = json.loads(data)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(payload, dict) or payload.get("v") != INDEX_VERSION:
+            return None
+        return cls(
+            payload["tokens"], payload["offsets"],
+            payload.get("segment_starts"), payload.get("segment_times"),
+            payload.get("raw"), payload.get("raw_spans")
+        )
+
+
+def _token_shingles(token: str) -> List[str]:
+    """Distinct char shingles of a token, with boundary markers."""
+    padded = f"#{token}#"
+    if len(padded) <= SHINGLE:
+        return [padded]
+    return list({padded[i:i + SHINGLE] for i in range(len(padded) - SHINGLE + 1)})
+
+
+def index_for_audio(audio) -> Optional[TranscriptIndex]:
+    """
+    Return the TranscriptIndex for a transcribed AudioFile.
+
+    Served from an in-process LRU cache, then from the persisted
+    AudioFile.transcript_index column; built from the file's transcript
+    segments (or flat text when it has none), and stored on the object for
+    the caller to commit, only when neither is current.
+    """
+    if audio.transcription is None:
+        return None
+
+    key = f"{audio.id}:{len(audio.transcription)}:{hash(audio.transcription)}"
+    with _cache_lock:
+        index = _cache.get(key)
+        if index is not None:
+            _cache.move_to_end(key)
+            return index
+
+    index = TranscriptIndex.from_json(audio.transcript_index) if audio.transcript_index else None
+    if index is None:
+        segments = [
+            {"start": seg.start, "end": seg.end, "text": seg.text, "tokens": seg.tokens}
+            for seg in getattr(audio, "segments", None) or []
+        ]
+        index = TranscriptIndex.build(audio.transcription, segments)
+        audio.transcript_index = index.to_json()
+
+    with _cache_lock:
+        _cache[key] = index
+        while len(_cache) > _CACHE_SIZE:
+            _cache.popitem(last=False)
+    return index
@@ -0,0 +1,58 @@
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from models.database import TranscriptionCacheEntry
+from services.keyed_cache import KeyedCache
+
+# Size bounds for the cache table; least recently used entries are evicted first
+CACHE_MAX_ENTRIES = int(os.environ.get("TRANSCRIPTION_CACHE_MAX_ENTRIES", "2000"))
+CACHE_MAX_BYTES = int(os.environ.get("TRANSCRIPTION_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+transcription_cache = KeyedCache(TranscriptionCacheEntry, CACHE_MAX_ENTRIES, CACHE_MAX_BYTES)
+
+
+def cache_key(content_hash: str, engine: str, model: str, language: Optional[str] = None) -> str:
+    """Key a transcription by audio content and everything that changes the output."""
+    raw = f"{content_hash}|{engine}|{model}|{language or 'auto'}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_cached_transcription(db: Session, key: str) -> Optional[Dict]:
+    """
+    Return the cached result for a key, as transcribe_audio returns it,
+    and mark the entry as recently used.
+    """
+    entry = transcription_cache.get(db, key)
+    if entry is None:
+        return None
+    return {
+        "text": entry.transcription,
+        "segments": json.loads(entry.segments) if entry.segments else []
+    }
+
+
+def store_transcription(
+    db: Session,
+    key: str,
+    content_hash: str,
+    engine: str,
+    model: str,
+    language: Optional[str],
+    transcription: str,
+    segments: Optional[List[Dict]] = None
+):
+    """Insert or refresh a cache entry, then evict down to the configured bounds."""
+    segments_json = json.dumps(segments) if segments else None
+    transcription_cache.store(
+        db, key,
+        identity=dict(content_hash=content_hash, engine=engine, model=model, language=language or "auto"),
+        values=dict(
+            transcription=transcription,
+            segments=segments_json,
+            size_bytes=len(transcription.encode("utf-8")) + len(segments_json or "")
+        )
+    )
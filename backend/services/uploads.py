@@ -0,0 +1,120 @@
+import hashlib
+import os
+import zipfile
+from typing import Iterable, Optional, Tuple
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+
+CHUNK_SIZE = 1024 * 1024
+
+# Per-type upload limits, checked before and while streaming
+MAX_AUDIO_BYTES = int(os.environ.get("UPLOAD_MAX_AUDIO_BYTES", str(4 * 1024 ** 3)))
+MAX_SCRIPT_BYTES = int(os.environ.get("UPLOAD_MAX_SCRIPT_BYTES", str(50 * 1024 ** 2)))
+
+AUDIO_KINDS = ("wav", "mp3", "m4a", "ogg", "flac")
+SCRIPT_KINDS = ("docx", "pdf")
+
+
+def sniff_kind(head: bytes) -> Optional[str]:
+    """Identify a file type from its first bytes, or None if unrecognised."""
+    if head[:4] in (b"RIFF", b"RF64", b"BW64") and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[4:8] == b"ftyp":
+        return "m4a"
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3"
+    if head[:5] == b"%PDF-":
+        return "pdf"
+    if head[:4] == b"PK\x03\x04":
+        return "docx"  # confirmed against the zip contents once written
+    return None
+
+
+def _is_docx(filepath: str) -> bool:
+    try:
+        with zipfile.ZipFile(filepath) as zf:
+            return "word/document.xml" in zf.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+def _unsupported(allowed: Iterable[str], detail: Optional[str]) -> HTTPException:
+    return HTTPException(
+        status_code=415,
+        detail=detail or f"Unsupported file format. Allowed: {', '.join('.' + k for k in allowed)}"
+    )
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum size is {max_bytes // (1024 * 1024)} MB"
+    )
+
+
+async def stream_upload(
+    upload: UploadFile,
+    filepath: str,
+    allowed_kinds: Tuple[str, ...],
+    max_bytes: int,
+    unsupported_detail: Optional[str] = None
+) -> Tuple[str, int, str]:
+    """
+    Stream an upload to disk without blocking the event loop.
+
+    The type is taken from the file's magic bytes, not its name, and the
+    size limit is enforced from the declared size and again while copying,
+    so oversized or unsupported files are rejected as early as possible.
+    The partial file is removed on rejection.
+
+    Returns:
+        Tuple of (sha256 hex digest, size in bytes, detected kind)
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large(max_bytes)
+
+    hasher = hashlib.sha256()
+    size = 0
+    kind = None
+    try:
+        async with aiofiles.open(filepath, "wb") as out:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if kind is None:
+                    kind = sniff_kind(chunk[:16])
+                    if kind not in allowed_kinds:
+                        raise _unsupported(allowed_kinds, unsupported_detail)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                hasher.update(chunk)
+                await out.write(chunk)
+        if kind is None:
+            raise HTTPException(status_code=400, detail="Uploaded file is empty")
+        if kind == "docx" and not _is_docx(filepath):
+            raise _unsupported(allowed_kinds, unsupported_detail)
+    except BaseException:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        raise
+
+    return hasher.hexdigest(), size, kind
+
+
+def hash_file(filepath: str) -> str:
+    """SHA-256 of a file already on disk."""
+    hasher = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+    return hasher.hexdigest()
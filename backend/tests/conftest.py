@@ -0,0 +1,37 @@
+"""
+Tests run against a throwaway SQLite database and audio cache. The
+environment is set before anything imports models.database, which creates
+its engine and schema on import.
+"""
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="multicast-qc-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'test.db')}"
+os.environ["AUDIO_CACHE_DIR"] = os.path.join(_TMP, "pcm")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def db():
+    from models.database import SessionLocal
+
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def project(db):
+    from models.database import Project
+
+    project = Project(id=str(uuid.uuid4()), name="Test", show_code="TST", episode_number="1")
+    db.add(project)
+    db.commit()
+    return project
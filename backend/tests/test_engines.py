@@ -0,0 +1,32 @@
+import pytest
+
+from models.database import Settings
+from services import jobs
+from services.engines import get_engine
+
+
+@pytest.fixture
+def settings(db):
+    settings = db.get(Settings, 1) or Settings(id=1)
+    db.add(settings)
+    yield settings
+    db.delete(settings)
+    db.commit()
+
+
+@pytest.mark.parametrize("mode, engine, model, expected", [
+    ("local", "faster-whisper", "small", ("faster-whisper", "small")),
+    ("local", None, None, (jobs.resolve_engine("local").name, None)),
+    ("api", "faster-whisper", "small", ("openai-api", None)),
+])
+def test_preload_loads_the_engine_settings_pick(db, settings, monkeypatch, mode, engine, model, expected):
+    settings.whisper_mode, settings.transcription_engine, settings.transcription_model = mode, engine, model
+    db.commit()
+    preloaded = []
+    for name in ("faster-whisper", "whisper-local", "openai-api", "fake"):
+        monkeypatch.setattr(get_engine(name), "preload", lambda m, name=name: preloaded.append((name, m)))
+    monkeypatch.setattr(jobs, "WHISPER_PRELOAD", True)
+
+    jobs.preload_default_engine()
+
+    assert preloaded == [expected]
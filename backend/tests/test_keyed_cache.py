@@ -0,0 +1,44 @@
+from models.database import ParsedScriptCacheEntry, SessionLocal, TranscriptionCacheEntry
+from services.keyed_cache import KeyedCache
+from services.script_cache import cache_key as script_key, get_cached_lines, store_lines
+from services.transcription_cache import cache_key, get_cached_transcription, store_transcription
+
+
+def test_storing_an_existing_key_updates_it_in_place(db):
+    key = cache_key("same-audio", "fake", "v1")
+    store_transcription(db, key, "same-audio", "fake", "v1", None, "first take")
+    db.commit()
+
+    # A second job that finished the same audio, in its own session
+    other = SessionLocal()
+    try:
+        store_transcription(other, key, "same-audio", "fake", "v1", None, "second take", [{"start": 0.0}])
+        other.commit()
+    finally:
+        other.close()
+
+    db.expire_all()
+    assert get_cached_transcription(db, key) == {"text": "second take", "segments": [{"start": 0.0}]}
+    assert db.query(TranscriptionCacheEntry).filter(TranscriptionCacheEntry.key == key).count() == 1
+
+
+def test_script_cache_round_trips_parsed_lines(db):
+    key = script_key("same-script", "docx")
+    lines = [(1, "Hello there.", "#FF0000"), (2, "Goodbye.", "#00FF00")]
+    store_lines(db, key, "same-script", "docx", lines)
+    store_lines(db, key, "same-script", "docx", lines)
+    db.commit()
+    assert get_cached_lines(db, key) == lines
+    assert get_cached_lines(db, script_key("other-script", "docx")) is None
+
+
+def test_evicts_least_recently_used_entries_over_the_bounds(db):
+    cache = KeyedCache(ParsedScriptCacheEntry, max_entries=2, max_bytes=10 ** 9)
+    db.query(ParsedScriptCacheEntry).delete()
+    for name in ("a", "b", "c"):
+        cache.store(db, name, dict(content_hash=name, kind="docx", parser_version="1"),
+                    dict(lines=b"", line_count=0, size_bytes=1))
+        if name == "b":
+            cache.get(db, "a")  # a is now more recent than b
+    db.commit()
+    assert sorted(key for (key,) in db.query(ParsedScriptCacheEntry.key)) == ["a", "c"]
@@ -0,0 +1,44 @@
+import pytest
+
+from services.matcher import find_line_in_transcription, match_lines_to_transcription
+from services.transcript_index import TranscriptIndex, normalize_text
+
+TRANSCRIPT = "Hello, Mara! We never came back here after that night. Wait... for me by the door, OK?"
+SEGMENTS = [
+    {"start": 0.0, "end": 1.5, "text": "Hello, Mara!"},
+    {"start": 1.5, "end": 4.0, "text": " We never came back here after that night."},
+    {"start": 4.0, "end": 6.0, "text": "Wait... for me by the door, OK?"},
+]
+LINES = [
+    "We never came back here after that night.",
+    "Wait for me by the door.",
+    "We never come back here after the night.",
+]
+
+
+@pytest.mark.parametrize("index", [
+    TranscriptIndex.build(TRANSCRIPT),
+    TranscriptIndex.build(TRANSCRIPT, SEGMENTS),
+    TranscriptIndex.from_json(TranscriptIndex.build(TRANSCRIPT, SEGMENTS).to_json()),
+], ids=["text", "segments", "persisted"])
+def test_every_mode_reports_matched_text_as_transcribed(index):
+    fuzzy = match_lines_to_transcription(LINES, index, mode="fuzzy")
+    aligned = match_lines_to_transcription(LINES, index, mode="aligned")
+
+    for results in (fuzzy, aligned):
+        assert results[0]["matched_text"] == "We never came back here after that night."
+        assert results[1]["matched_text"] == "Wait... for me by the door,"
+        # Whatever span a near miss covers, it is a slice of the raw transcript
+        assert results[2]["matched_text"] is None or results[2]["matched_text"] in TRANSCRIPT
+    assert find_line_in_transcription(LINES[1], index)[2] == "Wait... for me by the door,"
+
+
+def test_raw_tokens_match_normalized_text():
+    index = TranscriptIndex.build(TRANSCRIPT, SEGMENTS)
+    assert index.tokens == normalize_text(TRANSCRIPT).split()
+    assert index.raw_span_text(0, len(index)) == TRANSCRIPT
+
+
+def test_indexes_without_raw_text_fall_back_to_normalized():
+    index = TranscriptIndex.build("", [{"start": 0.0, "end": 1.0, "tokens": "wait for me by the door"}])
+    assert index.raw_span_text(0, 2) == "wait for"
@@ -0,0 +1,104 @@
+import json
+import time
+import types
+import wave
+
+import httpx
+import openai
+import pytest
+
+from services import openai_client
+from services.openai_client import OpenAIClients, TokenBucket
+
+TRANSCRIPT = {
+    "text": "hello there", "language": "english", "duration": 1.0,
+    "segments": [{"id": 0, "start": 0.0, "end": 1.0, "text": " hello there", "avg_logprob": -0.2}],
+}
+
+
+class StubAPI:
+    """Answers transcription requests with the queued responses, then 200s."""
+
+    def __init__(self, *responses: httpx.Response):
+        self.responses = list(responses)
+        self.requests = 0
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        if self.responses:
+            return self.responses.pop(0)
+        return httpx.Response(200, json=TRANSCRIPT)
+
+
+def _error(status: int, headers: dict = None) -> httpx.Response:
+    return httpx.Response(status, headers=headers, content=json.dumps({"error": {"message": "stub"}}))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record waits instead of sleeping through them."""
+    waited = []
+    monkeypatch.setattr(openai_client, "time", types.SimpleNamespace(sleep=waited.append, monotonic=time.monotonic))
+    monkeypatch.setattr(openai_client, "OPENAI_MAX_RETRIES", 3)
+    monkeypatch.setattr(openai_client, "OPENAI_RETRY_BASE_SECONDS", 1.0)
+    # No request pacing, so every recorded wait is a retry backoff (or 0)
+    monkeypatch.setattr(openai_client, "OPENAI_REQUESTS_PER_MINUTE", 0)
+    return waited
+
+
+@pytest.fixture
+def take(tmp_path):
+    path = str(tmp_path / "take.wav")
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\0\0" * 16000)
+    return path
+
+
+def _clients(api: StubAPI) -> OpenAIClients:
+    return OpenAIClients(http_client=httpx.Client(transport=httpx.MockTransport(api)))
+
+
+def test_429_is_retried_no_sooner_than_retry_after(sleeps, take):
+    api = StubAPI(_error(429, {"Retry-After": "7"}))
+    result = _clients(api).transcribe("sk-test", take)
+    assert result["text"] == "hello there"
+    assert result["segments"][0]["text"] == "hello there"
+    assert api.requests == 2
+    assert 7 in sleeps
+
+
+def test_server_errors_back_off_then_give_up(sleeps, take):
+    api = StubAPI(*[_error(503)] * 10)
+    with pytest.raises(openai.InternalServerError):
+        _clients(api).transcribe("sk-test", take)
+    assert api.requests == 4
+    # Rate-limit waits and retry backoffs alternate; full jitter keeps
+    # each backoff within base * 2 ** attempt
+    backoffs = sleeps[1::2]
+    assert len(backoffs) == 3
+    assert all(0 <= s <= 2 ** attempt for attempt, s in enumerate(backoffs))
+
+
+def test_client_errors_are_not_retried(sleeps, take):
+    api = StubAPI(_error(400))
+    with pytest.raises(openai.BadRequestError):
+        _clients(api).transcribe("sk-test", take)
+    assert api.requests == 1
+
+
+def test_one_client_per_key_reused_across_calls(sleeps, take):
+    clients = _clients(StubAPI())
+    clients.transcribe("sk-test", take)
+    clients.transcribe("sk-test", take)
+    assert clients.client("sk-test") is clients.client("sk-test")
+    assert clients.client("sk-test") is not clients.client("sk-other")
+
+
+def test_token_bucket_paces_past_its_burst():
+    bucket = TokenBucket(rate=2, capacity=2)
+    assert [bucket.reserve() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+    assert TokenBucket(rate=0).reserve(100) == 0.0
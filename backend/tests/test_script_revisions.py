@@ -0,0 +1,47 @@
+import threading
+
+from models.database import SessionLocal, Artist, ScriptRevision
+from routers.scripts import _apply_script
+
+PALETTE = ("#FF0000", "#00FF00")
+
+
+def _parsed(texts):
+    return [(i + 1, text, PALETTE[i % len(PALETTE)]) for i, text in enumerate(texts)]
+
+
+def _upload(project_id: str, filename: str, parsed):
+    db = SessionLocal()
+    try:
+        diff = _apply_script(db, project_id, filename, parsed)
+        db.commit()
+        return diff
+    finally:
+        db.close()
+
+
+def test_concurrent_uploads_get_distinct_revision_numbers(db, project):
+    _upload(project.id, "v1.docx", _parsed(["One.", "Two.", "Three."]))
+
+    uploads = [_parsed(["One.", "Two.", f"Take {n}."]) for n in range(4)]
+    threads = [
+        threading.Thread(target=_upload, args=(project.id, f"v{n + 2}.docx", parsed))
+        for n, parsed in enumerate(uploads)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    numbers = sorted(n for (n,) in db.query(ScriptRevision.number).filter(ScriptRevision.project_id == project.id))
+    assert numbers == [1, 2, 3, 4, 5]
+
+
+def test_new_colour_after_pruning_gets_an_unused_artist_name(db, project):
+    _upload(project.id, "v1.docx", [(1, "One.", "#FF0000"), (2, "Two.", "#00FF00"), (3, "Three.", "#0000FF")])
+    # Artist 2's colour goes away and the artist is pruned; then a new colour arrives
+    _upload(project.id, "v2.docx", [(1, "One.", "#FF0000"), (2, "Three.", "#0000FF")])
+    _upload(project.id, "v3.docx", [(1, "One.", "#FF0000"), (2, "Three.", "#0000FF"), (3, "Four.", "#FFFF00")])
+
+    names = sorted(name for (name,) in db.query(Artist.name).filter(Artist.project_id == project.id))
+    assert names == ["Artist 1", "Artist 3", "Artist 4"]
@@ -0,0 +1,89 @@
+import os
+import threading
+import wave
+
+from models.database import Artist, AudioFile, ScriptLine, TranscriptionJob
+from services import jobs
+from services.status_counters import build_missing_counters, check_counters, read_counters, rebuild_counters
+
+SCRIPT = [
+    "We never came back here after that night.",
+    "Wait for me by the door.",
+    "Where were you this morning?",
+    "Listen, the road home is closed.",
+    "I know what you think you saw.",
+    "Stay in the light and keep walking.",
+]
+
+
+def _write_take(path: str, seconds: float, text: str):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(16000)
+        w.writeframes(b"\0\0" * int(16000 * seconds))
+    # The fake engine transcribes a take as its sidecar text
+    with open(os.path.splitext(path)[0] + ".txt", "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_overlapping_jobs_for_one_artist_keep_counters_exact(db, project, tmp_path, monkeypatch):
+    artist = Artist(project_id=project.id, name="Alex", color="#FF0000")
+    db.add(artist)
+    db.flush()
+    db.add_all([
+        ScriptLine(project_id=project.id, artist_id=artist.id, line_number=i + 1,
+                   text=text, artist_color=artist.color, status="pending")
+        for i, text in enumerate(SCRIPT)
+    ])
+    rebuild_counters(db, project.id)
+
+    job_ids = []
+    for take, seconds in (("take1", 2.0), ("take2", 2.5)):
+        path = str(tmp_path / f"{take}.wav")
+        _write_take(path, seconds, " ".join(SCRIPT))
+        audio = AudioFile(project_id=project.id, artist_id=artist.id, filename=f"{take}.wav", filepath=path)
+        db.add(audio)
+        db.flush()
+        job = TranscriptionJob(project_id=project.id, audio_id=audio.id, mode="local", engine="fake")
+        db.add(job)
+        db.flush()
+        job_ids.append(job.id)
+    db.commit()
+
+    # Both jobs read the artist's lines as pending before either writes its matches
+    both_read = threading.Barrier(len(job_ids), timeout=30)
+    match = jobs.match_lines_to_transcription
+
+    def match_after_both_read(*args, **kwargs):
+        both_read.wait()
+        return match(*args, **kwargs)
+
+    monkeypatch.setattr(jobs, "match_lines_to_transcription", match_after_both_read)
+    threads = [threading.Thread(target=jobs.run_transcription_job, args=(job_id,)) for job_id in job_ids]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    db.expire_all()
+    assert [db.get(TranscriptionJob, job_id).status for job_id in job_ids] == ["done", "done"]
+    assert check_counters(db, project.id) == []
+    assert read_counters(db, project.id)[artist.id] == {"found": len(SCRIPT)}
+
+
+def test_counters_for_older_projects_are_built_at_startup_not_on_read(db, project):
+    artist = Artist(project_id=project.id, name="Alex", color="#FF0000")
+    db.add(artist)
+    db.flush()
+    db.add_all([
+        ScriptLine(project_id=project.id, artist_id=artist.id, line_number=i + 1,
+                   text=text, artist_color=artist.color, status="pending")
+        for i, text in enumerate(SCRIPT)
+    ])
+    db.commit()
+
+    assert read_counters(db, project.id) == {}
+    assert build_missing_counters() >= 1
+    assert read_counters(db, project.id)[artist.id] == {"pending": len(SCRIPT)}
+    assert build_missing_counters() == 0
@@ -0,0 +1,51 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from models.database import Artist, AudioFile, TranscriptionJob
+
+
+@pytest.fixture
+def audio(db, project):
+    artist = Artist(project_id=project.id, name="Alex", color="#FF0000")
+    db.add(artist)
+    db.flush()
+    audio = AudioFile(project_id=project.id, artist_id=artist.id, filename="take.wav", filepath="take.wav")
+    db.add(audio)
+    db.commit()
+    return audio
+
+
+def test_only_one_active_job_per_audio(db, audio):
+    db.add(TranscriptionJob(project_id=audio.project_id, audio_id=audio.id, status="queued"))
+    db.commit()
+    db.add(TranscriptionJob(project_id=audio.project_id, audio_id=audio.id, status="running"))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+    # Finished jobs don't count
+    db.add(TranscriptionJob(project_id=audio.project_id, audio_id=audio.id, status="done"))
+    db.add(TranscriptionJob(project_id=audio.project_id, audio_id=audio.id, status="failed"))
+    db.commit()
+
+
+def test_concurrent_transcribe_requests_share_one_job(db, audio, monkeypatch):
+    from main import app
+    from routers import audio as audio_router
+
+    monkeypatch.setattr(audio_router, "enqueue_job", lambda job_id: None)
+
+    async def post_many():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            url = f"/audio/{audio.project_id}/transcribe/{audio.id}"
+            return await asyncio.gather(*(client.post(url) for _ in range(8)))
+
+    responses = asyncio.run(post_many())
+
+    assert {r.status_code for r in responses} == {202}
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert db.query(TranscriptionJob).filter(TranscriptionJob.audio_id == audio.id).count() == 1
@@ -1,11 +1,14 @@
 import { useState, useCallback } from 'react';
 import { Link } from 'react-router-dom';
 import { Music, Check, AlertCircle, Loader2, Settings } from 'lucide-react';
-import { audioApi, Artist } from '../lib/api';
+import { audioApi, Artist, RESUMABLE_UPLOAD_THRESHOLD } from '../lib/api';
 import { cn, getContrastColor } from '../lib/utils';
 
 const API_KEY_ERROR = 'OpenAI API key not configured';
 const LOCAL_WHISPER_ERROR = 'Local Whisper is not installed';
+const JOB_POLL_INTERVAL_MS = 2000;
+
+const sleep = (ms: number) => new Promise((resolve) => setTimeout(resolve, ms));
 
 interface AudioUploadProps {
   projectId: string;
@@ -72,14 +75,26 @@ export default function AudioUpload({ projectId, artists, onUploadComplete }: Au
 
     try {
       setMessage('Uploading audio...');
-      const uploadResponse = await audioApi.upload(projectId, selectedArtist, file);
+      const uploadResponse = file.size > RESUMABLE_UPLOAD_THRESHOLD
+        ? await audioApi.uploadResumable(projectId, selectedArtist, file, (received, total) =>
+            setMessage(`Uploading audio... ${Math.floor((received / total) * 100)}%`))
+        : await audioApi.upload(projectId, selectedArtist, file);
       onUploadComplete(); // refresh list so uploaded file appears even if transcribe fails
 
       setIsUploading(false);
       setIsTranscribing(true);
       setMessage('Transcribing with Whisper...');
 
-      await audioApi.transcribe(projectId, uploadResponse.data.id);
+      let { data: job } = await audioApi.transcribe(projectId, uploadResponse.data.id);
+      while (job.status === 'queued' || job.status === 'running') {
+        setMessage(job.status === 'queued' ? 'Waiting for a transcription worker...' : 'Transcribing with Whisper...');
+        await sleep(JOB_POLL_INTERVAL_MS);
+        ({ data: job } = await audioApi.getJob(projectId, job.id));
+      }
+      if (job.status === 'failed') {
+        // Surface job errors through the same path as HTTP error details
+        throw { response: { data: { detail: job.error ?? '' } } };
+      }
 
       setStatus('success');
       setMessage('Audio transcribed and matched against script!');
@@ -102,6 +117,41 @@ export default function AudioUpload({ projectId, artists, onUploadComplete }: Au
     }
   };
 
+  const handleBulkSelect = async (e: React.ChangeEvent<HTMLInputElement>) => {
+    const files = Array.from(e.target.files ?? []);
+    e.target.value = '';
+    if (files.length === 0) return;
+
+    setIsUploading(true);
+    setStatus('idle');
+    try {
+      setMessage(`Uploading ${files.length} file${files.length === 1 ? '' : 's'}...`);
+      let { data: batch } = await audioApi.ingest(projectId, files);
+      onUploadComplete();
+
+      setIsUploading(false);
+      setIsTranscribing(true);
+      while (batch.queued + batch.running > 0) {
+        setMessage(`Transcribing ${batch.done + batch.failed} of ${batch.queued + batch.running + batch.done + batch.failed} files...`);
+        await sleep(JOB_POLL_INTERVAL_MS);
+        ({ data: batch } = await audioApi.getIngest(projectId, batch.id));
+      }
+
+      const skipped = batch.items.filter((item) => item.status === 'unassigned' || item.status === 'rejected');
+      const summary = `${batch.done} transcribed, ${batch.failed} failed` +
+        (skipped.length ? `; skipped ${skipped.map((item) => item.filename).join(', ')}` : '');
+      setStatus(batch.failed || skipped.length ? 'error' : 'success');
+      setMessage(summary);
+      onUploadComplete();
+    } catch (error: any) {
+      setStatus('error');
+      setMessage(error.response?.data?.detail || 'Bulk upload failed');
+    } finally {
+      setIsUploading(false);
+      setIsTranscribing(false);
+    }
+  };
+
   return (
     <div className="space-y-4">
       <div>
@@ -185,6 +235,22 @@ export default function AudioUpload({ projectId, artists, onUploadComplete }: Au
         </label>
       </div>
 
+      <div className="text-xs text-gray-500 dark:text-pfm-text-muted">
+        <input
+          type="file"
+          multiple
+          accept=".wav,.mp3,.m4a,.ogg,.flac,.zip"
+          onChange={handleBulkSelect}
+          className="hidden"
+          id="audio-bulk-upload"
+          disabled={isUploading || isTranscribing}
+        />
+        <label htmlFor="audio-bulk-upload" className="cursor-pointer underline hover:text-purple-600 dark:hover:text-pfm-accent">
+          Bulk upload several files or a zip
+        </label>
+        {' '}— artists are assigned from filenames like MYS_E045_VOA1_FULL.wav
+      </div>
+
       {(status !== 'idle' || message) && (
         <div
           className={cn(
@@ -1,7 +1,8 @@
 import { useState } from 'react';
 import { CheckCircle, AlertCircle, HelpCircle, ChevronDown, ChevronUp } from 'lucide-react';
 import { QCReport as QCReportType } from '../lib/api';
-import { cn, getContrastColor, formatPercentage } from '../lib/utils';
+import { cn, getContrastColor, formatPercentage, formatTimecode } from '../lib/utils';
+import { useScriptLines } from '../lib/useScriptLines';
 
 interface QCReportProps {
   report: QCReportType;
@@ -11,11 +12,17 @@ export default function QCReport({ report }: QCReportProps) {
   const [filter, setFilter] = useState<'all' | 'found' | 'partial' | 'missing'>('all');
   const [expandedLines, setExpandedLines] = useState<Set<string>>(new Set());
 
-  const filteredLines = report.lines.filter((line) => {
-    if (filter === 'all') return true;
-    if (filter === 'missing') return line.status === 'missing' || line.status === 'pending';
-    return line.status === filter;
-  });
+  // Lines are paged from the server, filtered there; pending lines count as missing
+  const {
+    lines: filteredLines,
+    hasMore,
+    isLoading,
+    loadMore,
+  } = useScriptLines(
+    report.project_id,
+    filter === 'all' ? {} : { status: filter === 'missing' ? ['missing', 'pending'] : [filter] },
+    report
+  );
 
   const toggleExpand = (lineId: string) => {
     const newExpanded = new Set(expandedLines);
@@ -146,6 +153,11 @@ export default function QCReport({ report }: QCReportProps) {
                       {formatPercentage(line.confidence * 100)} match
                     </span>
                   )}
+                  {line.matched_start !== null && (
+                    <span className="text-xs font-mono text-gray-500 dark:text-pfm-text-muted">
+                      @ {formatTimecode(line.matched_start)}
+                    </span>
+                  )}
                 </div>
                 <p className="text-sm text-gray-900 dark:text-pfm-text">{line.text}</p>
               </div>
@@ -167,7 +179,17 @@ export default function QCReport({ report }: QCReportProps) {
           </div>
         ))}
 
-        {filteredLines.length === 0 && (
+        {hasMore && (
+          <button
+            onClick={loadMore}
+            disabled={isLoading}
+            className="w-full py-2 text-sm text-purple-600 dark:text-pfm-accent hover:underline disabled:opacity-50"
+          >
+            {isLoading ? 'Loading...' : 'Load more lines'}
+          </button>
+        )}
+
+        {filteredLines.length === 0 && !isLoading && (
           <div className="text-center py-8 text-gray-500 dark:text-pfm-text-muted">
             No lines match this filter
           </div>
@@ -15,6 +15,13 @@ export interface Project {
   created_at: string;
   script_uploaded: boolean;
   status: string;
+  total_lines: number;
+  found_lines: number;
+  partial_lines: number;
+  missing_lines: number;
+  completion_percentage: number;
+  transcription_engine: string | null;
+  transcription_model: string | null;
 }
 
 export interface Artist {
@@ -36,6 +43,9 @@ export interface ScriptLine {
   status: 'pending' | 'found' | 'partial' | 'missing';
   confidence: number;
   matched_text: string | null;
+  matched_audio_id: string | null;
+  matched_start: number | null;
+  matched_end: number | null;
 }
 
 export interface QCReport {
@@ -57,6 +67,87 @@ export interface AudioFile {
   artist_id: string;
   transcription: string | null;
   status: string;
+  duration: number | null;
+  sample_rate: number | null;
+  channels: number | null;
+}
+
+export interface TranscriptionJob {
+  id: string;
+  audio_id: string;
+  status: 'queued' | 'running' | 'done' | 'failed';
+  mode: string | null;
+  engine: string | null;
+  model: string | null;
+  error: string | null;
+  lines_matched: number;
+  cache_hit: boolean;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  transcription: string | null;
+}
+
+export interface IngestItem {
+  filename: string;
+  artist_id: string | null;
+  artist_name: string | null;
+  audio_id: string | null;
+  job_id: string | null;
+  status: TranscriptionJob['status'] | 'unassigned' | 'rejected';
+  error: string | null;
+}
+
+export interface IngestBatch {
+  id: string;
+  project_id: string;
+  created_at: string;
+  total: number;
+  queued: number;
+  running: number;
+  done: number;
+  failed: number;
+  unassigned: number;
+  rejected: number;
+  items: IngestItem[];
+}
+
+export interface UploadSession {
+  id: string;
+  project_id: string;
+  artist_id: string;
+  filename: string;
+  total_size: number;
+  received_bytes: number;
+  status: 'open' | 'finalized';
+  chunks: { offset: number; size: number; sha256: string }[];
+  audio_id: string | null;
+  created_at: string;
+  updated_at: string;
+}
+
+// Files above this go through the resumable upload endpoints in chunks of UPLOAD_CHUNK_BYTES
+export const RESUMABLE_UPLOAD_THRESHOLD = 100 * 1024 * 1024;
+const UPLOAD_CHUNK_BYTES = 16 * 1024 * 1024;
+const UPLOAD_CHUNK_RETRIES = 5;
+
+async function sha256Hex(data: ArrayBuffer): Promise<string | undefined> {
+  // crypto.subtle only exists in secure contexts; the checksum is optional
+  if (!globalThis.crypto?.subtle) return undefined;
+  const digest = await crypto.subtle.digest('SHA-256', data);
+  return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+export interface LineQuery {
+  status?: ScriptLine['status'][];
+  artist_id?: string;
+  after?: number;
+  limit?: number;
+}
+
+export interface LinePage {
+  lines: ScriptLine[];
+  nextCursor: number | null;
 }
 
 export const projectsApi = {
@@ -75,8 +166,15 @@ export const scriptsApi = {
     // Do NOT set Content-Type: axios must set it with boundary so the server can parse multipart
     return api.post(`/scripts/${projectId}/upload`, formData);
   },
-  getLines: (projectId: string) =>
-    api.get<ScriptLine[]>(`/scripts/${projectId}/lines`),
+  getLines: async (projectId: string, params: LineQuery = {}): Promise<LinePage> => {
+    const res = await api.get<ScriptLine[]>(`/scripts/${projectId}/lines`, {
+      params,
+      // status=missing&status=pending, the form FastAPI reads lists in
+      paramsSerializer: { indexes: null },
+    });
+    const next = res.headers['x-next-cursor'];
+    return { lines: res.data, nextCursor: next ? Number(next) : null };
+  },
   getColors: (projectId: string) =>
     api.get<{ color: string; name: string; id: string }[]>(`/scripts/${projectId}/colors`),
   updateArtist: (projectId: string, artistId: string, name: string) =>
@@ -94,8 +192,53 @@ export const audioApi = {
     // Do NOT set Content-Type: axios must set it with boundary so the server can parse multipart
     return api.post<AudioFile>(`/audio/${projectId}/upload`, formData);
   },
+  uploadResumable: async (
+    projectId: string,
+    artistId: string,
+    file: File,
+    onProgress?: (received: number, total: number) => void
+  ) => {
+    let { data: session } = await api.post<UploadSession>(`/audio/${projectId}/uploads`, {
+      artist_id: artistId,
+      filename: file.name,
+      total_size: file.size,
+    });
+    const url = `/audio/${projectId}/uploads/${session.id}`;
+    let failures = 0;
+    while (session.received_bytes < file.size) {
+      const offset = session.received_bytes;
+      const chunk = await file.slice(offset, offset + UPLOAD_CHUNK_BYTES).arrayBuffer();
+      const checksum = await sha256Hex(chunk);
+      try {
+        ({ data: session } = await api.put<UploadSession>(url, chunk, {
+          params: { offset },
+          headers: {
+            'Content-Type': 'application/octet-stream',
+            ...(checksum ? { 'X-Chunk-SHA256': checksum } : {}),
+          },
+        }));
+        failures = 0;
+      } catch (error) {
+        if (++failures > UPLOAD_CHUNK_RETRIES) throw error;
+        // Ask the server where it got to and resume from there
+        await new Promise((resolve) => setTimeout(resolve, 1000 * failures));
+        ({ data: session } = await api.get<UploadSession>(url));
+      }
+      onProgress?.(session.received_bytes, file.size);
+    }
+    return api.post<AudioFile>(`${url}/finalize`);
+  },
+  ingest: (projectId: string, files: File[]) => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    return api.post<IngestBatch>(`/audio/${projectId}/ingest`, formData);
+  },
+  getIngest: (projectId: string, batchId: string) =>
+    api.get<IngestBatch>(`/audio/${projectId}/ingest/${batchId}`),
   transcribe: (projectId: string, audioId: string) =>
-    api.post(`/audio/${projectId}/transcribe/${audioId}`),
+    api.post<TranscriptionJob>(`/audio/${projectId}/transcribe/${audioId}`),
+  getJob: (projectId: string, jobId: string) =>
+    api.get<TranscriptionJob>(`/audio/${projectId}/jobs/${jobId}`),
   getFiles: (projectId: string) =>
     api.get<AudioFile[]>(`/audio/${projectId}/files`),
 };
@@ -107,9 +250,22 @@ export const qcApi = {
     api.get(`/qc/${projectId}/summary`),
 };
 
+export interface TranscriptionEngine {
+  name: string;
+  default_model: string;
+  needs_api_key: boolean;
+  installed: boolean;
+}
+
 export const settingsApi = {
   get: () => api.get('/settings'),
-  update: (data: { openai_api_key?: string; whisper_mode?: 'api' | 'local' }) =>
+  update: (data: {
+    openai_api_key?: string;
+    whisper_mode?: 'api' | 'local';
+    transcription_engine?: string;
+    transcription_model?: string;
+    match_mode?: 'fuzzy' | 'aligned';
+  }) =>
     api.put('/settings', data),
   testKey: () => api.post('/settings/test-api-key'),
 };
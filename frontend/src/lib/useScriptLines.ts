@@ -0,0 +1,46 @@
+import { useState, useEffect, useCallback } from 'react';
+import { scriptsApi, ScriptLine, LineQuery } from './api';
+
+const PAGE_SIZE = 100;
+
+/**
+ * Script lines fetched a page at a time (keyset on line number).
+ * Refetches from the first page when the filter or refreshKey changes.
+ */
+export function useScriptLines(
+  projectId: string,
+  filter: Omit<LineQuery, 'after' | 'limit'> = {},
+  refreshKey: unknown = null
+) {
+  const [lines, setLines] = useState<ScriptLine[]>([]);
+  const [nextCursor, setNextCursor] = useState<number | null>(null);
+  const [isLoading, setIsLoading] = useState(false);
+  const filterKey = JSON.stringify(filter);
+
+  const fetchPage = useCallback(
+    async (after?: number) => {
+      if (!projectId) return;
+      setIsLoading(true);
+      try {
+        const page = await scriptsApi.getLines(projectId, { ...filter, after, limit: PAGE_SIZE });
+        setLines((prev) => (after === undefined ? page.lines : [...prev, ...page.lines]));
+        setNextCursor(page.nextCursor);
+      } catch (error) {
+        console.error('Failed to load script lines:', error);
+      } finally {
+        setIsLoading(false);
+      }
+    },
+    [projectId, filterKey]
+  );
+
+  useEffect(() => {
+    fetchPage();
+  }, [fetchPage, refreshKey]);
+
+  const loadMore = useCallback(() => {
+    if (nextCursor !== null) fetchPage(nextCursor);
+  }, [fetchPage, nextCursor]);
+
+  return { lines, hasMore: nextCursor !== null, isLoading, loadMore };
+}
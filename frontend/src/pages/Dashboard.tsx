@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { Plus, Folder, Trash2, ExternalLink } from 'lucide-react';
 import { projectsApi, Project } from '../lib/api';
-import { cn } from '../lib/utils';
+import { cn, formatPercentage } from '../lib/utils';
 
 export default function Dashboard() {
   const navigate = useNavigate();
@@ -156,6 +156,11 @@ export default function Dashboard() {
                 >
                   {project.script_uploaded ? 'Script uploaded' : 'No script'}
                 </span>
+                {project.total_lines > 0 && (
+                  <span className="text-xs font-medium text-gray-600 dark:text-pfm-text-muted">
+                    {formatPercentage(project.completion_percentage)} · {project.found_lines}/{project.total_lines} found
+                  </span>
+                )}
                 <span className="text-xs text-gray-400 dark:text-pfm-text-muted">
                   {new Date(project.created_at).toLocaleDateString()}
                 </span>
@@ -7,6 +7,7 @@ import AudioUpload from '../components/AudioUpload';
 import ArtistPanel from '../components/ArtistPanel';
 import QCReport from '../components/QCReport';
 import { cn } from '../lib/utils';
+import { useScriptLines } from '../lib/useScriptLines';
 
 type Tab = 'script' | 'audio' | 'report';
 
@@ -17,6 +18,7 @@ export default function ProjectView() {
   const [report, setReport] = useState<QCReportType | null>(null);
   const [activeTab, setActiveTab] = useState<Tab>('script');
   const [isLoading, setIsLoading] = useState(true);
+  const preview = useScriptLines(projectId ?? '', {}, report);
 
   useEffect(() => {
     if (projectId) {
@@ -166,7 +168,7 @@ export default function ProjectView() {
                 <div className="mt-6 pt-6 border-t border-gray-200 dark:border-pfm-border">
                   <h3 className="text-sm font-medium text-gray-700 dark:text-pfm-text-muted mb-3">Script Preview</h3>
                   <div className="max-h-96 overflow-y-auto space-y-2">
-                    {report.lines.slice(0, 20).map((line) => (
+                    {preview.lines.map((line) => (
                       <div
                         key={line.id}
                         className="flex items-start gap-2 text-sm"
@@ -180,10 +182,14 @@ export default function ProjectView() {
                         </span>
                       </div>
                     ))}
-                    {report.lines.length > 20 && (
-                      <p className="text-sm text-gray-500 dark:text-pfm-text-muted pl-10">
-                        ... and {report.lines.length - 20} more lines
-                      </p>
+                    {preview.hasMore && (
+                      <button
+                        onClick={preview.loadMore}
+                        disabled={preview.isLoading}
+                        className="text-sm text-purple-600 dark:text-pfm-accent hover:underline pl-10 disabled:opacity-50"
+                      >
+                        {preview.isLoading ? 'Loading...' : `Show more of ${report.total_lines} lines`}
+                      </button>
                     )}
                   </div>
                 </div>
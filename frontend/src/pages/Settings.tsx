@@ -1,11 +1,15 @@
 import { useState, useEffect } from 'react';
-import { Key, Cpu, Check, AlertCircle, Loader2 } from 'lucide-react';
-import { settingsApi } from '../lib/api';
+import { Key, Cpu, ListOrdered, Check, AlertCircle, Loader2 } from 'lucide-react';
+import { settingsApi, type TranscriptionEngine } from '../lib/api';
 import { cn } from '../lib/utils';
 
 export default function Settings() {
   const [apiKey, setApiKey] = useState('');
   const [whisperMode, setWhisperMode] = useState<'api' | 'local'>('api');
+  const [engine, setEngine] = useState('');
+  const [model, setModel] = useState('');
+  const [engines, setEngines] = useState<TranscriptionEngine[]>([]);
+  const [matchMode, setMatchMode] = useState<'fuzzy' | 'aligned'>('fuzzy');
   const [apiKeyConfigured, setApiKeyConfigured] = useState(false);
   const [isSaving, setIsSaving] = useState(false);
   const [isTesting, setIsTesting] = useState(false);
@@ -19,6 +23,10 @@ export default function Settings() {
     try {
       const response = await settingsApi.get();
       setWhisperMode(response.data.whisper_mode);
+      setEngine(response.data.transcription_engine ?? '');
+      setModel(response.data.transcription_model ?? '');
+      setEngines(response.data.engines ?? []);
+      setMatchMode(response.data.match_mode ?? 'fuzzy');
       setApiKeyConfigured(response.data.api_key_configured);
     } catch (error) {
       console.error('Failed to load settings:', error);
@@ -33,6 +41,9 @@ export default function Settings() {
       await settingsApi.update({
         openai_api_key: apiKey || undefined,
         whisper_mode: whisperMode,
+        transcription_engine: engine,
+        transcription_model: model,
+        match_mode: matchMode,
       });
       setMessage({ type: 'success', text: 'Settings saved successfully!' });
       if (apiKey) {
@@ -107,11 +118,78 @@ export default function Settings() {
             </p>
           </button>
         </div>
+        {whisperMode === 'local' && (
+          <div className="grid grid-cols-2 gap-4 mt-4">
+            <label className="text-sm text-gray-600 dark:text-pfm-text-muted">
+              Engine
+              <select
+                value={engine}
+                onChange={(e) => setEngine(e.target.value)}
+                className="mt-1 w-full px-3 py-2 border border-gray-300 dark:border-pfm-border dark:bg-pfm-bg dark:text-pfm-text rounded-lg focus:outline-none focus:ring-2 focus:ring-purple-500 dark:focus:ring-pfm-accent"
+              >
+                <option value="">Server default</option>
+                {engines.filter((e) => !e.needs_api_key).map((e) => (
+                  <option key={e.name} value={e.name} disabled={!e.installed}>
+                    {e.name}{e.installed ? '' : ' (not installed)'}
+                  </option>
+                ))}
+              </select>
+            </label>
+            <label className="text-sm text-gray-600 dark:text-pfm-text-muted">
+              Model
+              <input
+                value={model}
+                onChange={(e) => setModel(e.target.value)}
+                placeholder={engines.find((e) => e.name === engine)?.default_model ?? 'default'}
+                className="mt-1 w-full px-3 py-2 border border-gray-300 dark:border-pfm-border dark:bg-pfm-bg dark:text-pfm-text rounded-lg focus:outline-none focus:ring-2 focus:ring-purple-500 dark:focus:ring-pfm-accent"
+              />
+            </label>
+          </div>
+        )}
         <p className="text-xs text-gray-500 dark:text-pfm-text-muted mt-3">
           Recommended: use OpenAI API and add your key below so transcription works everywhere.
+          On CPU-only servers, faster-whisper runs local models several times faster.
         </p>
       </div>
 
+      {/* Match Mode */}
+      <div className="bg-white dark:bg-pfm-surface rounded-xl border border-gray-200 dark:border-pfm-border p-6 shadow-sm">
+        <h2 className="text-lg font-semibold text-gray-900 dark:text-pfm-text mb-4 flex items-center gap-2">
+          <ListOrdered className="w-5 h-5 text-purple-600 dark:text-pfm-accent" />
+          Line Matching
+        </h2>
+        <div className="grid grid-cols-2 gap-4">
+          <button
+            onClick={() => setMatchMode('fuzzy')}
+            className={cn(
+              'p-4 rounded-lg border-2 text-left transition-all',
+              matchMode === 'fuzzy'
+                ? 'border-purple-500 bg-purple-50 dark:border-pfm-accent dark:bg-pfm-accent/20'
+                : 'border-gray-200 hover:border-gray-300 dark:border-pfm-border dark:hover:border-pfm-text-muted'
+            )}
+          >
+            <h3 className="font-medium text-gray-900 dark:text-pfm-text">Fuzzy</h3>
+            <p className="text-sm text-gray-500 dark:text-pfm-text-muted mt-1">
+              Finds each line wherever it was read in the take, in any order.
+            </p>
+          </button>
+          <button
+            onClick={() => setMatchMode('aligned')}
+            className={cn(
+              'p-4 rounded-lg border-2 text-left transition-all',
+              matchMode === 'aligned'
+                ? 'border-purple-500 bg-purple-50 dark:border-pfm-accent dark:bg-pfm-accent/20'
+                : 'border-gray-200 hover:border-gray-300 dark:border-pfm-border dark:hover:border-pfm-text-muted'
+            )}
+          >
+            <h3 className="font-medium text-gray-900 dark:text-pfm-text">Script Order</h3>
+            <p className="text-sm text-gray-500 dark:text-pfm-text-muted mt-1">
+              Aligns lines in reading order. Faster on long takes, fewer false hits.
+            </p>
+          </button>
+        </div>
+      </div>
+
       {/* API Key */}
       <div className="bg-white dark:bg-pfm-surface rounded-xl border border-gray-200 dark:border-pfm-border p-6 shadow-sm">
         <h2 className="text-lg font-semibold text-gray-900 dark:text-pfm-text mb-4 flex items-center gap-2">